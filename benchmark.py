@@ -0,0 +1,514 @@
+from src.recognizer import *
+from src.validator import *
+from src.utils import *
+from src.correction import PlateCorrector
+from src.metrics import RecognizerMetrics
+from benchmarks.legacy_validator import LegacyRomanianLicensePlateValidator
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+
+DEFAULT_IMAGE_DIRS = ["images/", "PiCamImages/"]
+DEFAULT_LABELS = "benchmarks/labels.csv"
+# ----- reference suite report committed with the repository (regenerated with: suite --output DEFAULT_BASELINE) -----
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+# ----- latency increases under this many ms are timing noise, even if they are above the relative tolerance -----
+MIN_LATENCY_REGRESSION_MS = 1.0
+
+# ----- stages of the pipeline reported by the suite (keys of PipelineResult.timings) -----
+SUITE_STAGES = ["preprocess_ms", "contour_ms", "extract_ms", "clean_ms", "ocr_ms", "total_ms"]
+
+# ----- settings of the report environment that must match the baseline for the rates to be compared -----
+SUITE_CONFIGURATION = ["ocr_backend", "localization_scale", "ocr_cascade", "plate_correction"]
+
+
+def collectImagePaths(image_dirs):
+    """
+    This function collects the image files of the benchmark directories.
+        :param image_dirs: list of directories with images
+    :return: sorted list of image paths
+    """
+    image_paths = []
+    for images_path in image_dirs:
+        for file in sorted(os.listdir(images_path)):
+            if validImageFile(file):
+                image_paths.append(os.path.join(images_path, file))
+
+    return image_paths
+
+
+def summarizeTimes(times_ms):
+    """
+    This function summarizes a list of durations.
+        :param times_ms: durations in milliseconds
+    :return: dictionary with the count, mean and median durations
+    """
+    if not times_ms:
+        return {"count": 0, "mean_ms": None, "median_ms": None}
+
+    return {"count": len(times_ms),
+            "mean_ms": round(statistics.mean(times_ms), 3),
+            "median_ms": round(statistics.median(times_ms), 3)}
+
+
+def benchmarkOcr(image_paths, backends, repeat=3):
+    """
+    This function measures the per-plate OCR time of every backend on the same plate regions.
+        :param image_paths: list of image paths
+        :param backends: list of OCR backend names
+        :param repeat: number of times every plate is read
+    :return: dictionary with the timing summary per backend
+    """
+    # ----- extracting the plate regions once, so only the OCR step is measured -----
+    recognizer = NumberPlateRecognizer(ocr_backend="pytesseract")
+    plate_regions = []
+    for image_path in image_paths:
+        image = cv2.imread(image_path)
+        plate_contour = recognizer.findPlateContour(recognizer.preprocessImage(image))
+        if plate_contour is not None:
+            plate_regions.append(recognizer.extractPlateRegion(image, plate_contour))
+
+    report = {}
+    for name in backends:
+        try:
+            backend = createOcrBackend(name, pool_size=1)
+        except ImportError as e:
+            print(f"[Benchmark] Skipping the {name} backend: {e}")
+            continue
+
+        # ----- warm-up read, the first call pays for the lazy initialisations -----
+        if plate_regions:
+            backend.readText(plate_regions[0])
+
+        times_ms = []
+        for _ in range(repeat):
+            for plate_region in plate_regions:
+                start = time.perf_counter()
+                backend.readText(plate_region)
+                times_ms.append((time.perf_counter() - start) * 1000)
+
+        backend.close()
+        report[name] = summarizeTimes(times_ms)
+
+    return report
+
+
+def localizePlate(recognizer, image):
+    """
+    This function runs only the localization part of the pipeline (preprocessing and contour search).
+        :param recognizer: the recognizer
+        :param image: input image
+    :return: the plate bounding box, or None if no plate was found
+    """
+    plate_contour = recognizer.localizePlate(image)[3]
+    if plate_contour is None:
+        return None
+
+    return cv2.boundingRect(plate_contour)
+
+
+def benchmarkLocalization(image_paths, scales, repeat=3, min_iou=0.5, min_recall=0.95):
+    """
+    This function compares the coarse-to-fine localization against the full frame path.
+    The detection recall of a scale is the fraction of the plates found on the full frame that are
+    also found (with an IoU of at least min_iou) on that scale. A scale is only usable if its recall
+    reaches min_recall; the fallbacks are the frames that paid the coarse and the full-frame pass.
+        :param image_paths: list of image paths
+        :param scales: list of localization scales
+        :param repeat: number of times every image is processed
+        :param min_iou: minimum IoU for two detections to be the same plate
+        :param min_recall: minimum recall for a scale to be usable
+    :return: dictionary with the throughput, the recall, the fallbacks and the verdict per scale
+    """
+    images = [cv2.imread(image_path) for image_path in image_paths]
+
+    reference_recognizer = NumberPlateRecognizer(ocr_backend="pytesseract")
+    reference_bboxes = [localizePlate(reference_recognizer, image) for image in images]
+    reference_count = sum(bbox is not None for bbox in reference_bboxes)
+
+    report = {}
+    for scale in [1.0] + [scale for scale in scales if scale != 1.0]:
+        metrics = RecognizerMetrics()
+        recognizer = NumberPlateRecognizer(ocr_backend="pytesseract", localization_scale=scale, metrics=metrics)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            bboxes = [localizePlate(recognizer, image) for image in images]
+        elapsed = time.perf_counter() - start
+
+        matched = sum(1 for bbox, reference in zip(bboxes, reference_bboxes)
+                      if bbox is not None and reference is not None and bboxIoU(bbox, reference) >= min_iou)
+        recall = round(matched / reference_count, 3) if reference_count else None
+
+        report[scale] = {"images_per_s": round(len(images) * repeat / elapsed, 2) if elapsed > 0 else None,
+                         "detections": sum(bbox is not None for bbox in bboxes),
+                         "recall": recall,
+                         "fallbacks": metrics.counters["coarse_fallback_total"] // repeat,
+                         "usable": recall is not None and recall >= min_recall}
+
+    return report
+
+
+def readRssBytes():
+    """
+    This function reads the resident set size of the process (Linux only).
+    :return: the RSS in bytes, or None if /proc is not available
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def benchmarkMemory(image_paths, frames=200, localization_scale=1.0):
+    """
+    This function measures the steady-state allocations of the localization hot path, with and without
+    the reusable frame buffers. The same frame is processed over and over, like a stream at a fixed resolution.
+        :param image_paths: list of image paths (the first one is used as the stream frame)
+        :param frames: number of frames processed per mode
+        :param localization_scale: localization scale of the recognizer
+    :return: dictionary with the bytes allocated per frame and the RSS churn per mode
+    """
+    frame = cv2.imread(image_paths[0])
+    height, width = frame.shape[:2]
+
+    report = {}
+    for reuse_buffers in (False, True):
+        recognizer = NumberPlateRecognizer(ocr_backend="pytesseract", localization_scale=localization_scale,
+                                           reuse_buffers=reuse_buffers, frame_size=(width, height))
+
+        # ----- warm-up frames, the buffers (and OpenCV internals) are allocated here -----
+        for _ in range(5):
+            recognizer.localizePlate(frame)
+
+        tracemalloc.start()
+        allocated = []
+        rss = []
+        for _ in range(frames):
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            plate_contour = recognizer.localizePlate(frame)[3]
+            if plate_contour is not None:
+                recognizer.extractPlateRegion(frame, plate_contour)
+            allocated.append(tracemalloc.get_traced_memory()[1] - baseline)
+            rss.append(readRssBytes())
+        tracemalloc.stop()
+
+        rss = [value for value in rss if value is not None]
+        report["buffers" if reuse_buffers else "no_buffers"] = {
+            "frame_size": (width, height),
+            "peak_bytes_per_frame": int(statistics.median(allocated)),
+            "rss_churn_bytes": (max(rss) - min(rss)) if rss else None,
+        }
+
+    return report
+
+
+def loadLabels(labels_path):
+    """
+    This function loads the ground truth manifest (CSV with the image_path and plate columns).
+        :param labels_path: path of the manifest
+    :return: list of (image path, plate) pairs
+    """
+    with open(labels_path, newline="") as file:
+        return [(row["image_path"], normalizePlateText(row["plate"])) for row in csv.DictReader(file)]
+
+
+def normalizePlateText(text):
+    """
+    This function keeps only the upper case letters and the digits of a plate text.
+    """
+    return "".join(character for character in (text or "").upper() if character.isalnum())
+
+
+def percentile(values, fraction):
+    """
+    This function computes a percentile with linear interpolation between the closest ranks.
+        :param values: list of values
+        :param fraction: percentile between 0 and 1
+    :return: the percentile, or None for an empty list
+    """
+    if not values:
+        return None
+
+    values = sorted(values)
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def runSuite(labels, recognizer, repeat=1):
+    """
+    This function runs the recognizer over the labeled images and measures latency, throughput and accuracy.
+        :param labels: list of (image path, plate) pairs
+        :param recognizer: the recognizer to measure
+        :param repeat: number of times every image is processed (the accuracy uses the last run)
+    :return: the report dictionary
+    """
+    validator = RomanianLicensePlateValidator()
+
+    # ----- loading the images first, so the disk is not part of the measure -----
+    images = [(image_path, plate, cv2.imread(image_path)) for image_path, plate in labels]
+
+    stage_times = {stage: [] for stage in SUITE_STAGES}
+    results = {}
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for image_path, plate, image in images:
+            frame_start = time.perf_counter()
+            pipeline_result = recognizer.recognizePlateNumber(image_path, image, return_trace=True)
+            stage_times["total_ms"].append((time.perf_counter() - frame_start) * 1000)
+
+            for stage, elapsed in pipeline_result.timings.items():
+                if stage in stage_times:
+                    stage_times[stage].append(elapsed)
+
+            text = normalizePlateText(pipeline_result.text)
+            results[image_path] = {"expected": plate, "read": text, "plate_found": pipeline_result.plate_found,
+                                   "exact_match": text == plate,
+                                   "valid_format": bool(text) and bool(validator.verifyPlateFormat(text))}
+    elapsed = time.perf_counter() - start
+
+    count = len(results)
+    latency = {}
+    for stage, times in stage_times.items():
+        latency[stage] = {"count": len(times),
+                          "p50": round(percentile(times, 0.50), 3) if times else None,
+                          "p95": round(percentile(times, 0.95), 3) if times else None,
+                          "p99": round(percentile(times, 0.99), 3) if times else None}
+
+    return {
+        "environment": {"python": platform.python_version(), "opencv": cv2.__version__,
+                        "machine": platform.machine(), "ocr_backend": recognizer.ocr_backend.name,
+                        "localization_scale": recognizer.localization_scale,
+                        "ocr_cascade": recognizer.plate_validator is not None,
+                        "plate_correction": recognizer.plate_corrector is not None},
+        "images": count,
+        "repeat": repeat,
+        "fps": round(count * repeat / elapsed, 3) if elapsed > 0 else None,
+        "detection_rate": round(sum(r["plate_found"] for r in results.values()) / count, 4) if count else None,
+        "exact_match_rate": round(sum(r["exact_match"] for r in results.values()) / count, 4) if count else None,
+        "validator_pass_rate": round(sum(r["valid_format"] for r in results.values()) / count, 4) if count else None,
+        "latency_ms": latency,
+        "results": results,
+    }
+
+
+def compareReports(report, baseline, tolerance=0.15, compare_speed=True):
+    """
+    This function compares a report with a stored baseline.
+    Accuracy rates must not drop at all, the speed may vary by the given tolerance (timing noise).
+        :param report: the new report
+        :param baseline: the baseline report
+        :param tolerance: allowed relative slowdown (0.15 = 15%)
+        :param compare_speed: also compare the fps and the latencies (only meaningful on the same machine)
+    :return: list of regression messages (empty if there is no regression)
+    """
+    regressions = []
+
+    # ----- the rates of another pipeline configuration (OCR backend, cascade, ...) are not comparable -----
+    for key in SUITE_CONFIGURATION:
+        expected = baseline.get("environment", {}).get(key)
+        if expected is not None and report["environment"].get(key) != expected:
+            regressions.append(f"configuration {key}: {expected} -> {report['environment'].get(key)}")
+
+    for key in ("detection_rate", "exact_match_rate", "validator_pass_rate"):
+        if baseline.get(key) is not None and report.get(key) is not None and report[key] < baseline[key]:
+            regressions.append(f"{key}: {baseline[key]} -> {report[key]}")
+
+    if not compare_speed:
+        return regressions
+
+    if baseline.get("fps") and report.get("fps") and report["fps"] < baseline["fps"] * (1 - tolerance):
+        regressions.append(f"fps: {baseline['fps']} -> {report['fps']}")
+
+    for stage, summary in report["latency_ms"].items():
+        baseline_p95 = baseline.get("latency_ms", {}).get(stage, {}).get("p95")
+        if (baseline_p95 and summary["p95"] and summary["p95"] > baseline_p95 * (1 + tolerance)
+                and summary["p95"] - baseline_p95 > MIN_LATENCY_REGRESSION_MS):
+            regressions.append(f"{stage} p95: {baseline_p95} -> {summary['p95']}")
+
+    return regressions
+
+
+def generatePlates(count, seed=0):
+    """
+    This function generates a mix of plausible plates and OCR noise for the validator benchmark.
+        :param count: number of plates
+        :param seed: random seed (the same plates are generated on every run)
+    :return: list of plate texts
+    """
+    generator = random.Random(seed)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    plates = []
+
+    for _ in range(count):
+        if generator.random() < 0.5:
+            prefix = generator.choice(["B", "TM", "CJ", "IS", "MAI", "CD"])
+            plates.append(prefix + str(generator.randint(10, 999)) + "".join(generator.choices(letters, k=3)))
+        else:
+            plates.append("".join(generator.choices(letters + "0123456789", k=generator.randint(4, 9))))
+
+    return plates
+
+
+def benchmarkValidator(plates, repeat=3):
+    """
+    This function compares the char-by-char validator of the first version (the baseline), one verifyPlateFormat
+    call per plate and the bulk validateMany.
+        :param plates: list of plate texts
+        :param repeat: number of runs (the best one is kept)
+    :return: dictionary with the plates per second of the three ways and the speedups over the baseline
+    """
+    legacy_validator = LegacyRomanianLicensePlateValidator()
+    validator = RomanianLicensePlateValidator()
+    legacy_s, single_s, bulk_s = [], [], []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        legacy = [legacy_validator.verifyPlateFormat(plate) for plate in plates]
+        legacy_s.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        single = [validator.verifyPlateFormat(plate) for plate in plates]
+        single_s.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        bulk = validator.validateMany(plates)
+        bulk_s.append(time.perf_counter() - start)
+
+    if single != bulk:
+        raise ValueError("[ERROR] verifyPlateFormat and validateMany disagree.")
+
+    # ----- the baseline accepts some invalid plates (its diplomatic check was always true), so only timed -----
+    return {"plates": len(plates), "valid": sum(bulk), "legacy_valid": sum(bool(result) for result in legacy),
+            "legacy_plates_per_s": round(len(plates) / min(legacy_s)),
+            "single_plates_per_s": round(len(plates) / min(single_s)),
+            "bulk_plates_per_s": round(len(plates) / min(bulk_s)),
+            "single_speedup": round(min(legacy_s) / min(single_s), 2),
+            "bulk_speedup": round(min(legacy_s) / min(bulk_s), 2)}
+
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Benchmarks for the number plate recognition pipeline.")
+    parser.add_argument("--images", nargs="+", default=DEFAULT_IMAGE_DIRS, help="directories with the input images")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    ocr_parser = subparsers.add_parser("ocr", help="per-plate OCR time of every OCR backend")
+    ocr_parser.add_argument("--backends", nargs="+", default=["pytesseract", "tesserocr"])
+    ocr_parser.add_argument("--repeat", type=int, default=3)
+
+    localization_parser = subparsers.add_parser("localization", help="coarse-to-fine localization vs full frame")
+    localization_parser.add_argument("--scales", nargs="+", type=float, default=[0.5, 0.35])
+    localization_parser.add_argument("--repeat", type=int, default=3)
+    localization_parser.add_argument("--min-recall", type=float, default=0.95,
+                                     help="minimum recall (vs the full frame) for a scale to be usable")
+
+    memory_parser = subparsers.add_parser("memory", help="steady-state allocations with and without frame buffers")
+    memory_parser.add_argument("--frames", type=int, default=200)
+    memory_parser.add_argument("--localization-scale", type=float, default=1.0)
+
+    validator_parser = subparsers.add_parser("validator", help="plate format checks: baseline, one by one, in bulk")
+    validator_parser.add_argument("--plates", help="file with one plate per line (default: generated plates)")
+    validator_parser.add_argument("--count", type=int, default=200000, help="number of generated plates")
+    validator_parser.add_argument("--repeat", type=int, default=3)
+
+    suite_parser = subparsers.add_parser("suite", help="labeled accuracy and latency suite, with baseline comparison")
+    suite_parser.add_argument("--labels", default=DEFAULT_LABELS, help="ground truth manifest (image_path,plate)")
+    suite_parser.add_argument("--repeat", type=int, default=10)
+    suite_parser.add_argument("--ocr-backend", default="auto", choices=["auto", "tesserocr", "pytesseract"])
+    suite_parser.add_argument("--localization-scale", type=float, default=1.0)
+    suite_parser.add_argument("--ocr-cascade", action="store_true",
+                              help="read the plates with the validator driven OCR cascade")
+    suite_parser.add_argument("--correct", action="store_true",
+                              help="replace the OCR confusions with the closest valid plate")
+    suite_parser.add_argument("--output", default="results/benchmark_report.json", help="where the report is written")
+    suite_parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE,
+                              help=f"report to compare with, {DEFAULT_BASELINE} if no path is given "
+                                   f"(exit code 1 on regression)")
+    suite_parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parseArguments()
+    image_paths = collectImagePaths(args.images)
+
+    if args.benchmark == "ocr":
+        report = benchmarkOcr(image_paths, args.backends, repeat=args.repeat)
+        for name, summary in report.items():
+            print(f"[OCR] {name:12s} plates={summary['count']} mean={summary['mean_ms']} ms "
+                  f"median={summary['median_ms']} ms")
+
+    elif args.benchmark == "localization":
+        report = benchmarkLocalization(image_paths, args.scales, repeat=args.repeat, min_recall=args.min_recall)
+        for scale, summary in report.items():
+            verdict = "usable" if summary["usable"] else f"NOT usable (recall < {args.min_recall})"
+            print(f"[Localization] scale={scale:<5} {summary['images_per_s']} images/s "
+                  f"detections={summary['detections']} recall={summary['recall']} "
+                  f"fallbacks={summary['fallbacks']} {verdict}")
+
+    elif args.benchmark == "memory":
+        report = benchmarkMemory(image_paths, frames=args.frames, localization_scale=args.localization_scale)
+        for mode, summary in report.items():
+            print(f"[Memory] {mode:10s} frame={summary['frame_size']} "
+                  f"allocated/frame={summary['peak_bytes_per_frame']} B rss_churn={summary['rss_churn_bytes']} B")
+
+    elif args.benchmark == "validator":
+        if args.plates:
+            with open(args.plates) as file:
+                plates = [line.strip() for line in file]
+        else:
+            plates = generatePlates(args.count)
+
+        report = benchmarkValidator(plates, repeat=args.repeat)
+        print(f"[Validator] plates={report['plates']} valid={report['valid']} (baseline: {report['legacy_valid']}) "
+              f"baseline={report['legacy_plates_per_s']}/s single={report['single_plates_per_s']}/s "
+              f"bulk={report['bulk_plates_per_s']}/s")
+        print(f"[Validator] speedup over the baseline: single x{report['single_speedup']} "
+              f"bulk x{report['bulk_speedup']}")
+
+    elif args.benchmark == "suite":
+        plate_validator = RomanianLicensePlateValidator().verifyPlateFormat if args.ocr_cascade else None
+        plate_corrector = PlateCorrector(RomanianLicensePlateValidator()).correctText if args.correct else None
+        recognizer = NumberPlateRecognizer(ocr_backend=args.ocr_backend, localization_scale=args.localization_scale,
+                                           plate_validator=plate_validator, plate_corrector=plate_corrector)
+        report = runSuite(loadLabels(args.labels), recognizer, repeat=args.repeat)
+
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+
+        print(f"[Suite] images={report['images']} fps={report['fps']} detection={report['detection_rate']} "
+              f"exact={report['exact_match_rate']} valid={report['validator_pass_rate']}")
+        for stage, summary in report["latency_ms"].items():
+            print(f"[Suite] {stage:14s} p50={summary['p50']} p95={summary['p95']} p99={summary['p99']}")
+        print(f"[Suite] Report written to {args.output}")
+
+        if args.baseline:
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+
+            # ----- the accuracy is compared everywhere, the timings only against a baseline of the same machine -----
+            compare_speed = baseline.get("environment", {}).get("machine") == report["environment"]["machine"]
+            if not compare_speed:
+                print(f"[Suite] The baseline was measured on another machine "
+                      f"({baseline.get('environment', {}).get('machine')}), only the accuracy is compared.")
+            regressions = compareReports(report, baseline, tolerance=args.tolerance, compare_speed=compare_speed)
+            for regression in regressions:
+                print(f"[Suite] REGRESSION {regression}")
+            if regressions:
+                raise SystemExit(1)
+            print("[Suite] No regression against the baseline.")
@@ -1,6 +1,7 @@
 import cv2
 from src.recognizer import *
 from src.validator import *
+from src.motion import MotionGate
 
 try:
     from picamera2 import Picamera2
@@ -9,13 +10,17 @@ except ImportError:
 
 
 class PiCamera2Stream:
-    def __init__(self, resolution=(640, 480), platform="pi"):
+    def __init__(self, resolution=(640, 480), platform="pi", use_motion_gate=True):
         self.platform = platform
         self.resolution = resolution
 
-        self.numberPlateRecognizer = NumberPlateRecognizer()
+        # ----- the frames always have the stream resolution, so the working buffers are allocated once -----
+        self.numberPlateRecognizer = NumberPlateRecognizer(reuse_buffers=True, frame_size=resolution)
         self.validator = RomanianLicensePlateValidator()
 
+        # ----- skipping the recognition while the lane is empty -----
+        self.motion_gate = MotionGate() if use_motion_gate else None
+
         if self.platform == "pi":
             if not Picamera2:
                 raise ImportError("[ERROR] picamera2 module not found. Are you running this on a Pi with Bookworm?")
@@ -37,12 +42,13 @@ class PiCamera2Stream:
             if self.platform == "pi":
                 frame = self.picam2.capture_array()
 
-                plate_region, extracted_text = self.numberPlateRecognizer.recognizePlateNumber(None,frame)
+                if not self.motion_gate or self.motion_gate.shouldProcess(frame):
+                    plate_region, extracted_text = self.numberPlateRecognizer.recognizePlateNumber(None,frame)
 
-                if extracted_text:
-                    print(f"[Plate] Detected: {extracted_text}")
-                    if self.validator.verifyPlateFormat(extracted_text):
-                        print("[Valid Plate] Format verified.")
+                    if extracted_text:
+                        print(f"[Plate] Detected: {extracted_text}")
+                        if self.validator.verifyPlateFormat(extracted_text):
+                            print("[Valid Plate] Format verified.")
 
             else:
                 ret, frame = self.camera.read()
@@ -7,4 +7,75 @@ CREATE TABLE IF NOT EXISTS vehicles (
     plate_number VARCHAR(20) NOT NULL UNIQUE,
     added_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     is_authorized BOOLEAN DEFAULT TRUE
-);
\ No newline at end of file
+);
+
+-- Change feed of the vehicles: one row per inserted / updated / deleted plate, read by the incremental
+-- refreshes of the authorization cache and of the plate index (the deletes are seen without a full reload)
+CREATE TABLE IF NOT EXISTS vehicle_changes (
+    change_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    plate_number VARCHAR(20) NOT NULL,
+    changed_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3)
+);
+
+DROP TRIGGER IF EXISTS vehicles_changes_insert;
+CREATE TRIGGER vehicles_changes_insert AFTER INSERT ON vehicles FOR EACH ROW
+    INSERT INTO vehicle_changes (plate_number) VALUES (NEW.plate_number);
+
+-- the upserts that do not change anything are not recorded
+DROP TRIGGER IF EXISTS vehicles_changes_update;
+CREATE TRIGGER vehicles_changes_update AFTER UPDATE ON vehicles FOR EACH ROW
+    INSERT INTO vehicle_changes (plate_number)
+    SELECT OLD.plate_number FROM DUAL WHERE OLD.plate_number <> NEW.plate_number
+    UNION ALL
+    SELECT NEW.plate_number FROM DUAL
+    WHERE OLD.plate_number <> NEW.plate_number OR NOT (OLD.is_authorized <=> NEW.is_authorized);
+
+DROP TRIGGER IF EXISTS vehicles_changes_delete;
+CREATE TRIGGER vehicles_changes_delete AFTER DELETE ON vehicles FOR EACH ROW
+    INSERT INTO vehicle_changes (plate_number) VALUES (OLD.plate_number);
+
+-- One row per gate decision, written in batches by the access event log of the stream
+CREATE TABLE IF NOT EXISTS access_events (
+    event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    plate_number VARCHAR(20) NOT NULL,
+    event_time DATETIME(3) NOT NULL,
+    direction ENUM('entry', 'exit') NOT NULL DEFAULT 'entry',
+    lane VARCHAR(20) NOT NULL DEFAULT 'entry',
+    decision VARCHAR(20) NOT NULL,  -- 'granted', 'added' (auto-added TM plate) or 'denied'
+    confidence FLOAT NULL,
+    INDEX idx_access_events_plate_time (plate_number, event_time),
+    INDEX idx_access_events_lane_time (lane, event_time)
+);
+
+-- Rollups of access_events, maintained incrementally by src/analytics.py (the reports only read these tables)
+CREATE TABLE IF NOT EXISTS access_hourly (
+    hour_start DATETIME NOT NULL,
+    lane VARCHAR(20) NOT NULL,
+    direction ENUM('entry', 'exit') NOT NULL,
+    decision VARCHAR(20) NOT NULL,
+    events INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour_start, lane, direction, decision)
+);
+
+CREATE TABLE IF NOT EXISTS access_daily_plates (
+    day DATE NOT NULL,
+    plate_number VARCHAR(20) NOT NULL,
+    entries INT NOT NULL DEFAULT 0,
+    exits INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, plate_number)
+);
+
+-- Last known position of every vehicle that went through a gate
+CREATE TABLE IF NOT EXISTS vehicle_presence (
+    plate_number VARCHAR(20) PRIMARY KEY,
+    inside BOOLEAN NOT NULL,
+    last_event_time DATETIME(3) NOT NULL,
+    INDEX idx_vehicle_presence_inside (inside, last_event_time)
+);
+
+-- Last access event already counted in the rollups
+CREATE TABLE IF NOT EXISTS analytics_state (
+    name VARCHAR(20) PRIMARY KEY,
+    value BIGINT NOT NULL
+);
+INSERT IGNORE INTO analytics_state (name, value) VALUES ('last_event_id', 0);
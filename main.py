@@ -1,15 +1,68 @@
-
 from src.validator import *
 from src.recognizer import *
 from src.utils import *
+from src.batch import BatchPlateRecognizer
+from src.ocr_cache import PlateOCRCache
+from src.metrics import RecognizerMetrics
+from src.correction import PlateCorrector
+import argparse
 import os
 
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Number plate recognition over a directory of images.")
+    parser.add_argument("--images", default="images/", help="directory with the input images")
+    parser.add_argument("--batch", metavar="OUTPUT",
+                        help="run in batch mode and stream the results to OUTPUT (.jsonl or .csv)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=4, help="number of images sent to a worker at once")
+    parser.add_argument("--ocr-backend", default="auto", choices=["auto", "tesserocr", "pytesseract"],
+                        help="OCR backend (auto picks tesserocr when installed)")
+    parser.add_argument("--localization-scale", type=float, default=1.0,
+                        help="search the plate on a frame downscaled by this factor, then refine at full resolution "
+                             "(experimental: keep 1.0 unless `benchmark.py localization` reports the scale usable "
+                             "on your footage)")
+    parser.add_argument("--ocr-cache-size", type=int, default=0,
+                        help="size of the perceptual hash OCR cache (0 disables it)")
+    parser.add_argument("--ocr-cascade", action="store_true",
+                        help="read the plates with the OCR cascade (extra passes only for the plates the validator rejects)")
+    parser.add_argument("--correct", action="store_true",
+                        help="replace the OCR confusions (0/O, 8/B, ...) with the closest valid plate")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="write the per-stage metrics to PATH in the Prometheus text format")
+    parser.add_argument("--no-resume", action="store_true", help="start over instead of resuming the OUTPUT file")
+    args = parser.parse_args()
+
+    # ----- the batch workers are separate processes: their stage timings are written per image to OUTPUT -----
+    if args.batch and args.metrics_file:
+        parser.error("--metrics-file is not supported with --batch, "
+                     "the OUTPUT file has the stage timings of every image")
+    return args
+
+
 if __name__ == "__main__":
+    args = parseArguments()
+    plate_validator = RomanianLicensePlateValidator().verifyPlateFormat if args.ocr_cascade else None
+
+    # ----- batch mode: all the cores, results streamed to a file -----
+    if args.batch:
+        batch = BatchPlateRecognizer(workers=args.workers, chunk_size=args.chunk_size,
+                                     ocr_cache_size=args.ocr_cache_size, correct_plates=args.correct,
+                                     ocr_backend=args.ocr_backend, localization_scale=args.localization_scale,
+                                     plate_validator=plate_validator)
+        summary = batch.run(args.images, args.batch, resume=not args.no_resume)
+        print(f"[Batch] {summary}")
+        raise SystemExit(0)
 
     # Example usage:
-    recognizer = NumberPlateRecognizer()
+    ocr_cache = PlateOCRCache(max_size=args.ocr_cache_size, ttl_s=None) if args.ocr_cache_size else None
+    metrics = RecognizerMetrics() if args.metrics_file else None
+    plate_corrector = PlateCorrector(RomanianLicensePlateValidator()).correctText if args.correct else None
+    recognizer = NumberPlateRecognizer(ocr_backend=args.ocr_backend, localization_scale=args.localization_scale,
+                                       ocr_cache=ocr_cache, metrics=metrics, plate_validator=plate_validator,
+                                       plate_corrector=plate_corrector)
 
-    images_path = "images/"
+    images_path = args.images
 
     target_paths = []
 
@@ -18,10 +71,17 @@ if __name__ == "__main__":
             target_path = os.path.join(images_path, file)
             target_paths.append(target_path)
 
-            extracted_plate = recognizer.recognizePlateNumber(target_path)
+            # ----- running the pipeline once and reusing its intermediates for the plot -----
+            pipeline_result = recognizer.recognizePlateNumber(target_path, return_trace=True)
+
+            print(f"{target_path}: {pipeline_result.asTuple()[1]}")
+            recognizer.plotAllSteps(target_path, save_plot=True, pipeline_result=pipeline_result)
 
-            print(f"{target_path}: {extracted_plate[1]}")
-            recognizer.plotAllSteps(target_path, save_plot=True)
+    if ocr_cache:
+        print(f"[OCR cache] {ocr_cache.stats()}")
+    if metrics:
+        metrics.writeTextFile(args.metrics_file)
+        print(f"[Metrics] Written to {args.metrics_file}")
 
     # ----- testing some scenarios -----
     # validator = RomanianLicensePlateValidator()
@@ -0,0 +1,205 @@
+import argparse
+import datetime
+import threading
+from collections import defaultdict
+
+from dotenv import load_dotenv
+from mysql.connector import Error
+
+# ----- the decisions after which the vehicle went through the gate -----
+PASSED_DECISIONS = ("granted", "added")
+
+QUERY_NEW_EVENTS = ("SELECT event_id, plate_number, event_time, direction, lane, decision FROM access_events "
+                    "WHERE event_id > %s ORDER BY event_id LIMIT %s")
+QUERY_WATERMARK = "SELECT value FROM analytics_state WHERE name = 'last_event_id'"
+QUERY_SET_WATERMARK = "UPDATE analytics_state SET value = %s WHERE name = 'last_event_id'"
+
+QUERY_INSIDE = "SELECT plate_number, last_event_time FROM vehicle_presence WHERE inside = %s ORDER BY last_event_time"
+QUERY_OCCUPANCY = "SELECT COUNT(*) FROM vehicle_presence WHERE inside = %s"
+QUERY_ENTRIES_PER_HOUR = ("SELECT hour_start, lane, SUM(events) FROM access_hourly "
+                          "WHERE hour_start >= %s AND hour_start < %s AND direction = 'entry' AND decision IN (%s, %s) "
+                          "GROUP BY hour_start, lane ORDER BY hour_start, lane")
+QUERY_TOP_PLATES = ("SELECT plate_number, SUM(entries) AS total FROM access_daily_plates WHERE day >= %s "
+                    "GROUP BY plate_number ORDER BY total DESC, plate_number LIMIT %s")
+
+
+def upsertQuery(dialect, table, keys, values):
+    """
+    This function builds the upsert statement of a rollup table for a storage backend.
+        :param dialect: "mysql" or "sqlite" (DIALECT of the database manager)
+        :param table: the rollup table
+        :param keys: the primary key columns
+        :param values: dictionary {column: "add" (counter) or "set" (last value)}
+    :return: the statement, with one %s placeholder per column
+    """
+    columns = list(keys) + list(values)
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+
+    if dialect == "sqlite":
+        new, update = "excluded.{}", " ON CONFLICT({}) DO UPDATE SET ".format(", ".join(keys))
+    else:
+        new, update = "VALUES({})", " ON DUPLICATE KEY UPDATE "
+
+    assignments = [f"{column} = {column} + {new.format(column)}" if operation == "add" else f"{column} = {new.format(column)}"
+                   for column, operation in values.items()]
+    return query + update + ", ".join(assignments)
+
+
+class AccessAnalytics:
+    """
+    Occupancy and traffic reports of the access_events table.
+    The new events are folded incrementally into rollup tables (events per hour / lane, entries per day / plate,
+    current position of every vehicle), and the reports only read the rollups, so their cost does not grow
+    with the history of events.
+    """
+
+    def __init__(self, db_manager, batch_size=5000):
+        """
+        Initializes the analytics.
+
+        Args:
+            db_manager (ParkingDatabaseManager): The database (MySQL or SQLite backend) holding the events.
+            batch_size (int, optional): Number of events folded into the rollups per transaction.
+        """
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+
+        dialect = db_manager.DIALECT
+        self.hourly_upsert = upsertQuery(dialect, "access_hourly", ["hour_start", "lane", "direction", "decision"],
+                                         {"events": "add"})
+        self.daily_upsert = upsertQuery(dialect, "access_daily_plates", ["day", "plate_number"],
+                                        {"entries": "add", "exits": "add"})
+        self.presence_upsert = upsertQuery(dialect, "vehicle_presence", ["plate_number"],
+                                           {"inside": "set", "last_event_time": "set"})
+
+    def _rollupOperations(self, events):
+        hourly = defaultdict(int)
+        daily = defaultdict(lambda: [0, 0])
+        presence = {}
+
+        for event_id, plate_number, event_time, direction, lane, decision in events:
+            hourly[(event_time.replace(minute=0, second=0, microsecond=0), lane, direction, decision)] += 1
+            if decision not in PASSED_DECISIONS:
+                continue
+
+            daily[(event_time.date(), plate_number)][0 if direction == "entry" else 1] += 1
+            # ----- the events are in order, the last one of a plate gives its position -----
+            presence[plate_number] = (direction == "entry", event_time)
+
+        return [
+            (self.hourly_upsert, [key + (count,) for key, count in hourly.items()]),
+            (self.daily_upsert, [key + tuple(counts) for key, counts in daily.items()]),
+            (self.presence_upsert, [(plate,) + position for plate, position in presence.items()]),
+            (QUERY_SET_WATERMARK, [(events[-1][0],)]),
+        ]
+
+    def updateRollups(self):
+        """
+        This function folds the events added since the last update into the rollup tables. Every batch is
+        written in one transaction together with the id of its last event, so no event is counted twice.
+        Must run in a single process (e.g. next to the database or the sync).
+        :return: the number of events folded, None if the database could not be reached
+        """
+        count = 0
+        try:
+            last_event_id = self.db_manager.run_query(QUERY_WATERMARK)[0][0]
+            while True:
+                events = self.db_manager.run_query(QUERY_NEW_EVENTS, (last_event_id, self.batch_size))
+                if not events:
+                    break
+
+                self.db_manager.run_transaction(self._rollupOperations(events))
+                last_event_id = events[-1][0]
+                count += len(events)
+        except Error as e:
+            print(f"[Analytics] Could not update the rollups: {e}")
+            return None
+
+        return count
+
+    def startAutoUpdate(self, interval_s=60.0):
+        """
+        This function updates the rollups periodically from a daemon thread.
+            :param interval_s: seconds between two updates
+        """
+        stop_event = threading.Event()
+
+        def update():
+            while not stop_event.wait(interval_s):
+                self.updateRollups()
+
+        threading.Thread(target=update, name="analytics-rollups", daemon=True).start()
+        return stop_event
+
+    def vehiclesInside(self):
+        """
+        :return: list of (plate_number, time of entry) of the vehicles currently inside, oldest first
+        """
+        return [(row[0], row[1]) for row in self.db_manager.run_query(QUERY_INSIDE, (True,))]
+
+    def occupancy(self):
+        """
+        :return: the number of vehicles currently inside
+        """
+        return self.db_manager.run_query(QUERY_OCCUPANCY, (True,))[0][0]
+
+    def entriesPerHour(self, start=None, end=None):
+        """
+        This function counts the vehicles that entered, per hour and per lane.
+            :param start: first hour (defaults to 24 hours before end)
+            :param end: end of the period (defaults to the end of the current hour)
+        :return: list of (hour start, lane, entries)
+        """
+        if end is None:
+            end = datetime.datetime.now().replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
+        if start is None:
+            start = end - datetime.timedelta(hours=24)
+
+        rows = self.db_manager.run_query(QUERY_ENTRIES_PER_HOUR, (start, end) + PASSED_DECISIONS)
+        return [(row[0], row[1], int(row[2])) for row in rows]
+
+    def topPlates(self, days=7, limit=10, today=None):
+        """
+        This function finds the plates that entered most often.
+            :param days: length of the period, today included
+            :param limit: number of plates
+            :param today: last day of the period (defaults to today)
+        :return: list of (plate_number, entries), most frequent first
+        """
+        first_day = (today or datetime.date.today()) - datetime.timedelta(days=days - 1)
+        return [(row[0], int(row[1])) for row in self.db_manager.run_query(QUERY_TOP_PLATES, (first_day, limit))]
+
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Occupancy and traffic reports of the access events")
+    parser.add_argument("--hours", type=int, default=24, help="number of hours of the entries per hour report")
+    parser.add_argument("--days", type=int, default=7, help="number of days of the top plates report")
+    parser.add_argument("--top", type=int, default=10, help="number of plates of the top plates report")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from storage import create_database_manager
+
+    arguments = parseArguments()
+    load_dotenv()
+    db_manager = create_database_manager()
+
+    if db_manager:
+        analytics = AccessAnalytics(db_manager)
+        print(f"[Analytics] {analytics.updateRollups()} new events folded into the rollups.")
+
+        print(f"\n--- Vehicles inside: {analytics.occupancy()} ---")
+        for plate_number, entered_at in analytics.vehiclesInside():
+            print(f"{plate_number:<10} since {entered_at}")
+
+        print(f"\n--- Entries per hour, last {arguments.hours} hours ---")
+        end = datetime.datetime.now().replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
+        for hour_start, lane, entries in analytics.entriesPerHour(end - datetime.timedelta(hours=arguments.hours), end):
+            print(f"{hour_start:%Y-%m-%d %H:00}  {lane:<10} {entries}")
+
+        print(f"\n--- Top plates, last {arguments.days} days ---")
+        for plate_number, entries in analytics.topPlates(days=arguments.days, limit=arguments.top):
+            print(f"{plate_number:<10} {entries}")
+
+        db_manager.close()
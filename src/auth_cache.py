@@ -0,0 +1,406 @@
+import datetime
+import threading
+import time
+
+from mysql.connector import Error
+
+
+class AuthorizationCache:
+    """
+    Read-through cache in front of a ParkingDatabaseManager, with the same methods.
+    The registered plates are loaded in memory (periodic full snapshot, incremental refresh from the
+    vehicle_changes feed in between, so the inserted, updated and deleted plates are seen within one
+    refresh interval), the plates that are not registered are remembered for a shorter time, and the entries are
+    invalidated by the appends / deletes made through the cache. When the database is unreachable, the last
+    known answer is used, so the gate keeps working during short outages.
+    """
+
+    def __init__(self, db_manager, positive_ttl_s=600.0, negative_ttl_s=15.0, max_stale_s=3600.0,
+                 full_refresh_interval_s=300.0, plate_index=None):
+        """
+        Initializes the cache.
+
+        Args:
+            db_manager (ParkingDatabaseManager): The database behind the cache.
+            positive_ttl_s (float, optional): Lifetime of the entries of the registered plates.
+            negative_ttl_s (float, optional): Lifetime of the entries of the plates that are not registered
+                                              (short, so a plate registered elsewhere is seen quickly).
+            max_stale_s (float, optional): Age up to which an expired entry is still used while the database
+                                           is unreachable.
+            full_refresh_interval_s (float, optional): Time between two full snapshots of the table (a safety
+                                                       net, the incremental refreshes already see every change).
+            plate_index (RegisteredPlateIndex, optional): Fuzzy index kept up to date with the cached plates.
+        """
+        self.db_manager = db_manager
+        self.positive_ttl_s = positive_ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self.max_stale_s = max_stale_s
+        self.full_refresh_interval_s = full_refresh_interval_s
+        self.plate_index = plate_index
+
+        # ----- plate -> (vehicle details or None, stored at, expires at) -----
+        self.entries = {}
+        self.last_change_id = 0
+        self.last_full_refresh = None
+        self.lock = threading.Lock()
+        self.refresh_stop = None
+        self.refresh_thread = None
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.errors = 0
+
+    def _store(self, plate, vehicle, now):
+        ttl = self.positive_ttl_s if vehicle else self.negative_ttl_s
+        with self.lock:
+            self.entries[plate] = (vehicle, now, now + ttl)
+
+        # ----- the index may hold the plate even when the cache does not (never cached, or evicted) -----
+        if self.plate_index:
+            if vehicle:
+                self.plate_index.add(vehicle)
+            else:
+                self.plate_index.remove(plate)
+
+    def invalidate(self, plate=None):
+        """
+        This function forgets the entry of a plate (or all of them), so the next lookup reads the database.
+            :param plate: the plate number, None for all the plates
+        """
+        with self.lock:
+            if plate is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(plate, None)
+
+    def verify_from_database(self, plate_number):
+        """
+        Verifies if a plate number is registered, from memory when possible.
+
+        Args:
+            plate_number (str): The plate number to verify.
+
+        Returns:
+            dict or None: The vehicle details (vehicle_id, plate_number, added_at, is_authorized)
+                          if found, otherwise None.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(plate_number)
+            if entry and now < entry[2]:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        try:
+            vehicle = self.db_manager.find_vehicle(plate_number)
+        except Error as e:
+            with self.lock:
+                self.errors += 1
+                if entry and now - entry[1] < self.max_stale_s:
+                    self.stale_hits += 1
+                    print(f"[AuthCache] Database unreachable ({e}), using the cached answer for '{plate_number}'")
+                    return entry[0]
+            print(f"Error verifying vehicle from database: {e}")
+            return None
+
+        self._store(plate_number, vehicle, now)
+        return vehicle
+
+    def find_vehicle(self, plate_number):
+        """
+        Reads a plate number from the database, never from memory, and caches the answer.
+
+        Returns:
+            dict or None: The vehicle details if found, otherwise None.
+
+        Raises:
+            mysql.connector.Error: If the database could not be queried.
+        """
+        vehicle = self.db_manager.find_vehicle(plate_number)
+        self._store(plate_number, vehicle, time.monotonic())
+        return vehicle
+
+    def append_to_database(self, plate_number, is_authorized=True):
+        """
+        Appends a new vehicle record and caches it.
+
+        Returns:
+            bool: True if the record was successfully added, False otherwise.
+        """
+        if self.db_manager.append_to_database(plate_number, is_authorized=is_authorized):
+            self._store(plate_number, {"vehicle_id": None, "plate_number": plate_number,
+                                       "added_at": datetime.datetime.now(), "is_authorized": is_authorized},
+                        time.monotonic())
+            return True
+
+        self.invalidate(plate_number)
+        return False
+
+    def delete_from_database(self, plate_number):
+        """
+        Deletes a vehicle record and caches the plate as not registered.
+
+        Returns:
+            bool: True if the record was successfully deleted, False otherwise.
+        """
+        if self.db_manager.delete_from_database(plate_number):
+            self._store(plate_number, None, time.monotonic())
+            return True
+
+        self.invalidate(plate_number)
+        return False
+
+    def delete_vehicles(self, plate_numbers, batch_size=500):
+        """
+        Deletes many vehicle records in one transaction and caches the plates as not registered.
+
+        Returns:
+            int or None: The number of plates sent, or None if the database could not be written.
+        """
+        plate_numbers = list(plate_numbers)
+        count = self.db_manager.delete_vehicles(plate_numbers, batch_size=batch_size)
+
+        now = time.monotonic()
+        for plate_number in plate_numbers:
+            if count is None:
+                self.invalidate(plate_number)
+            else:
+                self._store(plate_number, None, now)
+        return count
+
+    def verify_many(self, plate_numbers):
+        """
+        Verifies many plate numbers at once: the cached ones from memory, the others with one database query.
+
+        Returns:
+            dict or None: The plate numbers mapped to their vehicle details (None if not found),
+                          or None if the database could not be queried.
+        """
+        now = time.monotonic()
+        vehicles = {}
+        missing = []
+        with self.lock:
+            for plate in dict.fromkeys(plate_numbers):
+                entry = self.entries.get(plate)
+                if entry and now < entry[2]:
+                    self.hits += 1
+                    vehicles[plate] = entry[0]
+                else:
+                    self.misses += 1
+                    missing.append(plate)
+
+        if missing:
+            try:
+                found = self.db_manager.find_vehicles(missing)
+            except Error as e:
+                print(f"Error verifying vehicles from database: {e}")
+                with self.lock:
+                    self.errors += 1
+                return None
+            for plate, vehicle in found.items():
+                self._store(plate, vehicle, now)
+            vehicles.update(found)
+
+        return vehicles
+
+    def upsert_vehicle(self, plate_number, is_authorized=True):
+        """
+        Adds or updates a vehicle record and forgets its cached entry.
+
+        Returns:
+            bool: True if the record was added or updated, False otherwise.
+        """
+        if self.db_manager.upsert_vehicle(plate_number, is_authorized=is_authorized):
+            # ----- the vehicle_id / added_at of an existing record are not known, the next lookup reads them -----
+            self.invalidate(plate_number)
+            return True
+        return False
+
+    def import_vehicles(self, vehicles, batch_size=500):
+        """
+        Imports many vehicle records, then reloads the cache.
+
+        Returns:
+            int or None: The number of records imported, or None if the import failed.
+        """
+        count = self.db_manager.import_vehicles(vehicles, batch_size=batch_size)
+        if count:
+            self.refresh(full=True)
+        return count
+
+    def import_vehicles_csv(self, path, batch_size=500):
+        """
+        Imports the vehicle records of a CSV file, then reloads the cache.
+
+        Returns:
+            int or None: The number of records imported, or None if the import failed.
+        """
+        count = self.db_manager.import_vehicles_csv(path, batch_size=batch_size)
+        if count:
+            self.refresh(full=True)
+        return count
+
+    def append_events(self, events, batch_size=500):
+        return self.db_manager.append_events(events, batch_size=batch_size)
+
+    def run_query(self, query, params=()):
+        return self.db_manager.run_query(query, params)
+
+    def run_transaction(self, operations, batch_size=500):
+        """
+        Runs statements built outside of the manager in a single transaction. The plates they may have
+        changed are not known here: they are read from the vehicle_changes feed right after.
+
+        Returns:
+            int: The number of rows sent.
+
+        Raises:
+            mysql.connector.Error: If the transaction failed (nothing is written).
+        """
+        count = self.db_manager.run_transaction(operations, batch_size=batch_size)
+        self.refresh()
+        return count
+
+    async def run_async(self, function, *args):
+        return await self.db_manager.run_async(function, *args)
+
+    async def verify_async(self, plate_number):
+        """
+        Asynchronous version of verify_from_database: the cached plates are answered without leaving the event loop.
+        """
+        with self.lock:
+            entry = self.entries.get(plate_number)
+            if entry and time.monotonic() < entry[2]:
+                self.hits += 1
+                return entry[0]
+
+        return await self.db_manager.run_async(self.verify_from_database, plate_number)
+
+    async def append_async(self, plate_number, is_authorized=True):
+        return await self.db_manager.run_async(self.append_to_database, plate_number, is_authorized)
+
+    async def delete_async(self, plate_number):
+        return await self.db_manager.run_async(self.delete_from_database, plate_number)
+
+    def fetch_vehicles(self, after_vehicle_id=0):
+        return self.db_manager.fetch_vehicles(after_vehicle_id)
+
+    def last_vehicle_change(self):
+        return self.db_manager.last_vehicle_change()
+
+    def fetch_vehicle_changes(self, after_change_id=0, limit=10000):
+        return self.db_manager.fetch_vehicle_changes(after_change_id, limit)
+
+    def close(self):
+        self.db_manager.close()
+
+    def refresh(self, full=False):
+        """
+        This function loads the changes of the table since the last refresh (or a full snapshot of it) into the cache.
+            :param full: reload the whole table
+        :return: True if the database could be queried (the cached entries are kept otherwise)
+        """
+        if full:
+            return self._refreshFull()
+
+        changes = self.db_manager.fetch_vehicle_changes(self.last_change_id)
+        if changes is None:
+            with self.lock:
+                self.errors += 1
+            return False
+
+        last_change_id, vehicles = changes
+        now = time.monotonic()
+        with self.lock:
+            # ----- the deleted plates are cached as not registered -----
+            for plate, vehicle in vehicles.items():
+                ttl = self.positive_ttl_s if vehicle else self.negative_ttl_s
+                self.entries[plate] = (vehicle, now, now + ttl)
+            self.last_change_id = last_change_id
+            self._dropExpiredLocked(now)
+
+        if self.plate_index:
+            self.plate_index.applyChanges(vehicles, last_change_id=last_change_id)
+        return True
+
+    def _refreshFull(self):
+        started = time.monotonic()
+        try:
+            # ----- read before the snapshot: the changes made meanwhile are read again by the next refresh -----
+            last_change_id = self.db_manager.last_vehicle_change()
+        except Error as e:
+            print(f"[AuthCache] Could not read the vehicle changes: {e}")
+            last_change_id = None
+
+        vehicles = None if last_change_id is None else self.db_manager.fetch_vehicles(0)
+        if vehicles is None:
+            with self.lock:
+                self.errors += 1
+            return False
+
+        now = time.monotonic()
+        with self.lock:
+            for vehicle in vehicles:
+                self.entries[vehicle["plate_number"]] = (vehicle, now, now + self.positive_ttl_s)
+
+            # ----- the registered plates cached before the snapshot and missing from it were deleted -----
+            for plate, (vehicle, stored_at, expires_at) in list(self.entries.items()):
+                if vehicle and stored_at < started:
+                    del self.entries[plate]
+            self.last_change_id = last_change_id
+            self.last_full_refresh = now
+            self._dropExpiredLocked(now)
+
+        if self.plate_index:
+            self.plate_index.load(vehicles, full=True)
+            self.plate_index.last_change_id = last_change_id
+        return True
+
+    def _dropExpiredLocked(self, now):
+        # ----- the expired entries of the plates that are not registered are dropped -----
+        for plate, (vehicle, stored_at, expires_at) in list(self.entries.items()):
+            if vehicle is None and expires_at <= now:
+                del self.entries[plate]
+
+    def startAutoRefresh(self, interval_s=30.0):
+        """
+        This function refreshes the cache periodically from a daemon thread (incremental refreshes,
+        with a full snapshot every full_refresh_interval_s).
+            :param interval_s: seconds between two refreshes
+        """
+        stop_event = threading.Event()
+
+        def refresh():
+            while not stop_event.wait(interval_s):
+                full = (self.last_full_refresh is None
+                        or time.monotonic() - self.last_full_refresh >= self.full_refresh_interval_s)
+                try:
+                    self.refresh(full=full)
+                except Exception as e:
+                    print(f"[ERROR] Could not refresh the authorization cache: {e}")
+
+        self.refresh_stop = stop_event
+        self.refresh_thread = threading.Thread(target=refresh, name="auth-cache-refresh", daemon=True)
+        self.refresh_thread.start()
+        return stop_event
+
+    def stopAutoRefresh(self):
+        """
+        This function stops the periodic refresh and waits for a refresh in progress, so the database
+        can be closed safely afterwards.
+        """
+        if self.refresh_stop:
+            self.refresh_stop.set()
+        if self.refresh_thread:
+            self.refresh_thread.join()
+            self.refresh_thread = None
+
+    def stats(self):
+        """
+        :return: dictionary with the number of entries, hits, misses, stale hits and database errors
+        """
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses,
+                    "stale_hits": self.stale_hits, "errors": self.errors}
@@ -0,0 +1,273 @@
+import csv
+import json
+import multiprocessing
+import os
+import time
+
+import cv2
+
+from src.recognizer import NumberPlateRecognizer
+from src.ocr_cache import PlateOCRCache
+from src.correction import PlateCorrector
+from src.validator import RomanianLicensePlateValidator
+from src.utils import validImageFile
+
+# ----- recognizer owned by each worker process (created once by the pool initializer) -----
+_worker_recognizer = None
+
+CSV_FIELDS = ["image_path", "plate_found", "plate_text", "bbox_x", "bbox_y", "bbox_w", "bbox_h",
+              "preprocess_ms", "contour_ms", "extract_ms", "clean_ms", "ocr_ms", "total_ms", "error"]
+
+
+def _buildRecognizer(recognizer_kwargs, ocr_cache_size=0, correct_plates=False):
+    """
+    This function builds the recognizer of a batch run.
+        :param recognizer_kwargs: keyword arguments for the NumberPlateRecognizer
+        :param ocr_cache_size: size of the OCR cache (0 disables the cache)
+        :param correct_plates: fix the OCR confusions with a PlateCorrector
+    :return: the recognizer
+    """
+    # ----- no TTL in batch mode: the same frame read twice gives the same text -----
+    ocr_cache = PlateOCRCache(max_size=ocr_cache_size, ttl_s=None) if ocr_cache_size else None
+
+    # ----- built in the worker: the corrector and the cache hold locks, which cannot be sent to a process -----
+    plate_corrector = PlateCorrector(RomanianLicensePlateValidator()).correctText if correct_plates else None
+
+    return NumberPlateRecognizer(ocr_cache=ocr_cache, plate_corrector=plate_corrector, **recognizer_kwargs)
+
+
+def _initWorker(recognizer_kwargs, ocr_cache_size=0, correct_plates=False):
+    """
+    This function initialises the recognizer inside a worker process.
+        :param recognizer_kwargs: keyword arguments for the NumberPlateRecognizer
+        :param ocr_cache_size: size of the OCR cache of the worker (0 disables the cache)
+        :param correct_plates: fix the OCR confusions with a PlateCorrector of the worker
+    """
+    global _worker_recognizer
+
+    # ----- one core per worker: OpenCV and tesseract must not spawn their own thread pools -----
+    cv2.setNumThreads(1)
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+    _worker_recognizer = _buildRecognizer(recognizer_kwargs, ocr_cache_size, correct_plates)
+
+
+def _elapsedMs(start):
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def recognizeImageFile(image_path, recognizer=None):
+    """
+    This function runs the recognition pipeline on one image file and times every stage.
+        :param image_path: input image path
+        :param recognizer: recognizer to use (defaults to the one of the current worker process)
+    :return: a dictionary with the plate text, the bounding box and the stage timings
+    """
+    recognizer = recognizer or _worker_recognizer or NumberPlateRecognizer()
+
+    result = {"image_path": image_path, "plate_found": False, "plate_text": "", "bbox": None,
+              "timings": {}, "error": None}
+    timings = result["timings"]
+    total_start = time.perf_counter()
+
+    try:
+        pipeline_result = recognizer.recognizePlateNumber(image_path, return_trace=True)
+
+        for stage, elapsed in pipeline_result.timings.items():
+            timings[stage] = round(elapsed, 3)
+
+        if pipeline_result.plate_found:
+            result["plate_found"] = True
+            result["plate_text"] = pipeline_result.text
+            result["bbox"] = list(pipeline_result.bbox)
+
+    except Exception as e:
+        # ----- one broken file must not kill the whole batch -----
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    timings["total_ms"] = _elapsedMs(total_start)
+
+    return result
+
+
+class BatchResultWriter:
+    """
+    Streams batch results to a JSONL or CSV file (picked from the file extension), one line per image.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.format = "csv" if output_path.lower().endswith(".csv") else "jsonl"
+        self.file = None
+        self.csv_writer = None
+
+    def readProcessedPaths(self):
+        """
+        This function reads the image paths that already have a result in the output file.
+        :return: set of already processed image paths
+        """
+        processed = set()
+        if not os.path.exists(self.output_path):
+            return processed
+
+        with open(self.output_path, newline="") as file:
+            if self.format == "csv":
+                for row in csv.DictReader(file):
+                    # ----- a row cut by an interrupted run misses its last fields (or has extra ones if glued) -----
+                    if None in row or not row.get("image_path") or not row.get("total_ms"):
+                        continue
+                    processed.add(row["image_path"])
+            else:
+                for line in file:
+                    try:
+                        processed.add(json.loads(line)["image_path"])
+                    except (ValueError, KeyError):
+                        # ----- the last line can be cut if the previous run was interrupted -----
+                        continue
+
+        return processed
+
+    def open(self, append=True):
+        """
+        This function opens the output file.
+            :param append: condition for keeping the results that are already in the file
+        """
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        append = append and os.path.exists(self.output_path)
+        if append:
+            self._dropTruncatedLine()
+
+        self.file = open(self.output_path, "a" if append else "w", newline="")
+
+        if self.format == "csv":
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            if not append or os.path.getsize(self.output_path) == 0:
+                self.csv_writer.writeheader()
+
+    def _dropTruncatedLine(self):
+        # ----- the last line of an interrupted run is removed, so the next result does not get glued to it -----
+        with open(self.output_path, "rb+") as file:
+            content = file.read()
+            if content and not content.endswith(b"\n"):
+                file.truncate(content.rfind(b"\n") + 1)
+
+    def write(self, result):
+        """
+        This function writes one result and flushes it, so an interrupted run keeps everything done so far.
+            :param result: result dictionary from recognizeImageFile
+        """
+        if self.format == "csv":
+            bbox = result["bbox"] or [None] * 4
+            row = {"image_path": result["image_path"],
+                   "plate_found": result["plate_found"],
+                   "plate_text": result["plate_text"],
+                   "bbox_x": bbox[0], "bbox_y": bbox[1], "bbox_w": bbox[2], "bbox_h": bbox[3],
+                   "error": result["error"] or ""}
+            row.update(result["timings"])
+            self.csv_writer.writerow(row)
+        else:
+            self.file.write(json.dumps(result) + "\n")
+
+        self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class BatchPlateRecognizer:
+    """
+    Runs the number plate recognizer over many images using a pool of worker processes.
+    """
+
+    def __init__(self, workers=None, chunk_size=4, ocr_cache_size=0, correct_plates=False, **recognizer_kwargs):
+        """
+        Initializes the batch recognizer.
+
+        Args:
+            workers (int, optional): Number of worker processes. Defaults to the number of CPU cores.
+            chunk_size (int, optional): Number of images sent to a worker at once.
+            ocr_cache_size (int, optional): Size of the perceptual hash OCR cache of every worker
+                                            (useful for archives with many frames of the same car).
+            correct_plates (bool, optional): Fix the OCR confusions (0/O, 8/B, ...) with a PlateCorrector.
+            **recognizer_kwargs: Passed to the NumberPlateRecognizer of every worker
+                                 (e.g. ocr_backend, localization_scale).
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.ocr_cache_size = ocr_cache_size
+        self.correct_plates = correct_plates
+
+        # ----- a worker reads one plate at a time, so one warm OCR engine is enough -----
+        self.recognizer_kwargs = dict(recognizer_kwargs)
+        self.recognizer_kwargs.setdefault("ocr_pool_size", 1)
+
+    def collectImagePaths(self, images_path):
+        """
+        This function collects all the image files inside a directory (recursively), in a stable order.
+            :param images_path: directory with the images
+        :return: list of image paths
+        """
+        image_paths = []
+        for root, _, files in os.walk(images_path):
+            for file in files:
+                if validImageFile(file):
+                    image_paths.append(os.path.join(root, file))
+
+        return sorted(image_paths)
+
+    def iterResults(self, image_paths):
+        """
+        This function recognizes the plates from the given images, yielding every result as soon as it is ready.
+            :param image_paths: list of image paths
+        :return: generator of result dictionaries (in completion order)
+        """
+        # ----- in-process run: the thread limits of the workers would outlive the batch in the caller's process -----
+        if self.workers == 1:
+            recognizer = _buildRecognizer(self.recognizer_kwargs, self.ocr_cache_size, self.correct_plates)
+            for image_path in image_paths:
+                yield recognizeImageFile(image_path, recognizer)
+            return
+
+        with multiprocessing.Pool(processes=self.workers, initializer=_initWorker,
+                                  initargs=(self.recognizer_kwargs, self.ocr_cache_size, self.correct_plates)) as pool:
+            for result in pool.imap_unordered(recognizeImageFile, image_paths, chunksize=self.chunk_size):
+                yield result
+
+    def run(self, images_path, output_path, resume=True):
+        """
+        This function recognizes all the images of a directory and streams the results to the output file.
+            :param images_path: directory with the images
+            :param output_path: output file (.jsonl or .csv)
+            :param resume: condition for skipping the images that already have a result in the output file
+        :return: a dictionary with the run summary
+        """
+        writer = BatchResultWriter(output_path)
+        image_paths = self.collectImagePaths(images_path)
+
+        skipped = 0
+        if resume:
+            processed = writer.readProcessedPaths()
+            pending = [image_path for image_path in image_paths if image_path not in processed]
+            skipped = len(image_paths) - len(pending)
+            image_paths = pending
+
+        summary = {"processed": 0, "plates_found": 0, "errors": 0, "skipped": skipped, "elapsed_s": 0.0}
+        start = time.perf_counter()
+
+        writer.open(append=resume)
+        try:
+            for result in self.iterResults(image_paths):
+                writer.write(result)
+                summary["processed"] += 1
+                summary["plates_found"] += int(result["plate_found"])
+                summary["errors"] += int(result["error"] is not None)
+        finally:
+            writer.close()
+            summary["elapsed_s"] = round(time.perf_counter() - start, 3)
+
+        return summary
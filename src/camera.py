@@ -1,14 +1,29 @@
+import asyncio
 import cv2
-import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from mysql.connector import Error
 import serial  # Import the serial library
 
 # Assuming recognizer.py and validator.py are in the same directory or accessible via PYTHONPATH
 from recognizer import NumberPlateRecognizer
 from validator import RomanianLicensePlateValidator
-
-# Import the ParkingDatabaseManager class from your database.py (or parking_db_app.py) file
-from database import ParkingDatabaseManager
+from tracker import PlateTracker
+from motion import MotionGate
+from pipeline import StreamPipeline
+from ocr_cache import PlateOCRCache
+from metrics import RecognizerMetrics
+from sources import ReplaySource, V4L2Source
+from consensus import ConsensusDecisionEngine
+from correction import PlateCorrector
+from plate_index import RegisteredPlateIndex
+from auth_cache import AuthorizationCache
+from event_log import AccessEventLog
+
+# Import the database manager factory (MySQL or local SQLite backend) from storage.py
+from storage import create_database_manager
 
 # TODO: think about adding a conf.local file for each platform
 
@@ -19,29 +34,119 @@ except ImportError:
     Picamera2 = None
 
 
+# ----- serial command opening the barrier of a lane (the firmware opens the exit barrier on its own) -----
+GATE_COMMANDS = {"entry": "open_entry", "exit": None}
+
+# ----- prefix of the unknown plates registered on the spot, only by the entry lane -----
+AUTO_ADD_PREFIXES = {"entry": "TM", "exit": None}
+
+
 class PiCamera2Stream:
-    def __init__(self, resolution=(640, 480), platform="pi"):
+    def __init__(self, resolution=(640, 480), platform="pi", use_tracker=True, use_motion_gate=True,
+                 metrics_port=None, metrics_file=None, metrics_interval=15.0, source=None, realtime=True,
+                 headless=False, use_consensus=True, use_correction=True, use_plate_index=True,
+                 use_auth_cache=True, direction="entry", lane=None, event_spill_path="access_events.spill"):
+        """
+        Initializes the camera stream.
+
+        Args:
+            resolution (tuple, optional): (width, height) of the frames.
+            platform (str, optional): "pi" (Picamera2), "mac" (webcam), "linux" (V4L2 camera)
+                                      or "replay" (video file / directory of frames).
+            use_tracker (bool, optional): Reuse the OCR reading of a plate while it stays in front of the camera.
+            use_motion_gate (bool, optional): Skip the recognition while the lane is empty.
+            metrics_port (int, optional): Port of the HTTP endpoint serving the recognizer metrics.
+            metrics_file (str, optional): Prometheus textfile where the recognizer metrics are written.
+            metrics_interval (float, optional): Seconds between two writes of the metrics textfile.
+            source (str or int, optional): Video file / frame directory ("replay") or V4L2 device ("linux").
+            realtime (bool, optional): Replay at the recorded frame rate (False replays as fast as possible).
+            headless (bool, optional): Do not open the preview window (servers, load tests).
+            use_consensus (bool, optional): Vote the readings of a vehicle into one decision per passage
+                                            instead of acting on every frame.
+            use_correction (bool, optional): Replace the OCR confusions (0/O, 8/B, ...) with the closest valid plate.
+            use_plate_index (bool, optional): Match the plates against an in-memory copy of the registered plates,
+                                              tolerating one misread character, instead of querying the database.
+            use_auth_cache (bool, optional): Answer the authorization lookups from memory (refreshed in the
+                                             background), also while the database is briefly unreachable.
+            direction (str, optional): "entry" or "exit": the barrier command sent for the allowed plates,
+                                       the automatic registration of the unknown ones (entry only)
+                                       and the direction recorded with the access events of the lane.
+            lane (str, optional): Name of the lane in the access events (defaults to the direction).
+            event_spill_path (str, optional): File keeping the access events while the database is unreachable
+                                              (None disables the access event log).
+        """
+        if direction not in GATE_COMMANDS:
+            raise ValueError("[ERROR] Unsupported direction. Use 'entry' or 'exit'.")
+
         self.platform = platform
+        self.direction = direction
+        self.lane = lane or direction
+        self.gate_command = GATE_COMMANDS[direction]
+        self.auto_add_prefix = AUTO_ADD_PREFIXES[direction]
         self.resolution = resolution
+        self.headless = headless
+        self.source = None
         self.serial_port = None  # Initialize serial_port attribute
+        self.serial_executor = None
 
         # Constructors for image processing and plate validation classes
-        self.numberPlateRecognizer = NumberPlateRecognizer()
         self.validator = RomanianLicensePlateValidator()
+        self.corrector = PlateCorrector(self.validator) if use_correction else None
+
+        # ----- the frames always have the stream resolution, so the working buffers are allocated once -----
+        # ----- the OCR cache answers for the nearly identical plate regions of a stationary car: within a track, -----
+        # ----- sensor noise changes under 15 of the 512 hash bits and a contour one pixel off under 80 -----
+        # ----- the OCR cascade only runs the expensive passes for the readings the validator rejects -----
+        # ----- the stage metrics are only collected when they are exported (endpoint or textfile) -----
+        self.metrics = RecognizerMetrics() if metrics_port or metrics_file else None
+        self.metrics_file = metrics_file
+        self.numberPlateRecognizer = NumberPlateRecognizer(reuse_buffers=True, frame_size=resolution,
+                                                           ocr_cache=PlateOCRCache(max_distance=80), metrics=self.metrics,
+                                                           plate_validator=self.validator.verifyPlateFormat,
+                                                           plate_corrector=self.corrector.correctText if self.corrector else None)
+        if metrics_port:
+            self.metrics.serve(metrics_port)
+        self.metrics_export = None
+        if metrics_file:
+            self.metrics_export = self.metrics.startTextFileExport(metrics_file, interval_s=metrics_interval)
+
+        # ----- the tracker keeps the reading of a plate while it stays in front of the camera -----
+        self.tracker = PlateTracker() if use_tracker else None
+        self.tracker_lock = threading.Lock()
+
+        # ----- one database query / serial write per vehicle passage instead of one per frame -----
+        self.decision_engine = ConsensusDecisionEngine(validator=self.validator.verifyPlateFormat) if use_consensus else None
+
+        # ----- the motion gate skips the recognition while the lane is empty -----
+        self.motion_gate = MotionGate() if use_motion_gate else None
 
         # Load environment variables for database connection
         load_dotenv()
-        DB_HOST = os.getenv("DB_HOST")
-        DB_USER = os.getenv("DB_USER")
-        DB_PASSWORD = os.getenv("DB_PASSWORD")
-        DB_NAME = os.getenv("DB_NAME")
-
-        # Initialize the database manager
-        if not all([DB_HOST, DB_USER, DB_PASSWORD, DB_NAME]):
-            print("Error: One or more database environment variables are not set. Please check your .env file.")
-            self.db_manager = None  # Set to None to indicate no database connection
-        else:
-            self.db_manager = ParkingDatabaseManager(DB_HOST, DB_USER, DB_PASSWORD, DB_NAME)
+
+        # Initialize the database manager (MySQL, or a local SQLite file synchronized with it, see DB_BACKEND)
+        # None indicates no database connection
+        self.db_manager = create_database_manager()
+
+        # ----- the registered plates are kept in memory, refreshed in the background -----
+        # ----- (by the authorization cache when there is one, it keeps the plate index up to date) -----
+        self.plate_index = None
+        self.db_refresher = None
+        if self.db_manager and use_plate_index:
+            self.plate_index = RegisteredPlateIndex(self.db_manager)
+        if self.db_manager and use_auth_cache:
+            self.db_manager = AuthorizationCache(self.db_manager, plate_index=self.plate_index)
+            self.db_manager.refresh(full=True)
+            self.db_refresher = self.db_manager
+        elif self.plate_index:
+            self.plate_index.refresh(full=True)
+            self.db_refresher = self.plate_index
+        if self.db_refresher:
+            self.db_refresher.startAutoRefresh()
+
+        # ----- the gate decisions are written to access_events in the background, never on the barrier path -----
+        self.event_log = None
+        if self.db_manager and event_spill_path:
+            self.event_log = AccessEventLog(self.db_manager, spill_path=event_spill_path)
 
         if self.platform == "pi":
             # ----- initialising the picamera2 for the raspberry pi -----
@@ -74,11 +179,21 @@ class PiCamera2Stream:
             self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
             print(f"[Webcam] Initialized with resolution {resolution}")
 
-        # TODO: add linux / windows platforms for this class (depends on who's interested in running the code locally)
+        elif self.platform == "linux":
+            # ----- initialising a generic V4L2 camera (USB webcam, capture card) -----
+            self.source = V4L2Source(source if source is not None else 0, resolution)
+
+        elif self.platform == "replay":
+            # ----- replaying recorded footage instead of a live camera -----
+            if source is None:
+                raise ValueError("[ERROR] The replay platform needs a video file or a frame directory as source.")
+            self.source = ReplaySource(source, realtime=realtime)
+
+        # TODO: add a windows platform for this class (depends on who's interested in running the code locally)
 
         else:
             # ----- returning an error if the platform is not supported -----
-            raise ValueError("[ERROR] Unsupported platform. Use 'pi' or 'mac'.")
+            raise ValueError("[ERROR] Unsupported platform. Use 'pi', 'mac', 'linux' or 'replay'.")
 
     def _send_serial_message(self, message):
         """
@@ -93,83 +208,370 @@ class PiCamera2Stream:
         else:
             print("[Serial] Serial port not open or not initialized. Message not sent.")
 
-    def start_stream(self):
+    async def _send_serial_message_async(self, message):
+        """
+        Asynchronous version of _send_serial_message. The writes run in one worker thread, so the messages
+        keep their order and the event loop never waits on the serial port.
+        """
+        if self.serial_executor is None:
+            self.serial_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="serial")
+        await asyncio.get_running_loop().run_in_executor(self.serial_executor, self._send_serial_message, message)
+
+    def _detect_plate(self, frame):
+        """
+        Finds the plate contour of a frame and extracts the plate region (no OCR).
+        """
+        plate_contour = self.numberPlateRecognizer.localizePlate(frame)[3]
+        if plate_contour is None:
+            return None, None
+
+        return plate_contour, self.numberPlateRecognizer.extractPlateRegion(frame, plate_contour)
+
+    def _read_plate(self, plate_contour, plate_region):
+        """
+        Reads the text of a detected plate. With the tracker enabled, the OCR only runs for new plates
+        or low confidence readings (with the decision engine: while the passage of the vehicle waits for
+        readings, at most max_readings times), otherwise the last reading of the plate track is reused.
+        Returns the reading as (text, confidence, vehicle key, fresh), fresh being False for a reused reading.
+        """
+        if not self.tracker:
+            text, confidence = self.numberPlateRecognizer.readPlateTextWithConfidence(plate_region, plate_contour)
+            return text, confidence, None, True
+
+        with self.tracker_lock:
+            track = self.tracker.update([cv2.boundingRect(plate_contour)])[0]
+            # ----- with the decision engine, the plate is read while its passage waits for readings (capped) -----
+            if self.decision_engine is not None:
+                needs_ocr = self.decision_engine.needsReading(track.track_id)
+            else:
+                needs_ocr = self.tracker.needsOcr(track)
+
+        if not needs_ocr:
+            return track.text, track.confidence, track.track_id, False
+
+        # ----- the cached readings only answer the same track, never the next car -----
+        text, confidence = self.numberPlateRecognizer.readPlateTextWithConfidence(plate_region, plate_contour,
+                                                                                  cache_scope=track.track_id)
+        with self.tracker_lock:
+            self.tracker.setReading(track, text, confidence)
+
+        # ----- the decision engine votes on the raw readings, the direct path acts on the best one of the track -----
+        if self.decision_engine is None:
+            text, confidence = track.text, track.confidence
+
+        return text, confidence, track.track_id, True
+
+    def _recognize_frame(self, frame):
+        """
+        Runs the recognition on a frame. Returns the plate region and the reading, or None and None.
+        """
+        plate_contour, plate_region = self._detect_plate(frame)
+        if plate_contour is None:
+            if self.tracker:
+                with self.tracker_lock:
+                    self.tracker.update([])
+            return None, None
+
+        return plate_region, self._read_plate(plate_contour, plate_region)
+
+    def _process_frame(self, frame):
+        """
+        Recognizes the plate of a frame and acts on the extracted text.
+        """
+        plate_region, reading = self._recognize_frame(frame)
+        self._handle_reading(reading)
+
+    def _handle_reading(self, reading):
+        """
+        Acts on the reading of a frame (None if no plate was found): directly without the decision engine,
+        otherwise only on the consensus decisions of the vehicle passages.
+        """
+        if self.decision_engine is None:
+            self._handle_plate_text(reading[0] if reading else "No plate contour found")
+            return
+
+        for plate in self._collect_decisions(reading):
+            self._handle_plate_text(plate)
+
+    def _collect_decisions(self, reading):
+        """
+        Gives the reading of a frame (None if no plate was found) to the decision engine.
+        Returns the plates to act on: the consensus decisions, or the reading itself without the engine.
+        """
+        if self.decision_engine is None:
+            return [reading[0]] if reading and reading[0] else []
+
+        if reading is None:
+            decisions = self.decision_engine.poll()
+        else:
+            text, confidence, vehicle_key, fresh = reading
+            decisions = self.decision_engine.addReading(text, confidence, vehicle_key, vote=fresh)
+
+        for plate in decisions:
+            print(f"[Consensus] Decision for plate '{plate}'")
+        return decisions
+
+    def _poll_decisions(self):
+        self._handle_reading(None)
+
+    def _flush_decisions(self):
+        if self.decision_engine:
+            for plate in self.decision_engine.flush():
+                print(f"[Consensus] Decision for plate '{plate}'")
+                self._handle_plate_text(plate)
+
+    def _lookup_vehicle(self, plate):
+        """
+        Finds the registered vehicle of a plate: in the plate index first (the exact plate, or the only registered
+        plate one character away once verified in the database), in the database for the vehicles added since
+        the last refresh.
+        """
+        vehicle_info = self._match_registered(plate)
+        if vehicle_info and vehicle_info["plate_number"] != plate:
+            matched = vehicle_info["plate_number"]
+            try:
+                vehicle_info = self._verify_match(plate, matched, self.db_manager.find_vehicle(matched))
+            except Error as e:
+                print(f"[Index] Could not verify the registered plate '{matched}': {e}")
+                vehicle_info = None
+        if vehicle_info:
+            return vehicle_info
+
+        vehicle_info = self.db_manager.verify_from_database(plate)
+        if vehicle_info and self.plate_index:
+            self.plate_index.add(vehicle_info)
+        return vehicle_info
+
+    async def _lookup_vehicle_async(self, plate):
+        """
+        Asynchronous version of _lookup_vehicle, the database round trips run on the connection pool.
+        """
+        vehicle_info = self._match_registered(plate)
+        if vehicle_info and vehicle_info["plate_number"] != plate:
+            matched = vehicle_info["plate_number"]
+            try:
+                vehicle_info = self._verify_match(plate, matched,
+                                                  await self.db_manager.run_async(self.db_manager.find_vehicle, matched))
+            except Error as e:
+                print(f"[{self.lane}] Could not verify the registered plate '{matched}': {e}")
+                vehicle_info = None
+        if vehicle_info:
+            return vehicle_info
+
+        vehicle_info = await self.db_manager.verify_async(plate)
+        if vehicle_info and self.plate_index:
+            self.plate_index.add(vehicle_info)
+        return vehicle_info
+
+    def _match_registered(self, plate):
+        if not self.plate_index:
+            return None
+
+        return self.plate_index.match(plate)
+
+    def _verify_match(self, plate, matched, vehicle_info):
+        """
+        A plate matched one character away only opens the gate if the matched plate is still registered and
+        authorized, as read from the database (the index may be one refresh behind).
+        """
+        if vehicle_info and vehicle_info["is_authorized"]:
+            print(f"[Index] Plate '{plate}' matched the registered plate '{matched}'")
+            self.plate_index.add(vehicle_info)
+            return vehicle_info
+
+        print(f"[Index] Plate '{plate}' matched '{matched}', which is no longer registered or authorized")
+        if vehicle_info is None:
+            self.plate_index.remove(matched)
+        return None
+
+    def _log_event(self, plate, decision):
+        if self.event_log:
+            self.event_log.log(plate, decision, direction=self.direction, lane=self.lane)
+
+    def _plan_decision(self, plate, vehicle_info):
+        """
+        Decides what the lane does with a plate in the valid format, once looked up. Returns the decision and
+        the plate to act on: "granted" for a registered vehicle, "add" for an unknown plate the lane registers
+        on the spot (only the entry lane, for the TM plates), "denied" otherwise.
+        """
+        if vehicle_info:
+            print(f"[{self.lane}] *** Plate '{vehicle_info['plate_number']}' FOUND in database! "
+                  f"Authorization: {vehicle_info['is_authorized']} ***")
+            return "granted", vehicle_info["plate_number"]
+
+        print(f"[{self.lane}] --- Plate '{plate}' NOT FOUND in database. ---")
+        if self.auto_add_prefix and plate.startswith(self.auto_add_prefix):
+            print(f"[{self.lane}] Plate '{plate}' starts with '{self.auto_add_prefix}'. Attempting to add to database...")
+            return "add", plate
+
+        print(f"[{self.lane}] Plate '{plate}' is not automatically added to the database by the {self.direction} lane.")
+        return "denied", plate
+
+    def _record_addition(self, plate, added):
+        """
+        Keeps the result of the automatic registration of a plate. Returns the decision ("added" or "denied").
+        """
+        if not added:
+            print(f"[{self.lane}] !!! Failed to add plate '{plate}' to database. !!!")
+            return "denied"
+
+        if self.plate_index:
+            self.plate_index.add({"plate_number": plate, "is_authorized": True})
+        print(f"[{self.lane}] *** Plate '{plate}' successfully ADDED to database with authorization TRUE. ***")
+        return "added"
+
+    def _record_decision(self, plate, decision):
+        """
+        Logs the decision of a plate. Returns the serial command opening the barrier of the lane,
+        or None when there is nothing to send (denied plate, exit barrier opened by the firmware).
+        """
+        self._log_event(plate, decision)
+        return self.gate_command if decision in ("granted", "added") else None
+
+    def _handle_plate_text(self, extracted_text):
+        """
+        Validates the extracted text, verifies it in the database and opens the barrier if allowed.
+        """
+        if extracted_text is not None and extracted_text != "":  # Ensure text is not empty
+            extracted_text = extracted_text.strip().upper()  # Clean and standardize
+            print(f"Recognized Text: {extracted_text}")
+
+            if self.validator.verifyPlateFormat(extracted_text):
+                print(f"Plate '{extracted_text}' is in VALID format.")
+
+                # --- Database Verification and Auto-Add ---
+                if self.db_manager:
+                    decision, plate = self._plan_decision(extracted_text, self._lookup_vehicle(extracted_text))
+                    if decision == "add":
+                        decision = self._record_addition(plate, self.db_manager.append_to_database(plate, is_authorized=True))
+
+                    command = self._record_decision(plate, decision)
+                    if command:
+                        self._send_serial_message(command)
+                else:
+                    print("Database manager not initialized. Cannot verify or add plate to DB.")
+            else:
+                print(f"Plate '{extracted_text}' is in INVALID format.")
+        elif extracted_text == "":
+            print("No text extracted from plate region.")
+        else:
+            print("Plate recognition failed or no text extracted.")
+
+    async def _handle_plate_text_async(self, extracted_text):
+        """
+        Asynchronous version of _handle_plate_text (same decisions): while the database and the serial port
+        are waited on, the event loop keeps serving the frames of the other lanes.
+        """
+        extracted_text = (extracted_text or "").strip().upper()
+        if not self.validator.verifyPlateFormat(extracted_text):
+            print(f"[{self.lane}] Plate '{extracted_text}' is in INVALID format.")
+            return
+        if not self.db_manager:
+            print("Database manager not initialized. Cannot verify or add plate to DB.")
+            return
+
+        decision, plate = self._plan_decision(extracted_text, await self._lookup_vehicle_async(extracted_text))
+        if decision == "add":
+            decision = self._record_addition(plate, await self.db_manager.append_async(plate, is_authorized=True))
+
+        command = self._record_decision(plate, decision)
+        if command:
+            await self._send_serial_message_async(command)
+
+    def _capture_frame(self):
+        """
+        Captures one frame from the camera. Returns None if the capture failed.
+        """
+        if self.platform == "pi":
+            return self.picam2.capture_array()
+        if self.source:
+            return self.source.read()
+
+        ret, frame = self.camera.read()
+        if not ret:
+            print("[ERROR] Failed to capture image from webcam.")
+            return None
+        return frame
+
+    def _detect_stage(self, item):
+        item["plate_contour"], item["plate_region"] = self._detect_plate(item["frame"])
+        if item["plate_contour"] is None:
+            if self.tracker:
+                with self.tracker_lock:
+                    self.tracker.update([])
+            return False
+        return True
+
+    def _ocr_stage(self, item):
+        item["reading"] = self._read_plate(item["plate_contour"], item["plate_region"])
+        return bool(item["reading"][0])
+
+    def _decide_stage(self, item):
+        self._handle_reading(item["reading"])
+
+    def start_pipelined_stream(self, detection_workers=1, ocr_workers=1, queue_size=2, stats_interval=10.0):
         """
-        Starts the camera stream and displays the video feed in a window.
+        Starts the camera stream with capture, detection, OCR and decision running in their own threads,
+        connected by bounded queues that drop the oldest frames. A slow database round trip only delays
+        the decision thread, the capture keeps its frame rate.
+
+        Args:
+            detection_workers (int, optional): Number of detection threads.
+            ocr_workers (int, optional): Number of OCR threads.
+            queue_size (int, optional): Depth of the queues between the stages.
+            stats_interval (float, optional): Seconds between two prints of the queue depths and latencies.
         """
+        accept_fn = self.motion_gate.shouldProcess if self.motion_gate else None
+        # ----- the passages of the vehicles that left are decided even when no plate reaches the decision stage -----
+        idle_fn = self._poll_decisions if self.decision_engine else None
+        pipeline = StreamPipeline(self._capture_frame, self._detect_stage, self._ocr_stage, self._decide_stage,
+                                  accept_fn=accept_fn, idle_fn=idle_fn, detection_workers=detection_workers,
+                                  ocr_workers=ocr_workers, queue_size=queue_size)
+        pipeline.start()
+
         print("Press 'q' to quit.")
+        last_stats = time.monotonic()
+        while pipeline.running:
+            # ----- the preview window must stay in the main thread -----
+            if self.headless:
+                time.sleep(0.05)
+            else:
+                if pipeline.latest_frame is not None:
+                    cv2.imshow("Camera stream", pipeline.latest_frame)
+
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+
+            if stats_interval and time.monotonic() - last_stats >= stats_interval:
+                print(f"[Pipeline] {pipeline.stats()}")
+                last_stats = time.monotonic()
+
+        pipeline.stop()
+        self._flush_decisions()
+        print(f"[Pipeline] {pipeline.stats()}")
+        self.cleanup()
+
+    def start_stream(self):
+        """
+        Starts the camera stream and displays the video feed in a window (unless headless).
+        A replayed recording ends the stream, the frame rate of the whole loop is printed at the end.
+        """
+        print("Press 'q' to quit." if not self.headless else "Running headless.")
+        frame_count = 0
+        processed_count = 0
+        started_at = time.perf_counter()
         while True:
             frame = None  # Initialize frame outside the if/else to ensure it's always defined for cv2.imshow
 
             if self.platform == "pi":
                 frame = self.picam2.capture_array()  # captures a single image frame from the active preview stream.
 
-                # NOTE: The current setup uses a static image path ("../images/car1.jpg") for recognition
-                # You might want to pass the 'frame' directly to the recognizer if it processes raw image data.
-                # For demonstration, I'll assume your recognizer can handle 'frame' or that you're using
-                # the static image for testing the plate recognition part.
-                # If your recognizer needs a file path, you'd need to save the frame to a temporary file first.
-
-                # Assuming recognizer.recognizePlateNumber can take the captured 'frame' directly or an image path
-                # I'm keeping the original call for now. If it expects a file path, this will need adjustment.
-                # If your recognizer can take an OpenCV image (numpy array), you would change this to:
-                # plate_region, extracted_text = self.numberPlateRecognizer.recognizePlateNumber(frame)
-
-                # For this example, let's assume `recognizer` can process the `frame` directly.
-                # If it expects an image path, you'd need to save the frame temporarily.
-                # As `car1.jpg` is a fixed path, I'll add a placeholder to demonstrate the flow.
-                # You'll need to adapt `recognizer.py` or how you feed images to it.
-                # For a real-time system, you'd pass the `frame` (numpy array) directly.
-
-                # Temporarily using a placeholder for extracted_text for testing db integration
-                # In a real scenario, this would come from the actual recognition process.
-                # For now, let's simulate a recognized plate for testing DB integration:
-                # extracted_text = "B01ABC" # Example of a recognized plate for testing
-
-                # Original call, assuming it works with your setup or is for a different part of the flow
-                plate_region, extracted_text = self.numberPlateRecognizer.recognizePlateNumber("../images/car1.jpg",
-                                                                                               frame)
-
-                if extracted_text is not None and extracted_text != "":  # Ensure text is not empty
-                    extracted_text = extracted_text.strip().upper()  # Clean and standardize
-                    print(f"Recognized Text: {extracted_text}")
-
-                    if self.validator.verifyPlateFormat(extracted_text):
-                        print(f"Plate '{extracted_text}' is in VALID format.")
-
-                        # --- Database Verification and Auto-Add ---
-                        if self.db_manager:
-                            vehicle_info = self.db_manager.verify_from_database(extracted_text)
-                            if vehicle_info:
-                                print(
-                                    f"*** Plate '{extracted_text}' FOUND in database! Authorization: {vehicle_info['is_authorized']} ***")
-                                # Send serial message if found and authorized (you can add a condition here if needed)
-                                self._send_serial_message("open_entry")
-                            else:
-                                # If plate not found in DB, check if it starts with "TM" and add it
-                                print(f"--- Plate '{extracted_text}' NOT FOUND in database. ---")
-                                if extracted_text.startswith("TM"):
-                                    print(
-                                        f"Plate '{extracted_text}' starts with 'TM'. Attempting to add to database...")
-                                    if self.db_manager.append_to_database(extracted_text, is_authorized=True):
-                                        print(
-                                            f"*** Plate '{extracted_text}' successfully ADDED to database with authorization TRUE. ***")
-                                        # Send serial message after successful auto-add
-                                        self._send_serial_message("open_entry")
-                                    else:
-                                        print(f"!!! Failed to add plate '{extracted_text}' to database. !!!")
-                                else:
-                                    print(
-                                        f"Plate '{extracted_text}' does not start with 'TM'. Not automatically adding to database.")
-                        else:
-                            print("Database manager not initialized. Cannot verify or add plate to DB.")
-                    else:
-                        print(f"Plate '{extracted_text}' is in INVALID format.")
-                elif extracted_text == "":
-                    print("No text extracted from plate region.")
-                else:
-                    print("Plate recognition failed or no text extracted.")
-
+                # ----- idle lane: only the preview is updated, the recognition is skipped -----
+                if not self.motion_gate or self.motion_gate.shouldProcess(frame):
+                    self._process_frame(frame)
+                    processed_count += 1
+                elif self.decision_engine:
+                    self._poll_decisions()
 
             elif self.platform == "mac":
                 ret, frame = self.camera.read()
@@ -182,6 +584,23 @@ class PiCamera2Stream:
                 # plate_region, extracted_text = self.numberPlateRecognizer.recognizePlateNumber(frame)
                 # ... and then perform database verification as above ...
 
+            else:
+                # ----- V4L2 camera or replayed footage: same recognition as on the pi -----
+                frame = self.source.read()
+                if frame is None:
+                    break
+
+                if not self.motion_gate or self.motion_gate.shouldProcess(frame):
+                    self._process_frame(frame)
+                    processed_count += 1
+                elif self.decision_engine:
+                    self._poll_decisions()
+
+            frame_count += 1
+
+            if self.headless:
+                continue
+
             # Only show frame if it's available
             if frame is not None:
                 cv2.imshow("Camera stream", frame)
@@ -189,13 +608,53 @@ class PiCamera2Stream:
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
 
+        # ----- deciding the passages still open when the stream ends (e.g. end of a replay) -----
+        self._flush_decisions()
+
+        # ----- end-to-end throughput of the loop (capture, recognition, database, serial) -----
+        elapsed = time.perf_counter() - started_at
+        print(f"[Stream] {frame_count} frames ({processed_count} recognized) in {elapsed:.1f}s, "
+              f"{frame_count / elapsed if elapsed else 0.0:.1f} fps")
+
         self.cleanup()
 
     def cleanup(self):
         """
         Cleans up the resources used by the camera stream.
         """
-        cv2.destroyAllWindows()
+        if not self.headless:
+            cv2.destroyAllWindows()
+
+        if self.tracker:
+            print(f"[Tracker] {self.tracker.stats()}")
+        if self.motion_gate:
+            print(f"[MotionGate] {self.motion_gate.stats()}")
+        if self.decision_engine:
+            print(f"[Consensus] {self.decision_engine.stats()}")
+        # ----- a refresh in progress still uses the database: it is waited for before the database is closed -----
+        if self.db_refresher:
+            self.db_refresher.stopAutoRefresh()
+        if self.plate_index:
+            print(f"[Index] {self.plate_index.stats()}")
+        if isinstance(self.db_manager, AuthorizationCache):
+            print(f"[AuthCache] {self.db_manager.stats()}")
+        print(f"[OCR cache] {self.numberPlateRecognizer.ocr_cache.stats()}")
+
+        if self.serial_executor:
+            self.serial_executor.shutdown(wait=True)
+        if self.event_log:
+            self.event_log.close()
+            print(f"[EventLog] {self.event_log.stats()}")
+        if self.db_manager:
+            self.db_manager.close()
+
+        if self.metrics:
+            # ----- the exporter thread is stopped before the last write, so it does not outlive the stream -----
+            if self.metrics_export:
+                self.metrics_export.set()
+            if self.metrics_file:
+                self.metrics.writeTextFile(self.metrics_file)
+            self.metrics.shutdown()
 
         if self.platform == "pi":
             self.picam2.stop()
@@ -204,6 +663,8 @@ class PiCamera2Stream:
                 print("[Serial] Serial port closed.")
         elif self.platform == "mac":  # Added elif for clarity
             self.camera.release()
+        elif self.source:
+            self.source.release()
 
 
 if __name__ == "__main__":
@@ -218,5 +679,13 @@ if __name__ == "__main__":
     # For testing on a Mac (if you have a webcam and cv2 is installed):
     # stream = PiCamera2Stream(resolution=(800, 600), platform="mac")
 
+    # For replaying recorded footage headlessly, as fast as possible (throughput / incident reproduction):
+    # stream = PiCamera2Stream(platform="replay", source="footage/entry.mp4", realtime=False, headless=True)
+
+    # For serving the entry and the exit lane from one process (asyncio, no preview windows):
+    # from lanes import AsyncLaneRunner
+    # AsyncLaneRunner([PiCamera2Stream(platform="pi", headless=True, direction="entry"),
+    #                  PiCamera2Stream(platform="linux", source=0, headless=True, direction="exit")]).start()
+
     # ----- starting the camera stream -----
     stream.start_stream()
@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import Counter, defaultdict
+
+
+class PlatePassage:
+    """
+    The readings of one vehicle passing in front of the camera.
+    """
+
+    def __init__(self, vehicle_key, now):
+        self.vehicle_key = vehicle_key
+        self.first_seen = now
+        self.last_seen = now
+        self.readings = []
+        self.decided = False
+
+
+class ConsensusDecisionEngine:
+    """
+    Turns the per-frame OCR readings into one decision per vehicle passage.
+    The readings of a vehicle are accumulated for a short window and voted character by character into
+    a consensus plate; the decision is emitted as soon as enough readings agree (or when the window ends),
+    and the same plate is not decided again before the hold-off expires.
+    """
+
+    def __init__(self, validator=None, min_readings=3, min_agreement=0.6, min_final_readings=2,
+                 max_wait_s=2.0, gap_s=1.0, hold_off_s=10.0, max_readings=8):
+        """
+        Initializes the decision engine.
+
+        Args:
+            validator (callable, optional): Plate format check; an invalid consensus is never decided.
+            min_readings (int, optional): Number of readings needed to decide before the window ends.
+            min_agreement (float, optional): Minimum mean agreement (0 - 1) of the character votes.
+            min_final_readings (int, optional): Number of readings needed to decide when the window ends
+                                                (a passage with a single reading is dropped, not decided).
+            max_wait_s (float, optional): Maximum time between the first reading of a passage and its decision.
+            gap_s (float, optional): Time without readings after which the vehicle is considered gone.
+            hold_off_s (float, optional): Time during which a decided plate is not decided again.
+            max_readings (int, optional): Number of fresh readings after which an undecided passage is not read
+                                          by the OCR anymore (it is decided on its readings when the window ends).
+        """
+        self.validator = validator
+        self.min_readings = min_readings
+        self.min_agreement = min_agreement
+        self.min_final_readings = min_final_readings
+        self.max_wait_s = max_wait_s
+        self.gap_s = gap_s
+        self.hold_off_s = hold_off_s
+        self.max_readings = max_readings
+
+        self.passages = {}
+        self.decided_at = {}
+        self.lock = threading.Lock()
+
+        # ----- counters used to check how many database / serial round trips the engine saves -----
+        self.readings = 0
+        self.decisions = 0
+        self.suppressed = 0
+        self.dropped = 0
+
+    def vote(self, readings):
+        """
+        This function votes the readings of a passage into a consensus plate.
+        Only the readings with the most common length vote (a missing or extra character shifts all the
+        positions); every character is weighted by the OCR confidence of its reading.
+            :param readings: list of (text, confidence) pairs
+        :return: the consensus text and its agreement (mean share of the winning character votes, 0 - 1)
+        """
+        if not readings:
+            return "", 0.0
+
+        lengths = Counter(len(text) for text, _ in readings)
+        length = lengths.most_common(1)[0][0]
+        voters = [(text, 1.0 + (confidence or 0.0) / 100) for text, confidence in readings if len(text) == length]
+
+        consensus = ""
+        agreement = 0.0
+        for position in range(length):
+            votes = defaultdict(float)
+            for text, weight in voters:
+                votes[text[position]] += weight
+
+            character, weight = max(votes.items(), key=lambda item: item[1])
+            consensus += character
+            agreement += weight / sum(votes.values())
+
+        # ----- the readings of another length count as disagreeing -----
+        agreement = agreement / length * len(voters) / len(readings) if length else 0.0
+        return consensus, agreement
+
+    def _decide(self, passage, now, final):
+        count = len(passage.readings)
+        if count < (self.min_final_readings if final else self.min_readings):
+            return None
+
+        plate, agreement = self.vote(passage.readings)
+        if agreement < self.min_agreement:
+            return None
+        if self.validator and not self.validator(plate):
+            return None
+
+        passage.decided = True
+
+        # ----- the same plate seen again during the hold-off (vehicle waiting, track lost) is not decided again -----
+        decided_at = self.decided_at.get(plate)
+        if decided_at is not None and now - decided_at < self.hold_off_s:
+            self.suppressed += 1
+            return None
+
+        self.decided_at[plate] = now
+        self.decisions += 1
+        return plate
+
+    def addReading(self, text, confidence=None, vehicle_key=None, vote=True, now=None):
+        """
+        This function adds the reading of a frame to the passage of its vehicle.
+            :param text: the text read by the OCR
+            :param confidence: the OCR confidence (0 - 100), None if unknown
+            :param vehicle_key: identifier of the vehicle (e.g. the tracker id), None for a single lane passage
+            :param vote: False for a reading reused from a previous frame (only keeps the passage alive)
+            :param now: current time (defaults to time.monotonic())
+        :return: list of the plates decided by this reading and by the passages that ended
+        """
+        now = time.monotonic() if now is None else now
+        text = "".join((text or "").split()).upper()
+
+        with self.lock:
+            decisions = self._closePassages(now)
+
+            passage = self.passages.get(vehicle_key)
+            if passage is None:
+                passage = self.passages[vehicle_key] = PlatePassage(vehicle_key, now)
+            passage.last_seen = now
+
+            if vote and text and not passage.decided:
+                self.readings += 1
+                passage.readings.append((text, confidence))
+
+                plate = self._decide(passage, now, final=now - passage.first_seen >= self.max_wait_s)
+                if plate:
+                    decisions.append(plate)
+
+        return decisions
+
+    def isDecided(self, vehicle_key):
+        """
+        :return: True if the current passage of the vehicle already has its decision
+        """
+        with self.lock:
+            passage = self.passages.get(vehicle_key)
+            return passage is not None and passage.decided
+
+    def needsReading(self, vehicle_key, now=None):
+        """
+        This function decides if the plate of a vehicle must be read again by the OCR for its passage.
+        The re-reads of an undecided passage are capped: a vehicle whose readings keep disagreeing is read
+        at most max_readings times, and never after its window (max_wait_s) is over.
+            :param vehicle_key: identifier of the vehicle (e.g. the tracker id)
+            :param now: current time (defaults to time.monotonic())
+        :return: True for a new passage or an undecided one that still waits for readings
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            passage = self.passages.get(vehicle_key)
+            if passage is None:
+                return True
+
+            return (not passage.decided and len(passage.readings) < self.max_readings
+                    and now - passage.first_seen < self.max_wait_s)
+
+    def poll(self, now=None):
+        """
+        This function ends the passages of the vehicles that are gone or waited too long.
+        Must be called regularly (e.g. every frame), also when no plate is read.
+            :param now: current time (defaults to time.monotonic())
+        :return: list of the plates decided by the ended passages
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            return self._closePassages(now)
+
+    def flush(self):
+        """
+        This function ends all the passages, e.g. when the stream stops.
+        :return: list of the plates decided by the ended passages
+        """
+        now = time.monotonic()
+        decisions = []
+
+        with self.lock:
+            for passage in self.passages.values():
+                if passage.decided:
+                    continue
+
+                plate = self._decide(passage, now, final=True)
+                if plate:
+                    decisions.append(plate)
+                elif not passage.decided:
+                    self.dropped += 1
+            self.passages.clear()
+
+        return decisions
+
+    def _closePassages(self, now):
+        decisions = []
+
+        for vehicle_key, passage in list(self.passages.items()):
+            gone = now - passage.last_seen >= self.gap_s
+            expired = now - passage.first_seen >= self.max_wait_s
+
+            if not passage.decided and (gone or expired):
+                plate = self._decide(passage, now, final=True)
+                if plate:
+                    decisions.append(plate)
+
+            if gone:
+                if not passage.decided:
+                    self.dropped += 1
+                del self.passages[vehicle_key]
+
+        # ----- forgetting the decisions whose hold-off is over -----
+        for plate, decided_at in list(self.decided_at.items()):
+            if now - decided_at >= self.hold_off_s:
+                del self.decided_at[plate]
+
+        return decisions
+
+    def stats(self):
+        """
+        :return: dictionary with the number of readings, decisions, suppressed repeats and dropped passages
+        """
+        with self.lock:
+            return {"passages": len(self.passages), "readings": self.readings, "decisions": self.decisions,
+                    "suppressed": self.suppressed, "dropped": self.dropped}
@@ -0,0 +1,262 @@
+import heapq
+import threading
+from collections import OrderedDict
+
+DIGITS = frozenset("0123456789")
+NONZERO_DIGITS = frozenset("123456789")
+LETTERS = frozenset("ABCDEFGHIJKLMNOPRSTUVWXYZ")          # Q is never used in the 3 letters
+FIRST_LETTERS = LETTERS - {"I", "O"}
+
+
+class PlateGrammar:
+    """
+    Automaton of the strings accepted by the romanian plate rules (PlateInfo.md), built once from the
+    prefixes of the validator: a trie of the prefixes, followed by the digits / letters of every category.
+    Every state has a list of (characters, next state) transitions.
+    """
+
+    def __init__(self, county_prefixes, special_prefixes, diplomatic_prefixes):
+        self.transitions = [[]]
+        self.accepting = set()
+        self.root = 0
+
+        # ----- tails shared by all the prefixes of a category, entered by their first transition -----
+        regular = self._regularTail(digits=2)
+        bucharest = self._regularTail(digits=3)
+        temporary = self._temporaryTail()
+        special = self._digitsTail(minimum=3, maximum=7)
+        diplomatic = self._diplomaticTail()
+
+        for prefix in county_prefixes:
+            node = self._trieNode(prefix)
+            self._link(node, regular)
+            self._link(node, temporary)
+            if prefix == "B":
+                self._link(node, bucharest)
+        for prefix in special_prefixes:
+            self._link(self._trieNode(prefix), special)
+        for prefix in diplomatic_prefixes:
+            self._link(self._trieNode(prefix), diplomatic)
+
+    def _newState(self, accepting=False):
+        self.transitions.append([])
+        if accepting:
+            self.accepting.add(len(self.transitions) - 1)
+        return len(self.transitions) - 1
+
+    def _trieNode(self, prefix):
+        state = self.root
+        for character in prefix:
+            following = [target for characters, target in self.transitions[state] if characters == frozenset(character)]
+            if following:
+                state = following[0]
+            else:
+                target = self._newState()
+                self.transitions[state].append((frozenset(character), target))
+                state = target
+        return state
+
+    def _link(self, state, tail):
+        # ----- copying the first transitions of the tail, so no empty transitions are needed -----
+        self.transitions[state].extend(self.transitions[tail])
+
+    def _chain(self, character_sets, accepting_from):
+        start = self._newState()
+        state = start
+        for index, characters in enumerate(character_sets):
+            target = self._newState(accepting=index + 1 >= accepting_from)
+            self.transitions[state].append((characters, target))
+            state = target
+        return start, state
+
+    def _regularTail(self, digits):
+        start, _ = self._chain([DIGITS] * digits + [FIRST_LETTERS, LETTERS, LETTERS], accepting_from=digits + 3)
+        return start
+
+    def _temporaryTail(self):
+        # ----- 0, then 1 to 4 digits, then a last digit that is not 0 (3 to 6 digits in total) -----
+        start = self._newState()
+        zero = self._newState()
+        end = self._newState(accepting=True)
+        self.transitions[start].append((frozenset("0"), zero))
+
+        state = self._newState()
+        self.transitions[zero].append((DIGITS, state))
+        for _ in range(3):
+            self.transitions[state].append((NONZERO_DIGITS, end))
+            following = self._newState()
+            self.transitions[state].append((DIGITS, following))
+            state = following
+        self.transitions[state].append((NONZERO_DIGITS, end))
+
+        return start
+
+    def _digitsTail(self, minimum, maximum):
+        start, _ = self._chain([DIGITS] * maximum, accepting_from=minimum)
+        return start
+
+    def _diplomaticTail(self):
+        # ----- two groups of 3 digits, each of them at least 101 -----
+        start = self._newState()
+        state = start
+        for group in range(2):
+            one, ten, end = self._newState(), self._newState(), self._newState(accepting=group == 1)
+            any_tens, any_units = self._newState(), self._newState()
+
+            self.transitions[state].append((frozenset("1"), one))
+            self.transitions[one].append((frozenset("0"), ten))
+            self.transitions[ten].append((NONZERO_DIGITS, end))
+            self.transitions[one].append((NONZERO_DIGITS, any_units))
+            self.transitions[state].append((frozenset("23456789"), any_tens))
+            self.transitions[any_tens].append((DIGITS, any_units))
+            self.transitions[any_units].append((DIGITS, end))
+            state = end
+
+        return start
+
+
+class PlateCorrector:
+    """
+    Finds the valid plate closest to an OCR reading: a lowest-cost search over the plate automaton, where
+    the OCR confusions (0/O, 1/I, 8/B, 5/S, ...) and dropped characters have a cost, within a cost budget.
+    """
+
+    # ----- characters tesseract confuses on the plates, with the cost of swapping them -----
+    CONFUSIONS = {("0", "O"): 0.3, ("1", "I"): 0.3, ("8", "B"): 0.3, ("5", "S"): 0.3,
+                  ("2", "Z"): 0.5, ("6", "G"): 0.5, ("0", "D"): 0.5, ("0", "Q"): 0.5,
+                  ("4", "A"): 0.6, ("7", "T"): 0.6, ("1", "L"): 0.6, ("1", "T"): 0.6}
+
+    def __init__(self, validator, max_cost=1.0, deletion_cost=0.8, cache_size=1024):
+        """
+        Initializes the corrector and builds the plate automaton.
+
+        Args:
+            validator (RomanianLicensePlateValidator): Validator whose prefixes and rules are used.
+            max_cost (float, optional): Cost budget of the corrections (no plate is returned above it).
+            deletion_cost (float, optional): Cost of dropping a character read by mistake (plate border, dirt).
+            cache_size (int, optional): Number of corrected readings remembered (the same reading comes
+                                        back on consecutive frames).
+        """
+        self.validator = validator
+        self.max_cost = max_cost
+        self.deletion_cost = deletion_cost
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.grammar = PlateGrammar(validator.county_prefixes, validator.special_prefixes,
+                                    validator.diplomatic_prefixes)
+
+        self.substitutions = {}
+        for (first, second), cost in self.CONFUSIONS.items():
+            self.substitutions.setdefault(first, {})[second] = cost
+            self.substitutions.setdefault(second, {})[first] = cost
+
+    def _alternatives(self, reading):
+        """
+        :return: for every position of the reading, a dictionary {character: cost}
+        """
+        alternatives = []
+        for item in reading:
+            if isinstance(item, dict):
+                options = {character.upper(): cost for character, cost in item.items()}
+            else:
+                options = {item.upper(): 0.0}
+
+            # ----- the confusions of every option are also possible, at their own cost -----
+            for character, cost in list(options.items()):
+                for other, swap_cost in self.substitutions.get(character, {}).items():
+                    if cost + swap_cost < options.get(other, float("inf")):
+                        options[other] = cost + swap_cost
+            alternatives.append(options)
+
+        return alternatives
+
+    def _search(self, alternatives):
+        transitions = self.grammar.transitions
+        accepting = self.grammar.accepting
+        length = len(alternatives)
+
+        heap = [(0.0, "", 0, self.grammar.root)]
+        best_costs = {}
+        best = None
+
+        while heap:
+            cost, plate, position, state = heapq.heappop(heap)
+            if best is not None and cost > best[1] + 1e-9:
+                break
+
+            if position == length and state in accepting:
+                # ----- two different plates at the same lowest cost: the reading is ambiguous -----
+                if best is not None and plate != best[0]:
+                    return None, None
+                best = (plate, cost)
+                continue
+
+            # ----- a state is expanded for its lowest cost, by at most two different plates (enough to see a tie) -----
+            key = (position, state)
+            seen = best_costs.get(key)
+            if seen is not None:
+                seen_cost, seen_plate, seen_count = seen
+                if cost > seen_cost + 1e-9 or seen_count >= 2 or plate == seen_plate:
+                    continue
+                best_costs[key] = (seen_cost, seen_plate, seen_count + 1)
+            else:
+                best_costs[key] = (cost, plate, 1)
+
+            if position == length:
+                continue
+
+            # ----- dropping the character of the reading -----
+            if cost + self.deletion_cost <= self.max_cost:
+                heapq.heappush(heap, (cost + self.deletion_cost, plate, position + 1, state))
+
+            # ----- reading it as one of its alternatives allowed by the grammar -----
+            for character, character_cost in alternatives[position].items():
+                if cost + character_cost > self.max_cost:
+                    continue
+                for characters, target in transitions[state]:
+                    if character in characters:
+                        heapq.heappush(heap, (cost + character_cost, plate + character, position + 1, target))
+
+        return best if best is not None else (None, None)
+
+    def correctPlate(self, reading):
+        """
+        This function finds the lowest-cost valid plate for an OCR reading.
+            :param reading: the text read by the OCR, or a list with, for every position, a character or
+                            a dictionary {character: cost} of its alternatives (e.g. tesseract choices)
+        :return: the valid plate and the cost of the corrections (0 for a valid reading),
+                 or None, None if no plate fits in the budget or two plates fit equally well
+        """
+        if isinstance(reading, str):
+            reading = "".join(reading.split()).upper()
+            if self.validator.verifyPlateFormat(reading):
+                return reading, 0.0
+
+            with self.lock:
+                cached = self.cache.get(reading)
+                if cached is not None:
+                    self.cache.move_to_end(reading)
+                    return cached
+
+            result = self._search(self._alternatives(reading))
+            with self.lock:
+                self.cache[reading] = result
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+            return result
+
+        return self._search(self._alternatives(reading))
+
+    def correctText(self, text):
+        """
+        This function corrects an OCR reading when a valid plate is close enough.
+            :param text: the text read by the OCR
+        :return: the corrected plate, or the text unchanged
+        """
+        if not text:
+            return text
+
+        plate, _ = self.correctPlate(text)
+        return plate if plate is not None else text
@@ -1,16 +1,112 @@
+import asyncio
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errors
+import csv
 import datetime
+import itertools
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import os # Import the os module to access environment variables
 from dotenv import load_dotenv # Import load_dotenv
 
+# ----- the hot queries, kept as constants so every pooled connection prepares them once -----
+QUERY_VERIFY = "SELECT vehicle_id, plate_number, added_at, is_authorized FROM vehicles WHERE plate_number = %s"
+QUERY_INSERT = "INSERT INTO vehicles (plate_number, added_at, is_authorized) VALUES (%s, %s, %s)"
+# ----- relies on UNIQUE(plate_number): a new plate is inserted, a known one gets the new authorization -----
+QUERY_UPSERT = QUERY_INSERT + " ON DUPLICATE KEY UPDATE is_authorized = VALUES(is_authorized)"
+QUERY_VERIFY_MANY = ("SELECT vehicle_id, plate_number, added_at, is_authorized FROM vehicles "
+                     "WHERE plate_number IN ({})")
+QUERY_DELETE = "DELETE FROM vehicles WHERE plate_number = %s"
+QUERY_FETCH = ("SELECT vehicle_id, plate_number, added_at, is_authorized FROM vehicles "
+               "WHERE vehicle_id > %s ORDER BY vehicle_id")
+# ----- change feed of the vehicles (filled by the triggers of database-setup.sql), read by the in-memory copies -----
+QUERY_LAST_CHANGE = "SELECT COALESCE(MAX(change_id), 0) FROM vehicle_changes"
+QUERY_CHANGES = "SELECT change_id, plate_number FROM vehicle_changes WHERE change_id > %s ORDER BY change_id LIMIT %s"
+QUERY_INSERT_EVENT = ("INSERT INTO access_events (plate_number, event_time, direction, lane, decision, confidence) "
+                      "VALUES (%s, %s, %s, %s, %s, %s)")
+
+# ----- MySQL error returned when the UNIQUE(plate_number) constraint is violated -----
+ER_DUP_ENTRY = 1062
+
+
+def _vehicle_details(row):
+    return {
+        "vehicle_id": row[0],
+        "plate_number": row[1],
+        "added_at": row[2],
+        "is_authorized": bool(row[3]) # Convert tinyint(1) to Python boolean
+    }
+
+
+def _vehicle_rows(vehicles, added_at):
+    """
+    Converts plates, (plate, is_authorized) pairs or dictionaries into (plate_number, added_at, is_authorized) rows.
+    Raises a ValueError naming the first record that is not one of them.
+    """
+    rows = []
+    for index, vehicle in enumerate(vehicles):
+        try:
+            if isinstance(vehicle, str):
+                plate_number, is_authorized = vehicle, True
+            elif isinstance(vehicle, dict):
+                plate_number, is_authorized = vehicle["plate_number"], vehicle.get("is_authorized", True)
+            else:
+                plate_number, is_authorized = vehicle[0], vehicle[1] if len(vehicle) > 1 else True
+            plate_number = "".join(plate_number.split()).upper()
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid vehicle record #{index}: {vehicle!r}") from e
+
+        if plate_number:
+            rows.append((plate_number, added_at, bool(is_authorized)))
+    return rows
+
+
+class PooledConnection:
+    """
+    A connection of the pool, with its prepared statements (one prepared cursor per query).
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.statements = {}
+        self.last_used = time.monotonic()
+
+    def cursor(self, query, prepared=True):
+        if not prepared:
+            return self.connection.cursor(buffered=True)
+
+        cursor = self.statements.get(query)
+        if cursor is None:
+            cursor = self.statements[query] = self.connection.cursor(prepared=True)
+        return cursor
+
+    def close(self):
+        try:
+            for cursor in self.statements.values():
+                cursor.close()
+            self.connection.close()
+        except Error:
+            pass
+        self.statements.clear()
+
+
 class ParkingDatabaseManager:
     """
     Manages interactions with the team1_parking MySQL database.
     Provides methods to append, delete, and verify vehicle records.
+    The connections are kept in a bounded pool (health checked, reconnected when lost), so a lookup is
+    a single query round trip instead of a TCP + authentication handshake per call.
     """
 
-    def __init__(self, host, user, password, database):
+    # ----- statement of the upserts (the SQL dialect differs between the storage backends) -----
+    DIALECT = "mysql"
+    UPSERT_QUERY = QUERY_UPSERT
+
+    def __init__(self, host, user, password, database, pool_size=4, connect_timeout=5, pool_timeout=2.0,
+                 health_check_interval_s=30.0, use_prepared_statements=True):
         """
         Initializes the database manager with connection details.
 
@@ -19,48 +115,225 @@ class ParkingDatabaseManager:
             user (str): The database username.
             password (str): The password for the database user.
             database (str): The name of the database (e.g., 'team1_parking').
+            pool_size (int, optional): Maximum number of open connections. Defaults to 4.
+            connect_timeout (int, optional): Seconds to wait when opening a connection. Defaults to 5.
+            pool_timeout (float, optional): Seconds to wait for a free connection when all of them are in use.
+                                            Defaults to 2.0.
+            health_check_interval_s (float, optional): A connection idle for longer is pinged (and reconnected
+                                                       if needed) before being used. Defaults to 30.0.
+            use_prepared_statements (bool, optional): Prepare the queries once per connection. Defaults to True.
         """
         self.host = host
         self.user = user
         self.password = password
         self.database = database
-        self.connection = None
-        self.cursor = None
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.pool_timeout = pool_timeout
+        self.health_check_interval_s = health_check_interval_s
+        self.use_prepared_statements = use_prepared_statements
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._executor = None
+
+    def _open_connection(self):
+        """
+        Opens a new connection to the MySQL database.
+        Autocommit is enabled, so a long lived connection never reads from a stale transaction snapshot.
+        """
+        connection = mysql.connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            connection_timeout=self.connect_timeout,
+            autocommit=True
+        )
+        print(f"Successfully connected to MySQL database: {self.database}")
+        return PooledConnection(connection)
 
-    def _connect(self):
+    def _acquire(self):
         """
-        Establishes a connection to the MySQL database.
-        Returns the connection and cursor objects if successful, otherwise None.
+        Takes a connection from the pool (opening one if the pool is not full yet).
+        Raises a PoolError if no connection is free within pool_timeout.
         """
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise errors.PoolError(f"No free connection in the pool after {self.pool_timeout}s")
+
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database
-            )
-            if self.connection.is_connected():
-                self.cursor = self.connection.cursor(buffered=True)
-                print(f"Successfully connected to MySQL database: {self.database}")
-                return self.connection, self.cursor
-        except Error as e:
-            print(f"Error connecting to MySQL database: {e}")
-            return None, None
-        return None, None
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open_connection()
+
+            # ----- health check of the connections that stayed idle for a while -----
+            if time.monotonic() - pooled.last_used >= self.health_check_interval_s:
+                if not pooled.connection.is_connected():
+                    pooled.statements.clear()
+                    pooled.connection.reconnect(attempts=2, delay=0)
+            return pooled
+        except Error:
+            self._slots.release()
+            raise
+
+    def _release(self, pooled, broken=False):
+        """
+        Gives a connection back to the pool, or closes it if it is broken.
+        """
+        if broken:
+            pooled.close()
+        else:
+            pooled.last_used = time.monotonic()
+            self._idle.put(pooled)
+        self._slots.release()
+
+    def _execute(self, query, params=(), fetch=None, prepared=None):
+        """
+        Runs one statement on a pooled connection. A statement that fails because the connection was lost
+        is run once more on a new connection.
+
+        Args:
+            query (str): The SQL statement.
+            params (tuple, optional): The statement parameters.
+            fetch (str, optional): "one" or "all" to return the selected rows.
+            prepared (bool, optional): Prepare the statement (defaults to use_prepared_statements; the
+                                       statements built for one call only are not worth preparing).
+
+        Returns:
+            The selected row / rows, or the number of affected rows if fetch is None.
+        """
+        prepared = self.use_prepared_statements if prepared is None else prepared
+
+        for attempt in range(2):
+            pooled = self._acquire()
+            broken = False
+            try:
+                cursor = pooled.cursor(query, prepared=prepared)
+                cursor.execute(query, params)
+                if fetch:
+                    # ----- every row is read, so the next statement on the connection does not fail -----
+                    rows = cursor.fetchall()
+                    result = rows if fetch == "all" else (rows[0] if rows else None)
+                else:
+                    result = cursor.rowcount
+                if not prepared:
+                    cursor.close()
+                return result
+            except (errors.OperationalError, errors.InterfaceError):
+                broken = True
+                if attempt:
+                    raise
+                print("MySQL connection lost. Reconnecting...")
+            except Error:
+                raise
+            except BaseException:
+                # ----- interrupted outside of the connector, the state of the connection is unknown -----
+                broken = True
+                raise
+            finally:
+                self._release(pooled, broken=broken)
 
-    def _disconnect(self):
+    def _execute_batches(self, query, rows, batch_size):
         """
-        Closes the database cursor and connection.
+        Runs a statement for many rows, with one executemany() per batch, in a single transaction
+        (rolled back if any batch fails).
+
+        Returns:
+            int: The number of rows sent.
+        """
+        return self._execute_transaction([(query, rows)], batch_size)
+
+    def _execute_transaction(self, operations, batch_size):
         """
+        Runs several statements, each of them for many rows, in a single transaction (rolled back if any
+        statement fails).
+
+        Args:
+            operations (list): (query, rows) pairs, run in order.
+            batch_size (int): Number of rows sent per executemany().
+
+        Returns:
+            int: The number of rows sent.
+        """
+        pooled = self._acquire()
+        broken = False
         try:
-            if self.cursor:
-                self.cursor.close()
-                print("MySQL cursor closed.")
-            if self.connection and self.connection.is_connected():
-                self.connection.close()
-                print("MySQL connection closed.")
-        except Error as e:
-            print(f"Error closing MySQL connection: {e}")
+            cursor = pooled.connection.cursor()
+            pooled.connection.start_transaction()
+
+            count = 0
+            for query, rows in operations:
+                rows = iter(rows)
+                while True:
+                    batch = list(itertools.islice(rows, batch_size))
+                    if not batch:
+                        break
+                    # ----- the plain cursor sends an INSERT batch as one multi-row statement -----
+                    cursor.executemany(query, batch)
+                    count += len(batch)
+
+            pooled.connection.commit()
+            cursor.close()
+            return count
+        except (errors.OperationalError, errors.InterfaceError):
+            broken = True
+            raise
+        except BaseException:
+            # ----- any failure (database, or the rows given by the caller) rolls the transaction back -----
+            try:
+                pooled.connection.rollback()
+            except Error:
+                broken = True
+            raise
+        finally:
+            self._release(pooled, broken=broken)
+
+    def run_query(self, query, params=()):
+        """
+        Runs a SELECT statement built outside of the manager (e.g. by the analytics module).
+
+        Args:
+            query (str): The SQL statement, with %s placeholders.
+            params (tuple, optional): The statement parameters.
+
+        Returns:
+            list: The selected rows.
+
+        Raises:
+            mysql.connector.Error: If the database could not be queried.
+        """
+        return self._execute(query, params, fetch="all")
+
+    def run_transaction(self, operations, batch_size=500):
+        """
+        Runs statements built outside of the manager in a single transaction.
+
+        Args:
+            operations (list): (query, rows) pairs, every query being run for each of its rows.
+            batch_size (int, optional): Number of rows sent per statement. Defaults to 500.
+
+        Returns:
+            int: The number of rows sent.
+
+        Raises:
+            mysql.connector.Error: If the transaction failed (nothing is written).
+        """
+        return self._execute_transaction(operations, batch_size)
+
+    def close(self):
+        """
+        Closes the idle connections of the pool.
+        """
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        print("MySQL connections closed.")
 
     def append_to_database(self, plate_number, is_authorized=True):
         """
@@ -74,34 +347,23 @@ class ParkingDatabaseManager:
         Returns:
             bool: True if the record was successfully added, False otherwise.
         """
-        connection, cursor = self._connect()
-        if not connection:
-            return False
-
         try:
-            # Check if plate number already exists to prevent duplicates
-            query_check = "SELECT vehicle_id FROM vehicles WHERE plate_number = %s"
-            cursor.execute(query_check, (plate_number,))
-            if cursor.fetchone():
-                print(f"Error: Vehicle with plate number '{plate_number}' already exists.")
-                return False
-
-            query_insert = """
-            INSERT INTO vehicles (plate_number, added_at, is_authorized)
-            VALUES (%s, %s, %s)
-            """
             # Use datetime.datetime.now() to get the current timestamp
             # which matches the DATETIME format in MySQL
             current_time = datetime.datetime.now()
-            cursor.execute(query_insert, (plate_number, current_time, is_authorized))
-            connection.commit()
+            # The UNIQUE(plate_number) constraint prevents duplicates, no separate existence check is needed
+            self._execute(QUERY_INSERT, (plate_number, current_time, is_authorized))
             print(f"Successfully added vehicle: Plate='{plate_number}', Authorized={is_authorized}")
             return True
+        except errors.IntegrityError as e:
+            if e.errno != ER_DUP_ENTRY:
+                print(f"Error appending vehicle to database: {e}")
+                return False
+            print(f"Error: Vehicle with plate number '{plate_number}' already exists.")
+            return False
         except Error as e:
             print(f"Error appending vehicle to database: {e}")
             return False
-        finally:
-            self._disconnect()
 
     def delete_from_database(self, plate_number):
         """
@@ -113,15 +375,8 @@ class ParkingDatabaseManager:
         Returns:
             bool: True if the record was successfully deleted, False otherwise.
         """
-        connection, cursor = self._connect()
-        if not connection:
-            return False
-
         try:
-            query_delete = "DELETE FROM vehicles WHERE plate_number = %s"
-            cursor.execute(query_delete, (plate_number,))
-            connection.commit()
-            if cursor.rowcount > 0:
+            if self._execute(QUERY_DELETE, (plate_number,)) > 0:
                 print(f"Successfully deleted vehicle with plate number: '{plate_number}'")
                 return True
             else:
@@ -130,8 +385,24 @@ class ParkingDatabaseManager:
         except Error as e:
             print(f"Error deleting vehicle from database: {e}")
             return False
-        finally:
-            self._disconnect()
+
+    def find_vehicle(self, plate_number):
+        """
+        Looks a plate number up in the 'vehicles' table. Unlike verify_from_database, the database errors
+        are raised, so a caller can tell a missing plate from an unreachable database.
+
+        Args:
+            plate_number (str): The plate number to look up.
+
+        Returns:
+            dict or None: The vehicle details (vehicle_id, plate_number, added_at, is_authorized),
+                          or None if the plate is not registered.
+
+        Raises:
+            mysql.connector.Error: If the database could not be queried.
+        """
+        result = self._execute(QUERY_VERIFY, (plate_number,), fetch="one")
+        return _vehicle_details(result) if result else None
 
     def verify_from_database(self, plate_number):
         """
@@ -146,22 +417,10 @@ class ParkingDatabaseManager:
                           (vehicle_id, plate_number, added_at, is_authorized)
                           if found, otherwise None.
         """
-        connection, cursor = self._connect()
-        if not connection:
-            return None
-
         try:
-            query_select = "SELECT vehicle_id, plate_number, added_at, is_authorized FROM vehicles WHERE plate_number = %s"
-            cursor.execute(query_select, (plate_number,))
-            result = cursor.fetchone()
-
-            if result:
-                vehicle_details = {
-                    "vehicle_id": result[0],
-                    "plate_number": result[1],
-                    "added_at": result[2],
-                    "is_authorized": bool(result[3]) # Convert tinyint(1) to Python boolean
-                }
+            vehicle_details = self.find_vehicle(plate_number)
+
+            if vehicle_details:
                 print(f"Vehicle found: {vehicle_details}")
                 return vehicle_details
             else:
@@ -170,8 +429,248 @@ class ParkingDatabaseManager:
         except Error as e:
             print(f"Error verifying vehicle from database: {e}")
             return None
-        finally:
-            self._disconnect()
+
+    def fetch_vehicles(self, after_vehicle_id=0):
+        """
+        Fetches the vehicle records of the 'vehicles' table, in insertion order.
+
+        Args:
+            after_vehicle_id (int, optional): Only the records with a greater vehicle_id are returned
+                                              (incremental refresh of an in-memory copy).
+                                              Defaults to 0 (all the records).
+
+        Returns:
+            list or None: A list of dictionaries (vehicle_id, plate_number, added_at, is_authorized),
+                          or None if the database could not be queried.
+        """
+        try:
+            return [_vehicle_details(row) for row in self._execute(QUERY_FETCH, (after_vehicle_id,), fetch="all")]
+        except Error as e:
+            print(f"Error fetching vehicles from database: {e}")
+            return None
+
+    def last_vehicle_change(self):
+        """
+        Reads the id of the last change of the 'vehicles' table (taken before a full snapshot, the changes made
+        during the snapshot are then read again by the next incremental refresh).
+
+        Returns:
+            int: The last change_id of the 'vehicle_changes' table (0 if empty).
+
+        Raises:
+            mysql.connector.Error: If the database could not be queried.
+        """
+        return self._execute(QUERY_LAST_CHANGE, fetch="one")[0]
+
+    def fetch_vehicle_changes(self, after_change_id=0, limit=10000):
+        """
+        Fetches the current records of the plates inserted, updated or deleted since a change of the feed.
+
+        Args:
+            after_change_id (int, optional): Only the changes with a greater change_id are read.
+            limit (int, optional): Maximum number of changes read per query. Defaults to 10000.
+
+        Returns:
+            tuple or None: (last change_id read, dictionary of the changed plates mapped to their vehicle details,
+                           or to None if they were deleted), or None if the database could not be queried.
+        """
+        changed = {}
+        try:
+            while True:
+                rows = self._execute(QUERY_CHANGES, (after_change_id, limit), fetch="all")
+                for change_id, plate_number in rows:
+                    changed[plate_number] = None
+                    after_change_id = change_id
+                if len(rows) < limit:
+                    break
+            if changed:
+                changed = self.find_vehicles(changed)
+        except Error as e:
+            print(f"Error fetching vehicle changes from database: {e}")
+            return None
+
+        return after_change_id, changed
+
+    def upsert_vehicle(self, plate_number, is_authorized=True):
+        """
+        Adds a vehicle record, or updates the authorization of an existing one, in a single statement.
+
+        Args:
+            plate_number (str): The plate number of the vehicle.
+            is_authorized (bool, optional): Whether the vehicle is authorized. Defaults to True.
+
+        Returns:
+            bool: True if the record was added or updated, False otherwise.
+        """
+        try:
+            self._execute(self.UPSERT_QUERY, (plate_number, datetime.datetime.now(), is_authorized))
+            print(f"Successfully upserted vehicle: Plate='{plate_number}', Authorized={is_authorized}")
+            return True
+        except Error as e:
+            print(f"Error upserting vehicle to database: {e}")
+            return False
+
+    def import_vehicles(self, vehicles, batch_size=500):
+        """
+        Adds (or updates) many vehicle records in one transaction, sent in batches.
+
+        Args:
+            vehicles (iterable): Plate numbers, (plate_number, is_authorized) pairs or dictionaries
+                                 with a plate_number and an optional is_authorized.
+            batch_size (int, optional): Number of records sent per statement. Defaults to 500.
+
+        Returns:
+            int or None: The number of records imported, or None if the import failed (nothing is imported).
+        """
+        # ----- the records are validated before the transaction is opened -----
+        try:
+            rows = _vehicle_rows(vehicles, datetime.datetime.now())
+        except ValueError as e:
+            print(f"Error importing vehicles to database: {e}")
+            return None
+
+        try:
+            count = self._execute_batches(self.UPSERT_QUERY, rows, batch_size)
+            print(f"Successfully imported {count} vehicles.")
+            return count
+        except Error as e:
+            print(f"Error importing vehicles to database: {e}")
+            return None
+
+    def import_vehicles_csv(self, path, batch_size=500):
+        """
+        Imports the vehicle records of a CSV file: one plate per line, optionally followed by its authorization
+        (1/0, true/false, yes/no); a first line starting with "plate" is a header.
+
+        Args:
+            path (str): The CSV file.
+            batch_size (int, optional): Number of records sent per statement. Defaults to 500.
+
+        Returns:
+            int or None: The number of records imported, or None if the import failed.
+        """
+        def read_rows(file):
+            for index, row in enumerate(csv.reader(file)):
+                if not row or not row[0].strip() or index == 0 and row[0].strip().lower().startswith("plate"):
+                    continue
+                is_authorized = len(row) < 2 or row[1].strip().lower() not in ("0", "false", "no", "n")
+                yield row[0], is_authorized
+
+        with open(path, newline="") as file:
+            return self.import_vehicles(read_rows(file), batch_size=batch_size)
+
+    def delete_vehicles(self, plate_numbers, batch_size=500):
+        """
+        Deletes many vehicle records in one transaction.
+
+        Args:
+            plate_numbers (iterable): The plate numbers to delete.
+            batch_size (int, optional): Number of records sent per statement. Defaults to 500.
+
+        Returns:
+            int or None: The number of plates sent, or None if the database could not be written
+                         (nothing is deleted).
+        """
+        try:
+            return self._execute_batches(QUERY_DELETE, ((plate_number,) for plate_number in plate_numbers), batch_size)
+        except Error as e:
+            print(f"Error deleting vehicles from database: {e}")
+            return None
+
+    def append_events(self, events, batch_size=500):
+        """
+        Appends access events to the 'access_events' table, in one transaction.
+
+        Args:
+            events (iterable): (plate_number, event_time, direction, lane, decision, confidence) tuples.
+            batch_size (int, optional): Number of events sent per statement. Defaults to 500.
+
+        Returns:
+            int or None: The number of events written, or None if the database could not be written
+                         (nothing is written).
+        """
+        try:
+            return self._execute_batches(QUERY_INSERT_EVENT, events, batch_size)
+        except Error as e:
+            print(f"Error appending access events to database: {e}")
+            return None
+
+    def find_vehicles(self, plate_numbers, chunk_size=1000):
+        """
+        Looks many plate numbers up with one IN (...) query (per chunk_size plates). The database errors are raised.
+
+        Args:
+            plate_numbers (iterable): The plate numbers to look up.
+            chunk_size (int, optional): Maximum number of plates per query. Defaults to 1000.
+
+        Returns:
+            dict: The plate numbers mapped to their vehicle details, or to None if not registered.
+
+        Raises:
+            mysql.connector.Error: If the database could not be queried.
+        """
+        plate_numbers = list(dict.fromkeys(plate_numbers))
+        vehicles = dict.fromkeys(plate_numbers)
+
+        for start in range(0, len(plate_numbers), chunk_size):
+            chunk = plate_numbers[start:start + chunk_size]
+            query = QUERY_VERIFY_MANY.format(", ".join(["%s"] * len(chunk)))
+            for row in self._execute(query, tuple(chunk), fetch="all", prepared=False):
+                vehicles[row[1]] = _vehicle_details(row)
+
+        return vehicles
+
+    def verify_many(self, plate_numbers):
+        """
+        Verifies many plate numbers at once.
+
+        Args:
+            plate_numbers (iterable): The plate numbers to verify.
+
+        Returns:
+            dict or None: The plate numbers mapped to their vehicle details (None if not found),
+                          or None if the database could not be queried.
+        """
+        try:
+            return self.find_vehicles(plate_numbers)
+        except Error as e:
+            print(f"Error verifying vehicles from database: {e}")
+            return None
+
+    # ----- asyncio variants: the queries run on the pool from as many threads as it has connections -----
+
+    async def run_async(self, function, *args):
+        """
+        Runs a blocking method of the manager without blocking the event loop.
+
+        Args:
+            function (callable): The method to run.
+            *args: Its arguments.
+
+        Returns:
+            The result of the method.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="mysql")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def verify_async(self, plate_number):
+        """
+        Asynchronous version of verify_from_database.
+        """
+        return await self.run_async(self.verify_from_database, plate_number)
+
+    async def append_async(self, plate_number, is_authorized=True):
+        """
+        Asynchronous version of append_to_database.
+        """
+        return await self.run_async(self.append_to_database, plate_number, is_authorized)
+
+    async def delete_async(self, plate_number):
+        """
+        Asynchronous version of delete_from_database.
+        """
+        return await self.run_async(self.delete_from_database, plate_number)
 
 # --- Example Usage ---
 if __name__ == "__main__":
@@ -191,8 +690,14 @@ if __name__ == "__main__":
     else:
         db_manager = ParkingDatabaseManager(DB_HOST, DB_USER, DB_PASSWORD, DB_NAME)
 
-        print("\n--- Appending a new vehicle ---")
-        db_manager.append_to_database("MAI12346", is_authorized=True)
+        if len(sys.argv) > 1:
+            # ----- python src/database.py residents.csv imports the plates of a CSV file -----
+            print(f"\n--- Importing the vehicles of {sys.argv[1]} ---")
+            db_manager.import_vehicles_csv(sys.argv[1])
+        else:
+            print("\n--- Appending a new vehicle ---")
+            db_manager.append_to_database("MAI12346", is_authorized=True)
+        db_manager.close()
         # db_manager.append_to_database("XYZ-789", is_authorized=False)
         # db_manager.append_to_database("LMN-456") # Defaults to is_authorized=True
         #
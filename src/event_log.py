@@ -0,0 +1,214 @@
+import datetime
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class AccessEventLog:
+    """
+    Write-behind log of the gate decisions (access_events table).
+    The stream only appends the events to an in-memory queue; a background thread writes them in batches,
+    when batch_size events are waiting or every flush_interval_s. The batches that cannot be written
+    (database unreachable) are appended to a local spill file, replayed once the database is back.
+    """
+
+    def __init__(self, db_manager, spill_path="access_events.spill", batch_size=100, flush_interval_s=2.0,
+                 retry_interval_s=10.0, max_queue=10000):
+        """
+        Initializes the event log and starts its writer thread.
+
+        Args:
+            db_manager (ParkingDatabaseManager): Database where the events are written (append_events).
+            spill_path (str, optional): Append-only file (JSON lines) of the events not written yet.
+            batch_size (int, optional): Number of waiting events that triggers a write.
+            flush_interval_s (float, optional): Maximum time an event waits before being written.
+            retry_interval_s (float, optional): After a failed write, time during which the batches go
+                                                straight to the spill file (no connection attempt per batch).
+            max_queue (int, optional): Maximum number of waiting events (the oldest ones are dropped).
+        """
+        self.db_manager = db_manager
+        self.spill_path = spill_path
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.retry_interval_s = retry_interval_s
+
+        self.queue = deque(maxlen=max_queue)
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.retry_at = 0.0
+
+        self.logged = 0
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.quarantined = 0
+
+        self.thread = threading.Thread(target=self._run, name="access-event-log", daemon=True)
+        self.thread.start()
+
+    def log(self, plate_number, decision, direction="entry", lane="entry", confidence=None, event_time=None):
+        """
+        This function queues an access event. It never blocks nor touches the database.
+            :param plate_number: the decided plate
+            :param decision: "granted", "added" or "denied"
+            :param direction: "entry" or "exit"
+            :param lane: name of the lane / gate
+            :param confidence: OCR confidence of the plate, None if unknown
+            :param event_time: time of the decision (defaults to now)
+        """
+        event = (plate_number, event_time or datetime.datetime.now(), direction, lane, decision, confidence)
+
+        with self.lock:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(event)
+            self.logged += 1
+            full = len(self.queue) >= self.batch_size
+
+        if full:
+            self.wakeup.set()
+
+    def _takeBatch(self):
+        with self.lock:
+            return [self.queue.popleft() for _ in range(min(len(self.queue), self.batch_size))]
+
+    @staticmethod
+    def _spillLine(event):
+        plate_number, event_time, direction, lane, decision, confidence = event
+        return json.dumps([plate_number, event_time.isoformat(), direction, lane, decision, confidence]) + "\n"
+
+    def _spill(self, events):
+        # ----- a line cut by a crash is terminated, so the new events are not glued to it -----
+        if os.path.exists(self.spill_path) and os.path.getsize(self.spill_path):
+            with open(self.spill_path, "rb") as file:
+                file.seek(-1, os.SEEK_END)
+                cut = file.read(1) != b"\n"
+        else:
+            cut = False
+
+        with open(self.spill_path, "a") as file:
+            if cut:
+                file.write("\n")
+            file.writelines(self._spillLine(event) for event in events)
+            file.flush()
+            os.fsync(file.fileno())
+        self.spilled += len(events)
+
+    def _readSpill(self):
+        """
+        Reads the spilled events; the lines that cannot be parsed are moved to <spill_path>.corrupt.
+        """
+        events = []
+        corrupt = []
+        with open(self.spill_path) as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    plate_number, event_time, direction, lane, decision, confidence = json.loads(line)
+                    events.append((plate_number, datetime.datetime.fromisoformat(event_time), direction, lane,
+                                   decision, confidence))
+                except (ValueError, TypeError):
+                    corrupt.append(line if line.endswith("\n") else line + "\n")
+
+        if corrupt:
+            with open(self.spill_path + ".corrupt", "a") as file:
+                file.writelines(corrupt)
+            # ----- the spill file keeps only the readable events, in case the replay fails -----
+            self._rewriteSpill(events)
+            self.quarantined += len(corrupt)
+            print(f"[EventLog] Moved {len(corrupt)} unreadable spilled events to {self.spill_path}.corrupt")
+        return events
+
+    def _rewriteSpill(self, events):
+        temporary_path = self.spill_path + ".tmp"
+        with open(temporary_path, "w") as file:
+            file.writelines(self._spillLine(event) for event in events)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.spill_path)
+
+    def _replaySpill(self):
+        """
+        Writes the spilled events in one transaction; the file is removed only when all of them are written.
+        """
+        count = self.db_manager.append_events(self._readSpill())
+        if count is None:
+            return False
+
+        os.remove(self.spill_path)
+        self.replayed += count
+        print(f"[EventLog] Replayed {count} spilled access events.")
+        return True
+
+    def _write(self, events):
+        # ----- the database failed recently: the events go to the spill file without waiting on a connection -----
+        if time.monotonic() < self.retry_at:
+            self._spill(events)
+            return
+
+        try:
+            written = ((not os.path.exists(self.spill_path) or self._replaySpill())
+                       and self.db_manager.append_events(events) is not None)
+        except Exception as e:
+            print(f"[ERROR] Could not write the access events: {e}")
+            written = False
+
+        if written:
+            self.written += len(events)
+            return
+
+        # ----- whatever failed, the batch is kept in the spill file -----
+        self.retry_at = time.monotonic() + self.retry_interval_s
+        print(f"[EventLog] Database unreachable, spilling the access events to {self.spill_path}")
+        self._spill(events)
+
+    def flush(self):
+        """
+        This function writes all the waiting events (from the writer thread, or when the stream stops).
+        """
+        while True:
+            events = self._takeBatch()
+            if not events:
+                break
+            try:
+                self._write(events)
+            except Exception as e:
+                print(f"[ERROR] Could not spill the access events: {e}")
+
+        # ----- the spilled events are replayed even when no new event comes -----
+        if time.monotonic() >= self.retry_at and os.path.exists(self.spill_path):
+            try:
+                if not self._replaySpill():
+                    self.retry_at = time.monotonic() + self.retry_interval_s
+            except Exception as e:
+                print(f"[ERROR] Could not replay the access events: {e}")
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            self.wakeup.wait(self.flush_interval_s)
+            self.wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """
+        This function stops the writer thread and writes (or spills) the waiting events.
+        """
+        self.stop_event.set()
+        self.wakeup.set()
+        self.thread.join()
+        self.retry_at = 0.0
+        self.flush()
+
+    def stats(self):
+        """
+        :return: dictionary with the number of logged, written, spilled, replayed, dropped, quarantined and waiting events
+        """
+        with self.lock:
+            return {"logged": self.logged, "written": self.written, "spilled": self.spilled,
+                    "replayed": self.replayed, "dropped": self.dropped, "quarantined": self.quarantined,
+                    "waiting": len(self.queue)}
@@ -0,0 +1,110 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncLaneRunner:
+    """
+    Runs the streams of several lanes (e.g. the entry and the exit gate) on one asyncio event loop.
+    For every lane, the next frame is captured while the current one is recognized (both in a shared
+    executor, the OpenCV / tesseract calls release the GIL), and the decisions are handled as tasks, so the
+    database and serial round trips of one lane never stall the frames of the other.
+    """
+
+    def __init__(self, streams, workers=None):
+        """
+        Initializes the runner.
+
+        Args:
+            streams (list): PiCamera2Stream of every lane (their preview windows are not used).
+            workers (int, optional): Threads running the capture and the recognition (default: 2 per lane).
+        """
+        self.streams = streams
+        self.workers = workers or 2 * len(streams)
+        self.executor = None
+        self.stop_event = None
+
+    async def _handleDecisions(self, stream, plates, pending):
+        for plate in plates:
+            task = asyncio.create_task(stream._handle_plate_text_async(plate))
+            pending.add(task)
+            task.add_done_callback(functools.partial(self._decisionDone, stream, plate, pending))
+
+    def _decisionDone(self, stream, plate, pending, task):
+        """
+        This function forgets a finished decision task and reports its failure (database, serial port),
+        which would otherwise only surface as a "Task exception was never retrieved" warning.
+        """
+        pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[Lane {stream.lane}] The decision for plate '{plate}' failed: {task.exception()!r}")
+
+    async def _runLane(self, stream):
+        loop = asyncio.get_running_loop()
+        pending = set()
+        frame_count = 0
+        processed_count = 0
+        started_at = time.perf_counter()
+
+        next_frame = loop.run_in_executor(self.executor, stream._capture_frame)
+        try:
+            while not self.stop_event.is_set():
+                frame = await next_frame
+                if frame is None:
+                    break
+                # ----- the next frame is captured while this one is recognized -----
+                next_frame = loop.run_in_executor(self.executor, stream._capture_frame)
+                frame_count += 1
+
+                if not stream.motion_gate or stream.motion_gate.shouldProcess(frame):
+                    _, reading = await loop.run_in_executor(self.executor, stream._recognize_frame, frame)
+                    processed_count += 1
+                elif stream.decision_engine:
+                    reading = None
+                else:
+                    continue
+
+                await self._handleDecisions(stream, stream._collect_decisions(reading), pending)
+        finally:
+            # ----- the capture started ahead is waited for (its frame is dropped), the source is released next -----
+            await asyncio.gather(next_frame, return_exceptions=True)
+
+        # ----- deciding the passages still open, then waiting for the decisions in flight (failures already reported) -----
+        if stream.decision_engine:
+            await self._handleDecisions(stream, stream.decision_engine.flush(), pending)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        elapsed = time.perf_counter() - started_at
+        print(f"[Lane {stream.lane}] {frame_count} frames ({processed_count} recognized) in {elapsed:.1f}s, "
+              f"{frame_count / elapsed if elapsed else 0.0:.1f} fps")
+
+    async def run(self):
+        """
+        This function runs all the lanes until their sources end or stop() is called, then cleans them up.
+        """
+        self.stop_event = asyncio.Event()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="lane")
+        try:
+            await asyncio.gather(*(self._runLane(stream) for stream in self.streams))
+        finally:
+            self.executor.shutdown(wait=True)
+            for stream in self.streams:
+                stream.cleanup()
+
+    def stop(self):
+        """
+        This function stops the lanes after their current frame (to be called from the event loop).
+        """
+        if self.stop_event:
+            self.stop_event.set()
+
+    def start(self):
+        """
+        This function runs the lanes in a new event loop (Ctrl+C stops them).
+        """
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            print("[Lanes] Stopped.")
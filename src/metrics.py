@@ -0,0 +1,173 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ----- histogram buckets of the stage durations, in seconds (bilateral filter ~10 ms, tesseract ~100 ms on a Pi) -----
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+METRIC_PREFIX = "plate_recognizer"
+
+COUNTER_HELP = {
+    "frames_total": "Frames that went through the plate localization.",
+    "plates_found_total": "Frames where a plate contour was found.",
+    "no_contour_total": "Frames where no plate contour was found.",
+    "coarse_fallback_total": "Frames where no coarse candidate passed and the full-frame pass ran again.",
+    "ocr_reads_total": "Plate regions read by the OCR (cache hits included).",
+    "empty_text_total": "OCR reads that returned an empty text.",
+    "ocr_passes_total": "Tesseract passes run by the OCR cascade.",
+}
+
+
+class StageHistogram:
+    """
+    Cumulative histogram of the durations of one stage (Prometheus style buckets).
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+
+
+class RecognizerMetrics:
+    """
+    Stage duration histograms and counters of the NumberPlateRecognizer.
+    The recognizer only calls it when it is given one, so there is no cost when metrics are disabled.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initializes the metrics.
+
+        Args:
+            buckets (tuple, optional): Upper bounds of the histogram buckets, in seconds.
+        """
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+        self.counters = {name: 0 for name in COUNTER_HELP}
+        self.lock = threading.Lock()
+        self.server = None
+        self.export_stops = []
+
+    def observeStage(self, stage, elapsed_ms):
+        """
+        This function records the duration of a stage.
+            :param stage: stage name (preprocess, contour, extract, clean, ocr)
+            :param elapsed_ms: duration in milliseconds
+        """
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = StageHistogram(self.buckets)
+            histogram.observe(elapsed_ms / 1000)
+
+    def increment(self, counter, value=1):
+        """
+        This function increments a counter.
+            :param counter: counter name (see COUNTER_HELP)
+            :param value: increment
+        """
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def renderPrometheus(self):
+        """
+        This function renders the metrics in the Prometheus text exposition format.
+        :return: the metrics as text
+        """
+        name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [f"# HELP {name} Duration of the recognition stages.", f"# TYPE {name} histogram"]
+
+        with self.lock:
+            for stage in sorted(self.histograms):
+                histogram = self.histograms[stage]
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+
+            for counter in sorted(self.counters):
+                counter_name = f"{METRIC_PREFIX}_{counter}"
+                lines.append(f"# HELP {counter_name} {COUNTER_HELP.get(counter, counter)}")
+                lines.append(f"# TYPE {counter_name} counter")
+                lines.append(f"{counter_name} {self.counters[counter]}")
+
+        return "\n".join(lines) + "\n"
+
+    def writeTextFile(self, path):
+        """
+        This function writes the metrics to a file (for the node_exporter textfile collector).
+        The file is replaced atomically, so the collector never reads a half written file.
+            :param path: output .prom file
+        """
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as file:
+            file.write(self.renderPrometheus())
+        os.replace(temporary_path, path)
+
+    def startTextFileExport(self, path, interval_s=15.0):
+        """
+        This function rewrites the metrics text file periodically, from a daemon thread.
+            :param path: output .prom file
+            :param interval_s: seconds between two writes
+        """
+        stop_event = threading.Event()
+
+        def export():
+            while not stop_event.wait(interval_s):
+                try:
+                    self.writeTextFile(path)
+                except OSError as e:
+                    print(f"[ERROR] Could not write the metrics file {path}: {e}")
+
+        threading.Thread(target=export, name="metrics-textfile", daemon=True).start()
+        self.export_stops.append(stop_event)
+        return stop_event
+
+    def serve(self, port=9108, host="0.0.0.0"):
+        """
+        This function starts a local HTTP endpoint serving the metrics on /metrics (daemon thread).
+            :param port: TCP port
+            :param host: interface to listen on
+        """
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = metrics.renderPrometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"[Metrics] Serving on http://{host}:{port}/metrics")
+
+    def shutdown(self):
+        for stop_event in self.export_stops:
+            stop_event.set()
+        self.export_stops = []
+        if self.server:
+            self.server.shutdown()
+            self.server = None
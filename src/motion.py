@@ -0,0 +1,97 @@
+import time
+
+import cv2
+
+
+class MotionGate:
+    """
+    Cheap change detector that decides if a frame is worth sending to the recognizer.
+    It keeps a running background of a small, blurred grayscale copy of the frames; when enough pixels
+    differ from the background the gate wakes up and lets the next frames through.
+    """
+
+    def __init__(self, sensitivity=0.01, pixel_threshold=25, wake_frames=30, cooldown_s=0.2,
+                 learning_rate=0.05, width=160):
+        """
+        Initializes the motion gate.
+
+        Args:
+            sensitivity (float, optional): Fraction of changed pixels that counts as motion.
+            pixel_threshold (int, optional): Gray level difference for a pixel to count as changed.
+            wake_frames (int, optional): Number of frames let through after the last motion.
+            cooldown_s (float, optional): While idle, minimum time between two motion checks
+                                          (the frames in between are skipped without any processing).
+            learning_rate (float, optional): Speed at which the background absorbs the changes
+                                             (a car that stays parked stops counting as motion).
+            width (int, optional): Width of the downscaled frame used for the detection.
+        """
+        self.sensitivity = sensitivity
+        self.pixel_threshold = pixel_threshold
+        self.wake_frames = wake_frames
+        self.cooldown_s = cooldown_s
+        self.learning_rate = learning_rate
+        self.width = width
+
+        self.background = None
+        self.remaining_wake_frames = 0
+        self.last_check = 0.0
+
+        # ----- counters used to check how much work the gate saves -----
+        self.frames_seen = 0
+        self.frames_processed = 0
+
+    def _smallGray(self, frame):
+        height = max(1, int(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        if len(small.shape) == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def detectMotion(self, frame):
+        """
+        This function compares the frame with the background and updates the background.
+            :param frame: input frame
+        :return: True if the changed fraction of the frame is above the sensitivity
+        """
+        gray = self._smallGray(frame)
+
+        # ----- the first frame (or a new frame size) only initialises the background, treat it as motion -----
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype("float32")
+            return True
+
+        difference = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        changed = cv2.countNonZero(cv2.threshold(difference, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+
+        return changed >= self.sensitivity * gray.size
+
+    def shouldProcess(self, frame):
+        """
+        This function decides if the frame must go through the recognition pipeline.
+            :param frame: input frame
+        :return: True while the gate is awake (motion in the last wake_frames frames)
+        """
+        self.frames_seen += 1
+
+        # ----- idle and still in the cooldown: skipping even the motion check -----
+        now = time.monotonic()
+        if self.remaining_wake_frames == 0 and now - self.last_check < self.cooldown_s:
+            return False
+        self.last_check = now
+
+        if self.detectMotion(frame):
+            self.remaining_wake_frames = self.wake_frames
+
+        if self.remaining_wake_frames == 0:
+            return False
+
+        self.remaining_wake_frames -= 1
+        self.frames_processed += 1
+        return True
+
+    def stats(self):
+        """
+        :return: dictionary with the number of frames seen and processed
+        """
+        return {"frames_seen": self.frames_seen, "frames_processed": self.frames_processed}
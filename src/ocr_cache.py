@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def normalizePlateRegion(image, size=(128, 32), blur_sigma=1.0):
+    """
+    This function brings a plate region to a fixed size and contrast before it is hashed, so the hash does not
+    depend on the size of the crop, and the sensor noise and the edges moved by a contour one pixel off are smoothed.
+        :param image: input image (grayscale or BGR)
+        :param size: (width, height) of the normalized region (the plate proportions)
+        :param blur_sigma: sigma of the gaussian blur (0 disables it)
+    :return: the normalized grayscale region
+    """
+    if len(image.shape) == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    normalized = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    if blur_sigma:
+        normalized = cv2.GaussianBlur(normalized, (0, 0), blur_sigma)
+    return cv2.equalizeHist(normalized)
+
+
+def aHash(image, hash_width=32, hash_height=16):
+    """
+    This function computes the average hash of an image: the image is reduced to a small grayscale thumbnail
+    and every bit tells if a pixel is brighter than the mean. Unlike a difference hash, the flat plate background
+    is far from the threshold, so the noise only flips the bits on the character edges.
+        :param image: input image (grayscale or BGR)
+        :param hash_width: number of bits per row (plates are wide, so more columns than rows)
+        :param hash_height: number of rows
+    :return: the hash as an integer of hash_width * hash_height bits
+    """
+    if len(image.shape) == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    thumbnail = cv2.resize(image, (hash_width, hash_height), interpolation=cv2.INTER_AREA)
+
+    bits = (thumbnail > thumbnail.mean()).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big") >> (-len(bits) % 8)
+
+
+class PlateOCRCache:
+    """
+    Cache of the OCR readings, keyed by the perceptual hash of the normalized plate region. A stationary car gives
+    nearly identical plate regions, so only the first one is sent to tesseract.
+    The entries can be scoped (e.g. to a tracker track id): a reading only answers the lookups of its own
+    scope, so the next car never gets the text of the previous one, even when their hashes are close.
+    Bounded size with LRU eviction, time-to-live on the entries, thread-safe.
+    """
+
+    def __init__(self, max_size=256, ttl_s=30.0, max_distance=0):
+        """
+        Initializes the cache.
+
+        Args:
+            max_size (int, optional): Maximum number of entries (the least recently used one is evicted).
+            ttl_s (float, optional): Lifetime of an entry in seconds (None keeps the entries forever).
+            max_distance (int, optional): Maximum number of different hash bits (out of 512) for two plate regions
+                                          of the same scope to be considered the same (0 only accepts identical
+                                          hashes). Plates differing by one character are only a few bits apart,
+                                          so near duplicates are only looked up inside a scope, never globally.
+        """
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.max_distance = max_distance
+
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def hashImage(self, image):
+        """
+        This function computes the cache key of a plate region.
+            :param image: the plate region
+        :return: the perceptual hash of the normalized plate region
+        """
+        return aHash(normalizePlateRegion(image))
+
+    def _isExpired(self, stored_at, now):
+        return self.ttl_s is not None and now - stored_at > self.ttl_s
+
+    def _findKey(self, key, scope, now):
+        if (scope, key) in self.entries:
+            return scope, key
+        if self.max_distance <= 0 or scope is None:
+            return None
+
+        # ----- near duplicate search inside the scope, the cache is small so a linear scan is cheap -----
+        best_key, best_distance = None, self.max_distance + 1
+        for (stored_scope, stored_key), (stored_at, _) in self.entries.items():
+            if stored_scope != scope or self._isExpired(stored_at, now):
+                continue
+            distance = bin(stored_key ^ key).count("1")
+            if distance < best_distance:
+                best_key, best_distance = (stored_scope, stored_key), distance
+
+        return best_key
+
+    def get(self, key, scope=None):
+        """
+        This function looks up the reading of a plate region.
+            :param key: the perceptual hash of the plate region
+            :param scope: the scope of the reading (e.g. the track id of the plate), None for the global one
+        :return: the cached value, or None on a miss
+        """
+        now = time.monotonic()
+        with self.lock:
+            found_key = self._findKey(key, scope, now)
+            if found_key is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = self.entries[found_key]
+            if self._isExpired(stored_at, now):
+                del self.entries[found_key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(found_key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, scope=None):
+        """
+        This function stores the reading of a plate region.
+            :param key: the perceptual hash of the plate region
+            :param value: the value to store (e.g. the text and the confidence)
+            :param scope: the scope of the reading (e.g. the track id of the plate), None for the global one
+        """
+        with self.lock:
+            self.entries[(scope, key)] = (time.monotonic(), value)
+            self.entries.move_to_end((scope, key))
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        :return: dictionary with the size of the cache and the hit / miss / eviction counters
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self.entries), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                    "evictions": self.evictions, "expirations": self.expirations}
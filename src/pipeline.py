@@ -0,0 +1,223 @@
+import queue
+import threading
+import time
+
+
+class DropOldestQueue:
+    """
+    Bounded queue that never blocks the producer: when it is full, the oldest item is dropped.
+    Used between the stages of the stream, so a slow stage loses old frames instead of stalling the camera.
+    """
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item):
+        with self.lock:
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout=None):
+        return self.queue.get(timeout=timeout)
+
+    def qsize(self):
+        return self.queue.qsize()
+
+
+class StageStats:
+    """
+    Thread-safe latency statistics of one stage.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.last_s = 0.0
+
+    def record(self, elapsed_s):
+        with self.lock:
+            self.count += 1
+            self.total_s += elapsed_s
+            self.max_s = max(self.max_s, elapsed_s)
+            self.last_s = elapsed_s
+
+    def summary(self):
+        with self.lock:
+            mean_ms = self.total_s / self.count * 1000 if self.count else 0.0
+            return {"count": self.count, "mean_ms": round(mean_ms, 2),
+                    "max_ms": round(self.max_s * 1000, 2), "last_ms": round(self.last_s * 1000, 2)}
+
+
+class StreamPipeline:
+    """
+    Runs the stream as stages connected by bounded drop-oldest queues:
+    capture -> detection worker(s) -> OCR worker(s) -> decision.
+
+    Every stage is a function working on a dictionary item (frame id, capture time, frame, ...):
+        capture_fn()        returns a new frame, or None when the source is exhausted / failed
+                            (the frames already captured still go through the stages, then the pipeline stops)
+        accept_fn(frame)    optional filter run in the capture thread (e.g. the motion gate)
+        detect_fn(item)     adds the detection to the item, returns False to drop it (no plate)
+        ocr_fn(item)        adds the text to the item, returns False to drop it
+        decide_fn(item)     acts on the item (validation, database, serial)
+        idle_fn()           optional, run by the decision thread while no item arrives (e.g. time based decisions)
+    """
+
+    STAGES = ["capture", "detect", "ocr", "decide", "end_to_end"]
+
+    def __init__(self, capture_fn, detect_fn, ocr_fn, decide_fn, accept_fn=None, idle_fn=None,
+                 detection_workers=1, ocr_workers=1, queue_size=2):
+        """
+        Initializes the pipeline.
+
+        Args:
+            capture_fn, detect_fn, ocr_fn, decide_fn, accept_fn, idle_fn (callable): The stage functions (see above).
+            detection_workers (int, optional): Number of detection threads.
+            ocr_workers (int, optional): Number of OCR threads.
+            queue_size (int, optional): Depth of every queue between two stages.
+        """
+        self.capture_fn = capture_fn
+        self.accept_fn = accept_fn
+        self.detect_fn = detect_fn
+        self.ocr_fn = ocr_fn
+        self.decide_fn = decide_fn
+        self.idle_fn = idle_fn
+        self.detection_workers = detection_workers
+        self.ocr_workers = ocr_workers
+
+        self.frame_queue = DropOldestQueue(queue_size)
+        self.plate_queue = DropOldestQueue(queue_size)
+        self.decision_queue = DropOldestQueue(queue_size)
+
+        self.stage_stats = {stage: StageStats() for stage in self.STAGES}
+        self.stop_event = threading.Event()
+        self.threads = []
+
+        # ----- when the source ends, every stage finishes its queue before the next one stops -----
+        self.finished = {}
+        self.live_workers = {}
+        self.workers_lock = threading.Lock()
+
+        # ----- last captured frame, for the preview window of the main thread -----
+        self.latest_frame = None
+        self.frame_count = 0
+
+    def start(self):
+        """
+        This function starts all the stage threads.
+        """
+        self.stop_event.clear()
+        self.finished = {stage: threading.Event() for stage in ("capture", "detect", "ocr", "decide")}
+        self.live_workers = {"detect": self.detection_workers, "ocr": self.ocr_workers, "decide": 1}
+
+        targets = [("capture", self._capture_loop)]
+        targets += [(f"detect-{i}", self._detect_loop) for i in range(self.detection_workers)]
+        targets += [(f"ocr-{i}", self._ocr_loop) for i in range(self.ocr_workers)]
+        targets += [("decide", self._decide_loop)]
+
+        for name, target in targets:
+            thread = threading.Thread(target=target, name=f"stream-{name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=2.0):
+        """
+        This function stops all the stage threads.
+        """
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        self.threads = []
+
+    @property
+    def running(self):
+        return not self.stop_event.is_set()
+
+    def _capture_loop(self):
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            frame = self.capture_fn()
+            if frame is None:
+                # ----- source exhausted: the frames already captured still go through the other stages -----
+                self.finished["capture"].set()
+                break
+
+            self.stage_stats["capture"].record(time.perf_counter() - start)
+            self.latest_frame = frame
+            self.frame_count += 1
+
+            if self.accept_fn and not self.accept_fn(frame):
+                continue
+
+            self.frame_queue.put({"frame_id": self.frame_count, "captured_at": start, "frame": frame})
+
+    def _worker_loop(self, input_queue, output_queue, stage, upstream, stage_fn, idle_fn=None):
+        while not self.stop_event.is_set():
+            try:
+                item = input_queue.get(timeout=0.1)
+            except queue.Empty:
+                # ----- the upstream stage is over and puts nothing anymore: an empty queue stays empty -----
+                if self.finished[upstream].is_set() and input_queue.qsize() == 0:
+                    break
+                if idle_fn:
+                    try:
+                        idle_fn()
+                    except Exception as e:
+                        print(f"[ERROR] Stream stage '{stage}' failed while idle: {e}")
+                continue
+
+            start = time.perf_counter()
+            try:
+                keep = stage_fn(item)
+            except Exception as e:
+                # ----- a bad frame must not kill the stage thread -----
+                print(f"[ERROR] Stream stage '{stage}' failed: {e}")
+                keep = False
+            self.stage_stats[stage].record(time.perf_counter() - start)
+
+            if output_queue is None:
+                self.stage_stats["end_to_end"].record(time.perf_counter() - item["captured_at"])
+            elif keep is not False:
+                output_queue.put(item)
+
+        # ----- the last worker of a stage marks it finished, the end of the decision stage ends the stream -----
+        with self.workers_lock:
+            self.live_workers[stage] -= 1
+            if self.live_workers[stage] == 0:
+                self.finished[stage].set()
+                if stage == "decide":
+                    self.stop_event.set()
+
+    def _detect_loop(self):
+        self._worker_loop(self.frame_queue, self.plate_queue, "detect", "capture", self.detect_fn)
+
+    def _ocr_loop(self):
+        self._worker_loop(self.plate_queue, self.decision_queue, "ocr", "detect", self.ocr_fn)
+
+    def _decide_loop(self):
+        self._worker_loop(self.decision_queue, None, "decide", "ocr", self.decide_fn, self.idle_fn)
+
+    def stats(self):
+        """
+        :return: dictionary with the queue depths, the dropped items and the latency of every stage
+        """
+        return {
+            "frames": self.frame_count,
+            "queue_depth": {"frames": self.frame_queue.qsize(), "plates": self.plate_queue.qsize(),
+                            "decisions": self.decision_queue.qsize()},
+            "dropped": {"frames": self.frame_queue.dropped, "plates": self.plate_queue.dropped,
+                        "decisions": self.decision_queue.dropped},
+            "latency": {stage: stats.summary() for stage, stats in self.stage_stats.items()},
+        }
@@ -0,0 +1,262 @@
+import threading
+import time
+from collections import defaultdict
+
+from mysql.connector import Error
+
+
+def editDistance(first, second):
+    """
+    This function computes the Levenshtein distance between two strings.
+        :param first: first string
+        :param second: second string
+    :return: the minimum number of inserted, deleted or replaced characters
+    """
+    if len(first) < len(second):
+        first, second = second, first
+
+    previous = list(range(len(second) + 1))
+    for i, first_character in enumerate(first, 1):
+        current = [i]
+        for j, second_character in enumerate(second, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (first_character != second_character)))
+        previous = current
+
+    return previous[-1]
+
+
+def deletionVariants(plate, max_deletions):
+    """
+    This function generates the strings obtained by deleting up to max_deletions characters of the plate.
+    Two strings within edit distance k always share a variant with at most k deletions, so the variants are
+    the keys of the index.
+        :param plate: the plate text
+        :param max_deletions: maximum number of deleted characters
+    :return: set of variants (the plate itself included)
+    """
+    variants = {plate}
+    frontier = {plate}
+    for _ in range(max_deletions):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+class RegisteredPlateIndex:
+    """
+    In-memory copy of the 'vehicles' table, indexed for tolerant lookups: the registered plates within a
+    small edit distance of a reading are found with a few dictionary lookups (deletion neighbourhood index),
+    so a misread character does not send a registered vehicle to the "not found" branch, and the gate does
+    not query MySQL for every decision.
+    """
+
+    def __init__(self, db_manager=None, max_distance=1, full_refresh_interval_s=300.0):
+        """
+        Initializes the index.
+
+        Args:
+            db_manager (ParkingDatabaseManager, optional): Source of the vehicle records.
+            max_distance (int, optional): Maximum edit distance between a reading and a registered plate.
+            full_refresh_interval_s (float, optional): Time between two full reloads of the table (a safety
+                                                       net, the incremental refreshes read the vehicle_changes
+                                                       feed and also see the deleted / updated records).
+        """
+        self.db_manager = db_manager
+        self.max_distance = max_distance
+        self.full_refresh_interval_s = full_refresh_interval_s
+
+        self.vehicles = {}
+        self.variants = defaultdict(set)
+        self.last_change_id = 0
+        self.last_full_refresh = None
+        self.lock = threading.Lock()
+        self.refresh_stop = None
+        self.refresh_thread = None
+
+        self.lookups = 0
+        self.fuzzy_matches = 0
+
+    def _addLocked(self, vehicle):
+        plate = vehicle["plate_number"]
+        if plate not in self.vehicles:
+            for variant in deletionVariants(plate, self.max_distance):
+                self.variants[variant].add(plate)
+        self.vehicles[plate] = vehicle
+
+    def add(self, vehicle):
+        """
+        This function adds (or updates) a vehicle record.
+            :param vehicle: dictionary with at least the plate_number (as returned by verify_from_database)
+        """
+        with self.lock:
+            self._addLocked(vehicle)
+
+    def remove(self, plate):
+        """
+        This function removes a plate from the index.
+            :param plate: the plate number
+        :return: True if the plate was in the index
+        """
+        with self.lock:
+            return self._removeLocked(plate)
+
+    def _removeLocked(self, plate):
+        if self.vehicles.pop(plate, None) is None:
+            return False
+
+        for variant in deletionVariants(plate, self.max_distance):
+            plates = self.variants.get(variant)
+            if plates is not None:
+                plates.discard(plate)
+                if not plates:
+                    del self.variants[variant]
+        return True
+
+    def lookup(self, plate, max_distance=None):
+        """
+        This function finds the registered plates close to a reading.
+            :param plate: the plate text read by the OCR
+            :param max_distance: maximum edit distance (defaults to the one of the index, cannot exceed it)
+        :return: list of (distance, vehicle) pairs, closest first
+        """
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+
+        with self.lock:
+            exact = self.vehicles.get(plate)
+            if exact is not None and max_distance == 0:
+                return [(0, exact)]
+
+            candidates = set()
+            for variant in deletionVariants(plate, max_distance):
+                candidates |= self.variants.get(variant, set())
+
+            matches = []
+            for candidate in candidates:
+                distance = editDistance(plate, candidate)
+                if distance <= max_distance:
+                    matches.append((distance, self.vehicles[candidate]))
+
+        return sorted(matches, key=lambda match: (match[0], match[1]["plate_number"]))
+
+    def match(self, plate):
+        """
+        This function returns the registered vehicle of a reading, tolerating misread characters.
+            :param plate: the plate text read by the OCR
+        :return: the vehicle record of the exact plate, or of the only closest registered plate;
+                 None if no plate is close enough or several plates are equally close
+        """
+        matches = self.lookup(plate)
+
+        with self.lock:
+            self.lookups += 1
+            if not matches or len(matches) > 1 and matches[0][0] == matches[1][0]:
+                return None
+            if matches[0][0] > 0:
+                self.fuzzy_matches += 1
+
+        return matches[0][1]
+
+    def refresh(self, full=False):
+        """
+        This function updates the index from the database: the changes since the last refresh (vehicle_changes
+        feed), or a full reload.
+            :param full: reload the whole table
+        :return: True if the database could be queried (the current index is kept otherwise)
+        """
+        if self.db_manager is None:
+            return False
+
+        if not full:
+            changes = self.db_manager.fetch_vehicle_changes(self.last_change_id)
+            if changes is None:
+                return False
+            self.applyChanges(changes[1], last_change_id=changes[0])
+            return True
+
+        try:
+            # ----- read before the snapshot: the changes made meanwhile are applied again by the next refresh -----
+            last_change_id = self.db_manager.last_vehicle_change()
+        except Error as e:
+            print(f"[Index] Could not read the vehicle changes: {e}")
+            return False
+
+        vehicles = self.db_manager.fetch_vehicles(0)
+        if vehicles is None:
+            return False
+
+        self.load(vehicles, full=True)
+        with self.lock:
+            self.last_change_id = last_change_id
+        return True
+
+    def load(self, vehicles, full=False):
+        """
+        This function adds vehicle records fetched elsewhere (e.g. a snapshot of the table). The records only
+        add plates: the deleted ones are removed by a full load or by applyChanges().
+            :param vehicles: list of vehicle records
+            :param full: the records are the whole table (the other plates are removed)
+        """
+        with self.lock:
+            if full:
+                self.vehicles = {}
+                self.variants = defaultdict(set)
+                self.last_full_refresh = time.monotonic()
+            for vehicle in vehicles:
+                self._addLocked(vehicle)
+
+    def applyChanges(self, vehicles, last_change_id=None):
+        """
+        This function applies the changes of the vehicle_changes feed (fetch_vehicle_changes).
+            :param vehicles: dictionary of the changed plates mapped to their record, or to None if deleted
+            :param last_change_id: last change read (the next incremental refresh starts after it)
+        """
+        with self.lock:
+            for plate, vehicle in vehicles.items():
+                if vehicle:
+                    self._addLocked(vehicle)
+                else:
+                    self._removeLocked(plate)
+            if last_change_id is not None:
+                self.last_change_id = last_change_id
+
+    def startAutoRefresh(self, interval_s=30.0):
+        """
+        This function refreshes the index periodically from a daemon thread (incremental refreshes,
+        with a full reload every full_refresh_interval_s).
+            :param interval_s: seconds between two refreshes
+        """
+        stop_event = threading.Event()
+
+        def refresh():
+            while not stop_event.wait(interval_s):
+                full = (self.last_full_refresh is None
+                        or time.monotonic() - self.last_full_refresh >= self.full_refresh_interval_s)
+                try:
+                    self.refresh(full=full)
+                except Exception as e:
+                    print(f"[ERROR] Could not refresh the plate index: {e}")
+
+        self.refresh_stop = stop_event
+        self.refresh_thread = threading.Thread(target=refresh, name="plate-index-refresh", daemon=True)
+        self.refresh_thread.start()
+        return stop_event
+
+    def stopAutoRefresh(self):
+        """
+        This function stops the periodic refresh and waits for a refresh in progress, so the database
+        can be closed safely afterwards.
+        """
+        if self.refresh_stop:
+            self.refresh_stop.set()
+        if self.refresh_thread:
+            self.refresh_thread.join()
+            self.refresh_thread = None
+
+    def stats(self):
+        """
+        :return: dictionary with the number of plates, lookups and fuzzy matches
+        """
+        with self.lock:
+            return {"plates": len(self.vehicles), "variants": len(self.variants),
+                    "lookups": self.lookups, "fuzzy_matches": self.fuzzy_matches}
@@ -4,12 +4,306 @@ import numpy as np
 import imutils
 import matplotlib.pyplot as plt
 import os
+import queue
+import threading
+import time
+
+# ----- only importing tesserocr if the in-process tesseract binding is installed -----
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# ----- characters that can appear on a romanian plate -----
+PLATE_CHARACTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
+class PipelineResult:
+    """
+    Holds every intermediate of one run of the recognition pipeline, so the plotting and reporting
+    code can reuse them instead of running the pipeline again.
+    """
+
+    def __init__(self, image_path=None, original=None):
+        self.image_path = image_path
+        self.original = original
+        self.gray = None
+        self.blurred = None
+        self.edged = None
+        self.plate_contour = None
+        self.plate_region = None
+        self.cleaned_plate = None
+        self.text = ""
+        self.timings = {}
+
+    @property
+    def plate_found(self):
+        return self.plate_contour is not None
+
+    @property
+    def bbox(self):
+        """
+        :return: the (x, y, w, h) bounding box of the plate contour, or None if no plate was found
+        """
+        if self.plate_contour is None:
+            return None
+        return tuple(int(value) for value in cv2.boundingRect(self.plate_contour))
+
+    def asTuple(self):
+        """
+        :return: the (plate region, text) pair returned by recognizePlateNumber
+        """
+        if self.plate_contour is None:
+            return None, "No plate contour found"
+        return self.plate_region, self.text
+
+
+class PytesseractBackend:
+    """
+    OCR backend that runs the tesseract binary through pytesseract (one subprocess per plate).
+    """
+    name = "pytesseract"
+
+    # ----- tesseract config used for reading the plates (single word, plate characters only) -----
+    OCR_CONFIG = f"--oem 3 --psm 8 -c tessedit_char_whitelist={PLATE_CHARACTERS}"
 
-class NumberPlateRecognizer:
     def __init__(self, tesseract_cmd=None):
         if tesseract_cmd:
             pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
 
+    def ocrConfig(self, psm=8):
+        """
+        :return: the tesseract config for the given page segmentation mode
+        """
+        if psm == 8:
+            return self.OCR_CONFIG
+        return f"--oem 3 --psm {psm} -c tessedit_char_whitelist={PLATE_CHARACTERS}"
+
+    def readText(self, image, psm=8):
+        """
+        This function reads the text from the input image.
+            :param image: input image (grayscale or BGR)
+            :param psm: tesseract page segmentation mode (8 single word, 7 single line, 13 raw line)
+        :return: the text read from the image
+        """
+        return pytesseract.image_to_string(image, config=self.ocrConfig(psm)).strip()
+
+    def readTextWithConfidence(self, image, psm=8):
+        """
+        This function reads the text from the input image together with the tesseract confidence.
+            :param image: input image (grayscale or BGR)
+            :param psm: tesseract page segmentation mode (8 single word, 7 single line, 13 raw line)
+        :return: the text read from the image and its mean confidence (0 - 100)
+        """
+        data = pytesseract.image_to_data(image, config=self.ocrConfig(psm), output_type=pytesseract.Output.DICT)
+
+        words = [word.strip() for word in data["text"] if word.strip()]
+        confidences = [float(conf) for conf, word in zip(data["conf"], data["text"]) if word.strip() and float(conf) >= 0]
+
+        return "".join(words), (sum(confidences) / len(confidences) if confidences else 0.0)
+
+    def close(self):
+        pass
+
+
+class TesserocrBackend:
+    """
+    OCR backend that keeps warm tesseract engines in-process (through tesserocr), so no process is
+    forked and no model is loaded per plate. The engines are held in a small thread-safe pool.
+    """
+    name = "tesserocr"
+
+    def __init__(self, pool_size=2, tessdata_path=None, lang="eng"):
+        """
+        Initializes the engine pool. Every engine is created once, with the plate whitelist and PSM 8.
+
+        Args:
+            pool_size (int, optional): Number of engines (max number of plates read in parallel).
+            tessdata_path (str, optional): Directory with the tesseract models.
+            lang (str, optional): Tesseract language.
+        """
+        if not tesserocr:
+            raise ImportError("[ERROR] tesserocr module not found. Install it or use the pytesseract backend.")
+
+        self.engines = queue.Queue()
+        for _ in range(max(1, pool_size)):
+            kwargs = {"lang": lang, "psm": tesserocr.PSM.SINGLE_WORD, "oem": tesserocr.OEM.DEFAULT}
+            if tessdata_path:
+                kwargs["path"] = tessdata_path
+
+            engine = tesserocr.PyTessBaseAPI(**kwargs)
+            engine.SetVariable("tessedit_char_whitelist", PLATE_CHARACTERS)
+            self.engines.put(engine)
+
+    def readText(self, image, psm=8):
+        """
+        This function reads the text from the input image, using the first free engine of the pool.
+            :param image: input image (grayscale or BGR)
+            :param psm: tesseract page segmentation mode (8 single word, 7 single line, 13 raw line)
+        :return: the text read from the image
+        """
+        return self.readTextWithConfidence(image, psm)[0]
+
+    def readTextWithConfidence(self, image, psm=8):
+        """
+        This function reads the text from the input image together with the tesseract confidence.
+            :param image: input image (grayscale or BGR)
+            :param psm: tesseract page segmentation mode (8 single word, 7 single line, 13 raw line)
+        :return: the text read from the image and its mean confidence (0 - 100)
+        """
+        if len(image.shape) == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        image = np.ascontiguousarray(image)
+
+        engine = self.engines.get()
+        try:
+            # ----- the engines are created in single word mode, other modes are only set for one read -----
+            if psm != 8:
+                engine.SetPageSegMode(psm)
+            engine.SetImageBytes(image.tobytes(), image.shape[1], image.shape[0], 1, image.strides[0])
+            return engine.GetUTF8Text().strip(), float(engine.MeanTextConf())
+        finally:
+            if psm != 8:
+                engine.SetPageSegMode(tesserocr.PSM.SINGLE_WORD)
+            self.engines.put(engine)
+
+    def close(self):
+        """
+        This function releases all the engines of the pool.
+        """
+        while not self.engines.empty():
+            self.engines.get_nowait().End()
+
+
+def createOcrBackend(backend="auto", pool_size=2, tesseract_cmd=None):
+    """
+    This function creates the OCR backend used by the recognizer.
+        :param backend: "tesserocr", "pytesseract" or "auto" (tesserocr if installed, pytesseract otherwise)
+        :param pool_size: number of warm engines for the tesserocr backend
+        :param tesseract_cmd: path to the tesseract binary for the pytesseract backend
+    :return: the OCR backend
+    """
+    if backend == "auto":
+        backend = "tesserocr" if tesserocr else "pytesseract"
+
+    if backend == "tesserocr":
+        return TesserocrBackend(pool_size=pool_size)
+    elif backend == "pytesseract":
+        return PytesseractBackend(tesseract_cmd=tesseract_cmd)
+
+    raise ValueError(f"[ERROR] Unknown OCR backend '{backend}'. Use 'tesserocr', 'pytesseract' or 'auto'.")
+
+
+class FrameBufferPool:
+    """
+    Working buffers of the recognizer, allocated once for a frame size and reused for every frame,
+    so the OpenCV calls write into them (dst=) instead of allocating new arrays.
+    Every thread gets its own buffers (the stream can run several detection workers).
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def get(self, name, shape, dtype=np.uint8):
+        """
+        This function returns the buffer with the given name, (re)allocated only if its shape changed.
+            :param name: buffer name
+            :param shape: expected shape
+            :param dtype: expected data type
+        :return: the buffer
+        """
+        buffers = self.local.__dict__.setdefault("buffers", {})
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            buffers[name] = buffer
+
+        return buffer
+
+
+class NumberPlateRecognizer:
+    # ----- plausible plate geometry (romanian plates are 520 x 110 mm, seen with some perspective) -----
+    PLATE_MIN_ASPECT_RATIO = 2.0
+    PLATE_MAX_ASPECT_RATIO = 8.0
+    PLATE_MIN_AREA_RATIO = 0.0005
+    PLATE_MAX_AREA_RATIO = 0.3
+    MAX_PLATE_CANDIDATES = 10
+
+    # ----- OCR cascade: the cheap first pass is kept when the validator accepts it, the other passes are
+    # ----- only run for the rejected or low confidence readings (variant of the plate region, tesseract psm)
+    OCR_PLATE_HEIGHT = 64
+    PLATE_ASPECT_RATIO = 520 / 110
+    OCR_CASCADE = [("normalized", 8), ("cleaned", 8), ("normalized", 7), ("rectified", 7), ("cleaned", 13)]
+
+    def __init__(self, tesseract_cmd=None, ocr_backend="auto", ocr_pool_size=2, localization_scale=1.0,
+                 coarse_candidates=3, refine_margin=0.3, reuse_buffers=False, frame_size=None, ocr_cache=None,
+                 metrics=None, plate_validator=None, min_ocr_confidence=70.0, plate_corrector=None):
+        """
+        Initializes the recognizer.
+
+        Args:
+            tesseract_cmd (str, optional): Path to the tesseract binary (pytesseract backend).
+            ocr_backend (str or object, optional): "auto", "tesserocr", "pytesseract" or an already built backend.
+            ocr_pool_size (int, optional): Number of warm engines for the tesserocr backend.
+            localization_scale (float, optional): Scale of the frame on which the plate contour is searched.
+                                                  1.0 searches the full frame, smaller values search a downscaled
+                                                  frame and refine only the candidate regions at full resolution.
+            coarse_candidates (int, optional): Number of coarse candidate regions refined at full resolution.
+            refine_margin (float, optional): Margin added around the candidate region before refining it,
+                                             relative to the candidate size.
+            reuse_buffers (bool, optional): Preprocess into preallocated buffers instead of new arrays.
+                                            The intermediate images are then overwritten by the next frame.
+            frame_size (tuple, optional): (width, height) of the stream, used to preallocate the buffers.
+            ocr_cache (PlateOCRCache, optional): Cache of the OCR readings, keyed by the plate region hash.
+            metrics (RecognizerMetrics, optional): Collector of the stage durations and counters
+                                                   (nothing is recorded when it is None).
+            plate_validator (callable, optional): Plate format check (e.g. verifyPlateFormat of the validator).
+                                                  When set, the plates are read with the OCR cascade.
+            min_ocr_confidence (float, optional): OCR confidence (0 - 100) under which a valid reading
+                                                  still goes through the next passes of the cascade.
+            plate_corrector (callable, optional): Maps an OCR reading to the closest valid plate
+                                                  (e.g. correctText of the PlateCorrector), applied to every reading.
+        """
+        if not 0 < localization_scale <= 1:
+            raise ValueError("[ERROR] The localization scale must be in the (0, 1] interval.")
+
+        if isinstance(ocr_backend, str):
+            ocr_backend = createOcrBackend(ocr_backend, pool_size=ocr_pool_size, tesseract_cmd=tesseract_cmd)
+        self.ocr_backend = ocr_backend
+        self.localization_scale = localization_scale
+        self.coarse_candidates = coarse_candidates
+        self.refine_margin = refine_margin
+
+        self.ocr_cache = ocr_cache
+        self.metrics = metrics
+        self.plate_validator = plate_validator
+        self.min_ocr_confidence = min_ocr_confidence
+        self.plate_corrector = plate_corrector
+
+        self.buffers = FrameBufferPool() if reuse_buffers else None
+        if self.buffers and frame_size:
+            self.preallocateBuffers(frame_size)
+
+    def preallocateBuffers(self, frame_size):
+        """
+        This function allocates the working buffers for the given frame size (in the calling thread).
+            :param frame_size: (width, height) of the frames
+        """
+        width, height = frame_size
+        if self.localization_scale < 1.0:
+            width, height = self._scaledSize(width, height)
+            self.buffers.get("small", (height, width, 3))
+
+        for name in ("gray", "blurred", "edged"):
+            self.buffers.get(name, (height, width))
+
+    def _buffer(self, name, shape):
+        # ----- None lets OpenCV allocate a new array -----
+        return self.buffers.get(name, shape) if self.buffers else None
+
+    def _scaledSize(self, width, height):
+        return max(1, int(round(width * self.localization_scale))), max(1, int(round(height * self.localization_scale)))
+
     def resizeImage(self, image, width=800):
         """
         This function resizes the input image to the specified width while maintaining the aspect ratio.
@@ -25,29 +319,44 @@ class NumberPlateRecognizer:
         dim = (width, int(image.shape[0] * ratio))
         return cv2.resize(image, dim)
 
-    def preprocessImage(self, image):
+    def preprocessImage(self, image, reuse_buffers=True):
         """
         This function preprocesses the input image for number plate recognition.
             :param image: input image
+            :param reuse_buffers: condition for writing into the frame buffers (when the recognizer has them)
         :return: the preprocessed image with the edges detected
         """
+        return self.preprocessImageSteps(image, reuse_buffers)[2]
+
+    def preprocessImageSteps(self, image, reuse_buffers=True):
+        """
+        This function preprocesses the input image and keeps all the intermediate images.
+            :param image: input image
+            :param reuse_buffers: condition for writing into the frame buffers (when the recognizer has them)
+        :return: the grayscale, the blurred and the edge detected images
+        """
         # ----- checking if the input image is valid -----
         if image is None:
             raise ValueError("[ERROR] The input image is None.")
 
+        shape = image.shape[:2]
+        gray = self._buffer("gray", shape) if reuse_buffers else None
+        blurred = self._buffer("blurred", shape) if reuse_buffers else None
+        edged = self._buffer("edged", shape) if reuse_buffers else None
+
         # ----- grayscale conversion -----
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
 
         # ----- noise reduction -----
-        blurred = cv2.bilateralFilter(gray, 11, 17, 17)
+        blurred = cv2.bilateralFilter(gray, 11, 17, 17, dst=blurred)
         #blurred = cv2.GaussianBlur(gray, (5, 5), 0)
         #cv2.imshow("Bilateral Filter", blurred)
 
         # ----- edge detection -----
-        edged = cv2.Canny(blurred, 30, 200)#30 200
+        edged = cv2.Canny(blurred, 30, 200, edges=edged)#30 200
         #cv2.imshow("Edge Detection", edged)
 
-        return edged
+        return gray, blurred, edged
 
     def findPlateContour(self, edged):
         """
@@ -55,39 +364,200 @@ class NumberPlateRecognizer:
             :param edged: the preprocessed image with the edges detected
         :return: the contour of the number plate coordinates
         """
-        contours = cv2.findContours(edged.copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        candidates = self.rankPlateCandidates(edged, max_results=1)
+
+        return candidates[0] if candidates else None
+
+    def _plausibleBoxes(self, cnts, image_shape):
+        """
+        This function checks the bounding box geometry of all the contours in one numpy pass.
+        The area bounds are ratios of the searched image, so they follow its scale.
+            :param cnts: the contours
+            :param image_shape: shape of the image the contours were found on
+        :return: the indices of the plausible contours and the bounding boxes of all the contours
+        """
+        # ----- bounding box geometry of every contour -----
+        rects = np.array([cv2.boundingRect(c) for c in cnts], dtype=np.float32)
+        widths, heights = rects[:, 2], rects[:, 3]
+        aspect_ratios = widths / np.maximum(heights, 1)
+        areas = widths * heights
+        image_area = image_shape[0] * image_shape[1]
+
+        plausible = ((aspect_ratios >= self.PLATE_MIN_ASPECT_RATIO) & (aspect_ratios <= self.PLATE_MAX_ASPECT_RATIO)
+                     & (areas >= self.PLATE_MIN_AREA_RATIO * image_area)
+                     & (areas <= self.PLATE_MAX_AREA_RATIO * image_area))
+        return np.flatnonzero(plausible), rects
+
+    def rankPlateCandidates(self, edged, max_results=None):
+        """
+        This function ranks the four point contours that can be a number plate.
+        The bounding box geometry of all the contours is checked in one numpy pass and the boxes with an
+        implausible aspect ratio or area are discarded before the (expensive) polygon approximation.
+            :param edged: the preprocessed image with the edges detected
+            :param max_results: maximum number of candidates returned (all by default)
+        :return: list of plate contours, the most likely first
+        """
+        # ----- findContours does not modify its input since OpenCV 3.2, no copy needed -----
+        contours = cv2.findContours(edged, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
         cnts = imutils.grab_contours(contours)
-        cnts = sorted(cnts, key=cv2.contourArea, reverse=True)[:10]
+        if len(cnts) == 0:
+            return []
 
-        screen_cnt = None
+        indices, _ = self._plausibleBoxes(cnts, edged.shape)
 
-        for c in cnts:
-            # approximate the contour
-            peri = cv2.arcLength(c, True)
-            approx = cv2.approxPolyDP(c, 0.018 * peri, True)#0.018
-            # if the approximated contour has four points,
-            # then we can assume that we have found our
-            # screen
+        # ----- the contour area is only computed for the plausible contours, largest first -----
+        indices = sorted(indices, key=lambda i: cv2.contourArea(cnts[i]), reverse=True)[:self.MAX_PLATE_CANDIDATES]
+
+        candidates = []
+        for i in indices:
+            # approximate the contour, a plate must have four points
+            peri = cv2.arcLength(cnts[i], True)
+            approx = cv2.approxPolyDP(cnts[i], 0.018 * peri, True)#0.018
             if len(approx) == 4:
-                return approx
+                candidates.append(approx)
+                if max_results and len(candidates) >= max_results:
+                    break
 
-        return None
+        return candidates
+
+    def downscaleImage(self, image):
+        """
+        This function downscales the input image to the localization scale.
+            :param image: input image
+        :return: the downscaled image
+        """
+        # ----- checking if the input image is valid -----
+        if image is None:
+            raise ValueError("[ERROR] The input image is None.")
+
+        width, height = self._scaledSize(image.shape[1], image.shape[0])
+        small = self._buffer("small", (height, width) + image.shape[2:])
+
+        return cv2.resize(image, (width, height), dst=small, interpolation=cv2.INTER_AREA)
+
+    def findCoarseCandidates(self, edged):
+        """
+        This function ranks the candidate plate regions found on the downscaled edge image.
+        The regions with an implausible aspect ratio or area (car bodies, windows) are discarded with the
+        same geometry filter as rankPlateCandidates. No four point shape is required here: at low resolution
+        the plate corners are often merged with the car body, the shape is checked later, at full resolution.
+            :param edged: the downscaled image with the edges detected
+        :return: list of candidate (x, y, w, h) regions in full resolution coordinates, largest first
+        """
+        contours = cv2.findContours(edged, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        cnts = imutils.grab_contours(contours)
+        if len(cnts) == 0:
+            return []
+
+        indices, rects = self._plausibleBoxes(cnts, edged.shape)
+
+        # ----- ranked by box area: at low resolution the plate outline is often open, with no contour area -----
+        areas = rects[indices, 2] * rects[indices, 3]
+        indices = indices[np.argsort(-areas, kind="stable")]
+
+        candidates = []
+        for i in indices:
+            x, y, w, h = rects[i]
+            # ----- RETR_TREE gives the inner and outer outline of a region, the duplicates are skipped -----
+            if any(abs(x - cx) <= 2 and abs(y - cy) <= 2 and abs(w - cw) <= 4 and abs(h - ch) <= 4
+                   for cx, cy, cw, ch in candidates):
+                continue
+            candidates.append((x, y, w, h))
+            if len(candidates) >= self.coarse_candidates:
+                break
+
+        return [tuple(int(round(value / self.localization_scale)) for value in candidate) for candidate in candidates]
+
+    def refinePlateContour(self, image, candidate):
+        """
+        This function searches the plate contour at full resolution, only inside a candidate region.
+            :param image: full resolution input image
+            :param candidate: the (x, y, w, h) candidate region in full resolution coordinates
+        :return: the contour of the number plate in full resolution coordinates, or None
+        """
+        x, y, w, h = candidate
+        margin = int(self.refine_margin * max(w, h))
+        x0, y0 = max(0, x - margin), max(0, y - margin)
+        x1, y1 = min(image.shape[1], x + w + margin), min(image.shape[0], y + h + margin)
+
+        # ----- the crop size changes every time, so it does not go through the frame buffers -----
+        refined = self.findPlateContour(self.preprocessImage(image[y0:y1, x0:x1], reuse_buffers=False))
+        if refined is None:
+            return None
+
+        return refined + np.array([x0, y0], dtype=refined.dtype)
+
+    def isPlausiblePlate(self, plate_contour, image_shape):
+        """
+        This function checks a refined contour against the full resolution frame, with the same rules as the
+        full-frame pass: four points and a plausible aspect ratio and area. The refinement only checked it
+        against the (much smaller) crop, where a car body or a window can pass the area ratio.
+            :param plate_contour: the contour in full resolution coordinates
+            :param image_shape: shape of the full resolution image
+        :return: True if the contour can be a number plate of the full frame
+        """
+        if plate_contour is None or len(plate_contour) != 4:
+            return False
+
+        indices, _ = self._plausibleBoxes([plate_contour], image_shape)
+        return len(indices) == 1
+
+    def localizePlate(self, image, timings=None):
+        """
+        This function finds the plate contour, either on the full frame or coarse-to-fine.
+            :param image: input image
+            :param timings: optional dictionary where the stage durations (in ms) are written
+        :return: the grayscale, blurred and edge images of the searched frame and the plate contour
+        """
+        timings = {} if timings is None else timings
+        coarse = self.localization_scale < 1.0
+
+        # ----- coarse-to-fine mode: the expensive filters run on the downscaled frame -----
+        start = time.perf_counter()
+        search_image = self.downscaleImage(image) if coarse else image
+        gray, blurred, edged = self.preprocessImageSteps(search_image)
+        timings["preprocess_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        if not coarse:
+            plate_contour = self.findPlateContour(edged)
+        else:
+            plate_contour = None
+            for candidate in self.findCoarseCandidates(edged):
+                refined = self.refinePlateContour(image, candidate)
+                if self.isPlausiblePlate(refined, image.shape):
+                    plate_contour = refined
+                    break
+
+            # ----- no coarse candidate passed: full resolution pass (outside of the downscaled frame buffers) -----
+            # ----- this is the worst case, slower than the full-frame mode: it is counted in the metrics -----
+            if plate_contour is None:
+                gray, blurred, edged = self.preprocessImageSteps(image, reuse_buffers=False)
+                plate_contour = self.findPlateContour(edged)
+                if self.metrics is not None:
+                    self.metrics.increment("coarse_fallback_total")
+        timings["contour_ms"] = (time.perf_counter() - start) * 1000
+
+        if self.metrics is not None:
+            self.metrics.observeStage("preprocess", timings["preprocess_ms"])
+            self.metrics.observeStage("contour", timings["contour_ms"])
+            self.metrics.increment("frames_total")
+            self.metrics.increment("plates_found_total" if plate_contour is not None else "no_contour_total")
+
+        return gray, blurred, edged, plate_contour
 
     def extractPlateRegion(self, image, plate_contour):
         """
         This function extracts the region of interest (ROI) for the number plate from the input image.
             :param image: input image
             :param plate_contour: the contour of the number plate
-        :return: the extracted plate region
+        :return: the extracted plate region (a view of the input image, not a copy)
         """
         # ----- checking if the input image is valid -----
         if image is None:
             raise ValueError("[ERROR] The input image is None.")
-
-        mask = np.zeros_like(image)
-        if plate_contour is not None:
-            cv2.drawContours(mask, [plate_contour], -1, (255, 255, 255), -1)
-        masked = cv2.bitwise_and(image, mask)
+        if plate_contour is None:
+            raise ValueError("[ERROR] The plate contour is None.")
 
         x, y, w, h = cv2.boundingRect(plate_contour)
         plate_region = image[y:y + h, x:x + w]
@@ -95,7 +565,6 @@ class NumberPlateRecognizer:
         return plate_region
 
     def cleanPlateForOCR(self, plate_roi):
-        # TODO: think about using this function to clean the plate region
         """
         This function cleans the extracted plate region for better OCR results.
             :param plate_roi:
@@ -116,37 +585,182 @@ class NumberPlateRecognizer:
 
         return thresh
 
-    def plotAllSteps(self, image_path, show_plot=False, save_plot=False):
+    def normalizePlateForOCR(self, plate_roi):
+        """
+        This function brings the plate region to a fixed height and stretches its contrast (cheap first OCR pass).
+            :param plate_roi: the extracted plate region
+        :return: the normalized grayscale plate region
+        """
+        gray = cv2.cvtColor(plate_roi, cv2.COLOR_BGR2GRAY) if len(plate_roi.shape) == 3 else plate_roi
+
+        scale = self.OCR_PLATE_HEIGHT / gray.shape[0]
+        width = max(1, int(round(gray.shape[1] * scale)))
+        interpolation = cv2.INTER_CUBIC if scale > 1 else cv2.INTER_AREA
+        gray = cv2.resize(gray, (width, self.OCR_PLATE_HEIGHT), interpolation=interpolation)
+
+        return cv2.normalize(gray, None, 0, 255, cv2.NORM_MINMAX)
+
+    def rectifyPlateRegion(self, plate_roi, plate_contour):
+        """
+        This function warps the plate quadrilateral to a front view rectangle with the plate proportions.
+            :param plate_roi: the extracted plate region (bounding box of the contour)
+            :param plate_contour: the 4 point contour of the plate, in image coordinates
+        :return: the rectified plate region, or None if the contour is not a quadrilateral
+        """
+        points = plate_contour.reshape(-1, 2).astype(np.float32)
+        if len(points) != 4:
+            return None
+
+        # ----- moving the corners to the plate region coordinates and ordering them tl, tr, br, bl -----
+        x, y = cv2.boundingRect(plate_contour)[:2]
+        points -= (x, y)
+        sums = points.sum(axis=1)
+        differences = np.diff(points, axis=1).ravel()
+        corners = np.array([points[np.argmin(sums)], points[np.argmin(differences)],
+                            points[np.argmax(sums)], points[np.argmax(differences)]], dtype=np.float32)
+
+        height = self.OCR_PLATE_HEIGHT
+        width = int(height * self.PLATE_ASPECT_RATIO)
+        target = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+
+        return cv2.warpPerspective(plate_roi, cv2.getPerspectiveTransform(corners, target), (width, height))
+
+    def _cascadeVariant(self, variant, plate_roi, plate_contour):
+        if variant == "normalized":
+            return self.normalizePlateForOCR(plate_roi)
+        if variant == "cleaned":
+            return self.cleanPlateForOCR(plate_roi)
+        if variant == "rectified" and plate_contour is not None:
+            return self.rectifyPlateRegion(plate_roi, plate_contour)
+        return None
+
+    def readPlateTextCascade(self, plate_roi, plate_contour=None):
+        """
+        This function reads the plate with the OCR cascade: the passes of OCR_CASCADE are run in order and
+        the first reading accepted by the plate validator with enough confidence ends the cascade.
+            :param plate_roi: the extracted plate region
+            :param plate_contour: the contour of the plate (enables the rectified pass)
+        :return: the text read from the plate and its confidence (0 - 100); if no pass is accepted,
+                 the best valid reading, or the most confident one
+        """
+        variants = {}
+        readings = []
+
+        for variant, psm in self.OCR_CASCADE:
+            if variant not in variants:
+                variants[variant] = self._cascadeVariant(variant, plate_roi, plate_contour)
+            if variants[variant] is None:
+                continue
+
+            text, confidence = self.ocr_backend.readTextWithConfidence(variants[variant], psm)
+            text = "".join(text.split()).upper()
+            if self.plate_corrector is not None:
+                text = self.plate_corrector(text)
+            valid = bool(text) and bool(self.plate_validator(text))
+            readings.append((valid, confidence, text))
+
+            if valid and confidence >= self.min_ocr_confidence:
+                break
+
+        if self.metrics is not None:
+            self.metrics.increment("ocr_passes_total", len(readings))
+
+        valid, confidence, text = max(readings)
+        return text, confidence
+
+    def readPlateText(self, plate_roi, plate_contour=None):
+        """
+        This function runs the OCR on the extracted plate region.
+            :param plate_roi: the extracted plate region
+            :param plate_contour: the contour of the plate (only used by the OCR cascade)
+        :return: the text read from the plate
+        """
+        # ----- checking if the input image is valid -----
+        if plate_roi is None:
+            raise ValueError("[ERROR] The input image is None.")
+
+        return self._readPlate(plate_roi, plate_contour, with_confidence=False)[0]
+
+    def readPlateTextWithConfidence(self, plate_roi, plate_contour=None, cache_scope=None):
+        """
+        This function runs the OCR on the extracted plate region and also returns the OCR confidence.
+            :param plate_roi: the extracted plate region
+            :param plate_contour: the contour of the plate (only used by the OCR cascade)
+            :param cache_scope: scope of the cached reading (e.g. the track id of the plate)
+        :return: the text read from the plate and its confidence (0 - 100)
+        """
+        # ----- checking if the input image is valid -----
+        if plate_roi is None:
+            raise ValueError("[ERROR] The input image is None.")
+
+        return self._readPlate(plate_roi, plate_contour, with_confidence=True, cache_scope=cache_scope)
+
+    def _readPlate(self, plate_roi, plate_contour, with_confidence, cache_scope=None):
+        if self.metrics is None:
+            return self._readPlateUncounted(plate_roi, plate_contour, with_confidence, cache_scope)
+
+        start = time.perf_counter()
+        reading = self._readPlateUncounted(plate_roi, plate_contour, with_confidence, cache_scope)
+        self.metrics.observeStage("ocr", (time.perf_counter() - start) * 1000)
+        self.metrics.increment("ocr_reads_total")
+        if not reading[0]:
+            self.metrics.increment("empty_text_total")
+
+        return reading
+
+    def _readPlateUncounted(self, plate_roi, plate_contour, with_confidence, cache_scope=None):
+        if self.ocr_cache is not None:
+            return self._readPlateTextCached(plate_roi, plate_contour, with_confidence, cache_scope)
+        return self._readPlateFromBackend(plate_roi, plate_contour, with_confidence)
+
+    def _readPlateFromBackend(self, plate_roi, plate_contour, with_confidence):
+        if self.plate_validator is not None:
+            return self.readPlateTextCascade(plate_roi, plate_contour)
+
+        if with_confidence:
+            text, confidence = self.ocr_backend.readTextWithConfidence(plate_roi)
+        else:
+            text, confidence = self.ocr_backend.readText(plate_roi), None
+
+        # ----- OCR confusions (0/O, 8/B, ...) fixed when a valid plate is close enough -----
+        if self.plate_corrector is not None:
+            text = self.plate_corrector(text)
+        return text, confidence
+
+    def _readPlateTextCached(self, plate_roi, plate_contour, with_confidence, cache_scope=None):
+        key = self.ocr_cache.hashImage(plate_roi)
+
+        # ----- readings stored without a confidence can only answer the calls that do not need one -----
+        cached = self.ocr_cache.get(key, cache_scope)
+        if cached is not None and (cached[1] is not None or not with_confidence):
+            return cached
+
+        reading = self._readPlateFromBackend(plate_roi, plate_contour, with_confidence)
+        self.ocr_cache.put(key, reading, cache_scope)
+        return reading
+
+    def plotAllSteps(self, image_path, show_plot=False, save_plot=False, pipeline_result=None):
         """
         This function plots all the steps of the pipeline for the input image.
             :param image_path: input image path
             :param show_plot: condition for showing the plots
             :param save_plot: condition for saving the plots
+            :param pipeline_result: an already computed PipelineResult (the pipeline is run once if missing)
         """
-        original = cv2.imread(image_path)
-
-        # ----- checking if the input image is valid -----
-        if original is None:
-            raise ValueError("[ERROR] The input image is None.")
+        if pipeline_result is None:
+            pipeline_result = self.recognizePlateNumber(image_path, return_trace=True)
 
         # ----- adding all the image processing steps in an array -----
-        gray = cv2.cvtColor(original, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.bilateralFilter(gray, 9, 75, 75)#11 17 17
-        edged = cv2.Canny(blurred, 30, 200)
-
-        images = [original, gray, blurred, edged]
+        images = [pipeline_result.original, pipeline_result.gray, pipeline_result.blurred, pipeline_result.edged]
         titles = ["Original", "Grayscale", "Blurred", "Edge Detection"]
 
         # ----- adding the plate region (if found in the input image) -----
-        plate_contour = self.findPlateContour(edged)
-        extracted_plate = None
-        text = "No plate found"
-
-        if plate_contour is not None:
-            extracted_plate = self.extractPlateRegion(original, plate_contour)
-            if extracted_plate is not None:
-                images.append(extracted_plate)
-                titles.append("Extracted Plate")
+        if pipeline_result.plate_region is not None:
+            images.append(pipeline_result.plate_region)
+            titles.append("Extracted Plate")
+        if pipeline_result.cleaned_plate is not None:
+            images.append(pipeline_result.cleaned_plate)
+            titles.append("Cleaned Plate")
 
         # ----- plotting all the steps images in one single plot -----
         plt.figure(figsize=(15, 6))
@@ -161,7 +775,7 @@ class NumberPlateRecognizer:
                 plt.axis('off')
 
         # ----- setting the title -----
-        plt.suptitle(f"Pipeline Steps{' - Detected: ' + self.recognizePlateNumber(image_path)[1]}", fontsize=16)
+        plt.suptitle(f"Pipeline Steps - Detected: {pipeline_result.asTuple()[1]}", fontsize=16)
         plt.tight_layout()
 
         # ----- condition for showing the plots -----
@@ -172,12 +786,30 @@ class NumberPlateRecognizer:
         if save_plot:
             plt.savefig(f"results/pipeline_steps_{os.path.splitext(os.path.basename(image_path))[0]}.png")
 
-    def recognizePlateNumber(self, image_path, image=None):
+        plt.close()
+
+    def recognizePlateNumber(self, image_path, image=None, return_trace=False):
         """
         This function recognizes the number plate from the input image.
              Input image can pe image from path or image from camera feed-sent from other code   
             :param image_path: input image path
-        :return: the extracted plate region and the text from the plate
+            :param image: already loaded image (the path is only read if this is None)
+            :param return_trace: condition for returning the PipelineResult with all the intermediates
+        :return: the extracted plate region and the text from the plate (or the PipelineResult)
+        """
+        pipeline_result = self.tracePipeline(image_path, image)
+
+        if return_trace:
+            return pipeline_result
+
+        return pipeline_result.asTuple()
+
+    def tracePipeline(self, image_path, image=None):
+        """
+        This function runs every step of the pipeline once and keeps all the intermediates.
+            :param image_path: input image path
+            :param image: already loaded image (the path is only read if this is None)
+        :return: the PipelineResult of the run
         """
         if image is None:
             image = cv2.imread(image_path)
@@ -186,17 +818,29 @@ class NumberPlateRecognizer:
         if image is None:
             raise ValueError(f"Cannot read image from {image_path}")
 
-        edged = self.preprocessImage(image)
-        plate_contour = self.findPlateContour(edged)
+        result = PipelineResult(image_path, image)
+        timings = result.timings
 
-        if plate_contour is None:
-            return None, "No plate contour found"
+        result.gray, result.blurred, result.edged, result.plate_contour = self.localizePlate(image, timings)
+
+        if result.plate_contour is None:
+            return result
 
-        plate_region = self.extractPlateRegion(image, plate_contour)
+        start = time.perf_counter()
+        result.plate_region = self.extractPlateRegion(image, result.plate_contour)
+        timings["extract_ms"] = (time.perf_counter() - start) * 1000
+        if self.metrics is not None:
+            self.metrics.observeStage("extract", timings["extract_ms"])
         #cv2.imshow("ROI", plate_region)
-        plate_region_processed = self.cleanPlateForOCR(plate_region)
-        text = pytesseract.image_to_string(plate_region, config='--oem 3 --psm 8 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
 
-        return plate_region, text.strip()
+        start = time.perf_counter()
+        result.cleaned_plate = self.cleanPlateForOCR(result.plate_region)
+        timings["clean_ms"] = (time.perf_counter() - start) * 1000
+        if self.metrics is not None:
+            self.metrics.observeStage("clean", timings["clean_ms"])
 
+        start = time.perf_counter()
+        result.text = self.readPlateText(result.plate_region, result.plate_contour)
+        timings["ocr_ms"] = (time.perf_counter() - start) * 1000
 
+        return result
@@ -0,0 +1,137 @@
+import os
+import time
+
+import cv2
+
+from utils import validImageFile
+
+
+class ReplaySource:
+    """
+    Frame source that replays a recorded video file or an ordered directory of frames, either at the
+    recorded frame rate or as fast as possible. Used to load-test the stream headlessly and to reproduce
+    field incidents from captured footage.
+    """
+
+    DEFAULT_FPS = 30.0
+
+    def __init__(self, path, realtime=True, fps=None, loop=False):
+        """
+        Initializes the replay source.
+
+        Args:
+            path (str): Video file or directory of frames (replayed in file name order).
+            realtime (bool, optional): Pace the frames at the recorded frame rate (False replays as fast as possible).
+            fps (float, optional): Frame rate of the replay (default: the one of the video, 30 for a directory).
+            loop (bool, optional): Start over at the end instead of ending the stream.
+        """
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+
+        self.capture = None
+        self.frame_paths = None
+        if os.path.isdir(path):
+            self.frame_paths = sorted(os.path.join(path, file) for file in os.listdir(path) if validImageFile(file))
+            if not self.frame_paths:
+                raise ValueError(f"[ERROR] No frames found in the directory {path}.")
+            recorded_fps = None
+        else:
+            self.capture = cv2.VideoCapture(path)
+            if not self.capture.isOpened():
+                raise ValueError(f"[ERROR] Cannot open the video file {path}.")
+            recorded_fps = self.capture.get(cv2.CAP_PROP_FPS)
+
+        self.fps = fps or recorded_fps or self.DEFAULT_FPS
+        self.frame_index = 0
+        self.started_at = None
+
+        print(f"[Replay] {path} at {'%.1f fps' % self.fps if realtime else 'full speed'}")
+
+    def _readNext(self):
+        if self.frame_paths is not None:
+            if self.frame_index >= len(self.frame_paths):
+                return None
+            return cv2.imread(self.frame_paths[self.frame_index])
+
+        ret, frame = self.capture.read()
+        return frame if ret else None
+
+    def _rewind(self):
+        if self.capture is not None:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.frame_index = 0
+        self.started_at = None
+
+    def read(self):
+        """
+        This function returns the next frame of the recording.
+        :return: the frame, or None when the recording is over
+        """
+        frame = self._readNext()
+        if frame is None and self.loop and self.frame_index > 0:
+            self._rewind()
+            frame = self._readNext()
+        if frame is None:
+            return None
+
+        # ----- recorded frame rate: waiting until the frame is due, late frames are returned right away -----
+        if self.realtime:
+            now = time.monotonic()
+            if self.started_at is None:
+                self.started_at = now
+            delay = self.started_at + self.frame_index / self.fps - now
+            if delay > 0:
+                time.sleep(delay)
+
+        self.frame_index += 1
+        return frame
+
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+
+
+class V4L2Source:
+    """
+    Frame source for any Video4Linux2 camera (USB webcams, capture cards, the Pi camera through the
+    V4L2 compatibility layer).
+    """
+
+    def __init__(self, device=0, resolution=(640, 480), fps=None):
+        """
+        Initializes the V4L2 camera.
+
+        Args:
+            device (int or str, optional): Device index or path (e.g. /dev/video0).
+            resolution (tuple, optional): Requested (width, height) of the frames.
+            fps (float, optional): Requested frame rate (the driver default if None).
+        """
+        self.capture = cv2.VideoCapture(device, cv2.CAP_V4L2)
+        if not self.capture.isOpened():
+            raise ValueError(f"[ERROR] Cannot open the V4L2 device {device}.")
+
+        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+        if fps:
+            self.capture.set(cv2.CAP_PROP_FPS, fps)
+
+        # ----- one buffered frame: the recognizer always gets the latest frame, not a stale one -----
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS)
+        print(f"[V4L2] {device} started with resolution {resolution}")
+
+    def read(self):
+        """
+        This function captures one frame.
+        :return: the frame, or None if the capture failed
+        """
+        ret, frame = self.capture.read()
+        if not ret:
+            print("[ERROR] Failed to capture image from the V4L2 device.")
+            return None
+        return frame
+
+    def release(self):
+        self.capture.release()
@@ -0,0 +1,444 @@
+import datetime
+import os
+import sqlite3
+import threading
+
+from mysql.connector import Error, errors
+
+from database import ParkingDatabaseManager, QUERY_INSERT, ER_DUP_ENTRY
+
+# ----- the tables of database/database-setup.sql, in the SQLite dialect, plus the bookkeeping of the sync -----
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vehicles (
+    vehicle_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    plate_number VARCHAR(20) NOT NULL UNIQUE,
+    added_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    is_authorized BOOLEAN DEFAULT 1
+);
+
+-- change feed of the vehicles, also filled by the rows pulled from the central database
+CREATE TABLE IF NOT EXISTS vehicle_changes (
+    change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    plate_number VARCHAR(20) NOT NULL,
+    changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS vehicles_changes_insert AFTER INSERT ON vehicles
+BEGIN
+    INSERT INTO vehicle_changes (plate_number) VALUES (NEW.plate_number);
+END;
+
+CREATE TRIGGER IF NOT EXISTS vehicles_changes_update AFTER UPDATE ON vehicles
+WHEN OLD.plate_number IS NOT NEW.plate_number OR OLD.is_authorized IS NOT NEW.is_authorized
+BEGIN
+    INSERT INTO vehicle_changes (plate_number)
+    SELECT OLD.plate_number WHERE OLD.plate_number IS NOT NEW.plate_number
+    UNION ALL
+    SELECT NEW.plate_number;
+END;
+
+CREATE TRIGGER IF NOT EXISTS vehicles_changes_delete AFTER DELETE ON vehicles
+BEGIN
+    INSERT INTO vehicle_changes (plate_number) VALUES (OLD.plate_number);
+END;
+
+CREATE TABLE IF NOT EXISTS access_events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    plate_number VARCHAR(20) NOT NULL,
+    event_time DATETIME NOT NULL,
+    direction VARCHAR(5) NOT NULL DEFAULT 'entry' CHECK (direction IN ('entry', 'exit')),
+    lane VARCHAR(20) NOT NULL DEFAULT 'entry',
+    decision VARCHAR(20) NOT NULL,
+    confidence FLOAT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_access_events_plate_time ON access_events (plate_number, event_time);
+CREATE INDEX IF NOT EXISTS idx_access_events_lane_time ON access_events (lane, event_time);
+
+CREATE TABLE IF NOT EXISTS access_hourly (
+    hour_start DATETIME NOT NULL,
+    lane VARCHAR(20) NOT NULL,
+    direction VARCHAR(5) NOT NULL,
+    decision VARCHAR(20) NOT NULL,
+    events INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour_start, lane, direction, decision)
+);
+
+CREATE TABLE IF NOT EXISTS access_daily_plates (
+    day DATE NOT NULL,
+    plate_number VARCHAR(20) NOT NULL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    exits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, plate_number)
+);
+
+CREATE TABLE IF NOT EXISTS vehicle_presence (
+    plate_number VARCHAR(20) PRIMARY KEY,
+    inside BOOLEAN NOT NULL,
+    last_event_time DATETIME NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vehicle_presence_inside ON vehicle_presence (inside, last_event_time);
+
+CREATE TABLE IF NOT EXISTS analytics_state (
+    name VARCHAR(20) PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO analytics_state (name, value) VALUES ('last_event_id', 0);
+
+-- local changes of the vehicles, pushed to the central database by the sync
+CREATE TABLE IF NOT EXISTS sync_outbox (
+    outbox_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    plate_number VARCHAR(20) NOT NULL,
+    operation VARCHAR(6) NOT NULL,
+    is_authorized BOOLEAN
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    name VARCHAR(20) PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO sync_state (name, value) VALUES ('pulling', 0), ('last_event_id', 0);
+
+-- the rows written by the sync itself ('pulling') are not changes to push back
+CREATE TRIGGER IF NOT EXISTS vehicles_outbox_insert AFTER INSERT ON vehicles
+WHEN (SELECT value FROM sync_state WHERE name = 'pulling') = 0
+BEGIN
+    INSERT INTO sync_outbox (plate_number, operation, is_authorized) VALUES (NEW.plate_number, 'upsert', NEW.is_authorized);
+END;
+
+CREATE TRIGGER IF NOT EXISTS vehicles_outbox_update AFTER UPDATE OF is_authorized ON vehicles
+WHEN (SELECT value FROM sync_state WHERE name = 'pulling') = 0
+BEGIN
+    INSERT INTO sync_outbox (plate_number, operation, is_authorized) VALUES (NEW.plate_number, 'upsert', NEW.is_authorized);
+END;
+
+CREATE TRIGGER IF NOT EXISTS vehicles_outbox_delete AFTER DELETE ON vehicles
+WHEN (SELECT value FROM sync_state WHERE name = 'pulling') = 0
+BEGIN
+    INSERT INTO sync_outbox (plate_number, operation, is_authorized) VALUES (OLD.plate_number, 'delete', NULL);
+END;
+"""
+
+QUERY_OUTBOX = "SELECT outbox_id, plate_number, operation, is_authorized FROM sync_outbox ORDER BY outbox_id"
+QUERY_EVENTS_AFTER = ("SELECT event_id, plate_number, event_time, direction, lane, decision, confidence "
+                      "FROM access_events WHERE event_id > %s ORDER BY event_id LIMIT %s")
+
+# ----- DATETIME / DATE columns are stored as ISO text and read back as datetime / date objects -----
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("DATETIME", lambda value: datetime.datetime.fromisoformat(value.decode()))
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_converter("DATE", lambda value: datetime.date.fromisoformat(value.decode()))
+
+
+class SQLiteDatabaseManager(ParkingDatabaseManager):
+    """
+    Embedded storage backend with the methods of ParkingDatabaseManager, on a local SQLite file (WAL mode,
+    so the lookups are never blocked by the writes). Every thread has its own connection, whose statement
+    cache keeps the queries prepared. The SQLite errors are raised as mysql.connector errors, so the cache,
+    the event log and the stream handle both backends the same way.
+    """
+
+    DIALECT = "sqlite"
+    UPSERT_QUERY = QUERY_INSERT + " ON CONFLICT(plate_number) DO UPDATE SET is_authorized = excluded.is_authorized"
+
+    def __init__(self, path="parking.db", timeout=5.0, cached_statements=128):
+        """
+        Initializes the SQLite backend and creates the tables if needed.
+
+        Args:
+            path (str, optional): The database file. Defaults to 'parking.db'.
+            timeout (float, optional): Seconds to wait for a lock held by another connection. Defaults to 5.0.
+            cached_statements (int, optional): Number of prepared statements kept per connection.
+        """
+        self.path = path
+        self.database = path
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.pool_size = 4
+        self.use_prepared_statements = True
+
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._queries = {}
+        self._executor = None
+        self.sync = None
+
+        connection = self._connection()
+        connection.executescript(SQLITE_SCHEMA)
+        print(f"Successfully opened SQLite database: {self.path}")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, detect_types=sqlite3.PARSE_DECLTYPES,
+                                         cached_statements=self.cached_statements, check_same_thread=False,
+                                         isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _query(self, query):
+        # ----- the queries are written with the MySQL placeholders -----
+        translated = self._queries.get(query)
+        if translated is None:
+            translated = self._queries[query] = query.replace("%s", "?")
+        return translated
+
+    @staticmethod
+    def _error(e):
+        if isinstance(e, sqlite3.IntegrityError):
+            return errors.IntegrityError(msg=str(e), errno=ER_DUP_ENTRY if "UNIQUE" in str(e) else None)
+        if isinstance(e, sqlite3.OperationalError):
+            return errors.OperationalError(msg=str(e))
+        return errors.DatabaseError(msg=str(e))
+
+    def _execute(self, query, params=(), fetch=None, prepared=None):
+        try:
+            cursor = self._connection().execute(self._query(query), params)
+            if fetch == "all":
+                return cursor.fetchall()
+            if fetch == "one":
+                return cursor.fetchone()
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            raise self._error(e) from e
+
+    def _rollback(self, connection):
+        """
+        Rolls back the open transaction of the connection; a connection that cannot be rolled back is
+        closed, so the next call of the thread opens a new one.
+        """
+        if not connection.in_transaction:
+            return
+        try:
+            connection.execute("ROLLBACK")
+        except sqlite3.Error:
+            connection.close()
+            self._local.connection = None
+            with self._connections_lock:
+                self._connections.remove(connection)
+
+    def _execute_transaction(self, operations, batch_size):
+        # ----- no network round trips to save: all the rows of a statement go through one executemany() -----
+        connection = self._connection()
+        sent = [0]
+
+        def count(rows):
+            for row in rows:
+                sent[0] += 1
+                yield row
+
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for query, rows in operations:
+                connection.executemany(self._query(query), count(rows))
+            connection.execute("COMMIT")
+            return sent[0]
+        except BaseException as e:
+            # ----- any failure (database, or the rows given by the caller) rolls the transaction back -----
+            self._rollback(connection)
+            if isinstance(e, sqlite3.Error):
+                raise self._error(e) from e
+            raise
+
+    def apply_snapshot(self, vehicles):
+        """
+        Replaces the local vehicles with the ones of the central database, in one transaction; the plates
+        changed locally and not pushed yet are kept.
+
+        Args:
+            vehicles (list): The vehicle records of the central database.
+
+        Returns:
+            int: The number of local plates deleted.
+        """
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("UPDATE sync_state SET value = 1 WHERE name = 'pulling'")
+
+            pending = {row[0] for row in connection.execute("SELECT plate_number FROM sync_outbox")}
+            central = {vehicle["plate_number"] for vehicle in vehicles}
+            local = {row[0] for row in connection.execute("SELECT plate_number FROM vehicles")}
+            deleted = [(plate,) for plate in local - central - pending]
+
+            connection.executemany("DELETE FROM vehicles WHERE plate_number = ?", deleted)
+            connection.executemany(self._query(self.UPSERT_QUERY),
+                                   ((vehicle["plate_number"], vehicle["added_at"], vehicle["is_authorized"])
+                                    for vehicle in vehicles if vehicle["plate_number"] not in pending))
+
+            connection.execute("UPDATE sync_state SET value = 0 WHERE name = 'pulling'")
+            connection.execute("COMMIT")
+            return len(deleted)
+        except BaseException as e:
+            # ----- any failure (database, or the rows given by the caller) rolls the transaction back -----
+            self._rollback(connection)
+            if isinstance(e, sqlite3.Error):
+                raise self._error(e) from e
+            raise
+
+    def start_sync(self, central, interval_s=30.0):
+        """
+        Synchronizes the local database with a central one from a background thread.
+
+        Args:
+            central (ParkingDatabaseManager): The central (MySQL) database.
+            interval_s (float, optional): Seconds between two synchronizations. Defaults to 30.0.
+        """
+        self.sync = DatabaseSync(self, central, interval_s=interval_s)
+        self.sync.start()
+        return self.sync
+
+    def close(self):
+        """
+        Stops the sync and closes the connections.
+        """
+        if self.sync:
+            self.sync.stop()
+            self.sync = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+        print("SQLite connections closed.")
+
+
+class DatabaseSync:
+    """
+    Background synchronization of a local SQLite database with the central MySQL one:
+    the local vehicle changes are pushed (sync_outbox), the vehicles of the central database are pulled,
+    and the local access events are appended to the central access_events table.
+    """
+
+    def __init__(self, local, central, interval_s=30.0, event_batch_size=1000):
+        self.local = local
+        self.central = central
+        self.interval_s = interval_s
+        self.event_batch_size = event_batch_size
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.syncs = 0
+        self.failures = 0
+        self.pushed_vehicles = 0
+        self.pushed_events = 0
+
+    def _pushVehicles(self):
+        rows = self.local._execute(QUERY_OUTBOX, fetch="all")
+        if not rows:
+            return True
+
+        # ----- only the last change of every plate is pushed -----
+        latest = {}
+        for outbox_id, plate_number, operation, is_authorized in rows:
+            latest[plate_number] = (operation, is_authorized)
+        upserts = [(plate, bool(is_authorized)) for plate, (operation, is_authorized) in latest.items() if operation == "upsert"]
+        deletes = [plate for plate, (operation, _) in latest.items() if operation == "delete"]
+
+        if upserts and self.central.import_vehicles(upserts) is None:
+            return False
+        if deletes and self.central.delete_vehicles(deletes) is None:
+            return False
+
+        self.local._execute("DELETE FROM sync_outbox WHERE outbox_id <= %s", (rows[-1][0],))
+        self.pushed_vehicles += len(latest)
+        return True
+
+    def _pullVehicles(self):
+        vehicles = self.central.fetch_vehicles()
+        if vehicles is None:
+            return False
+
+        self.local.apply_snapshot(vehicles)
+        return True
+
+    def _pushEvents(self):
+        last_event_id = self.local._execute("SELECT value FROM sync_state WHERE name = 'last_event_id'", fetch="one")[0]
+        while True:
+            rows = self.local._execute(QUERY_EVENTS_AFTER, (last_event_id, self.event_batch_size), fetch="all")
+            if not rows:
+                return True
+            if self.central.append_events([row[1:] for row in rows]) is None:
+                return False
+
+            last_event_id = rows[-1][0]
+            self.local._execute("UPDATE sync_state SET value = %s WHERE name = 'last_event_id'", (last_event_id,))
+            self.pushed_events += len(rows)
+
+    def syncOnce(self):
+        """
+        This function runs one synchronization (push the local changes first, so they are not overwritten).
+        :return: True if the central database could be reached
+        """
+        try:
+            ok = self._pushVehicles() and self._pullVehicles() and self._pushEvents()
+        except Error as e:
+            print(f"[Sync] {e}")
+            ok = False
+
+        self.syncs += 1
+        if not ok:
+            self.failures += 1
+        return ok
+
+    def _run(self):
+        while True:
+            self.syncOnce()
+            if self.stop_event.wait(self.interval_s):
+                break
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="database-sync", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+        self.central.close()
+
+    def stats(self):
+        """
+        :return: dictionary with the number of synchronizations, failures, pushed vehicles and pushed events
+        """
+        return {"syncs": self.syncs, "failures": self.failures, "pushed_vehicles": self.pushed_vehicles,
+                "pushed_events": self.pushed_events}
+
+
+def create_database_manager():
+    """
+    This function creates the storage backend selected by the environment (.env file):
+    DB_BACKEND=mysql (default) uses DB_HOST / DB_USER / DB_PASSWORD / DB_NAME (and the optional
+    DB_POOL_SIZE / DB_TIMEOUT); DB_BACKEND=sqlite uses the local file DB_PATH, synchronized every
+    DB_SYNC_INTERVAL seconds with the MySQL database when its variables are set.
+    :return: the database manager, or None if the configuration is incomplete
+    """
+    backend = os.getenv("DB_BACKEND", "mysql").lower()
+    mysql_settings = [os.getenv("DB_HOST"), os.getenv("DB_USER"), os.getenv("DB_PASSWORD"), os.getenv("DB_NAME")]
+
+    central = None
+    if all(mysql_settings):
+        # ----- the connections are pooled, the optional DB_POOL_SIZE / DB_TIMEOUT variables tune the pool -----
+        central = ParkingDatabaseManager(*mysql_settings, pool_size=int(os.getenv("DB_POOL_SIZE", 4)),
+                                         connect_timeout=int(os.getenv("DB_TIMEOUT", 5)))
+
+    if backend == "sqlite":
+        manager = SQLiteDatabaseManager(os.getenv("DB_PATH", "parking.db"))
+        if central:
+            manager.start_sync(central, interval_s=float(os.getenv("DB_SYNC_INTERVAL", 30)))
+        return manager
+
+    if backend != "mysql":
+        print(f"Error: Unknown DB_BACKEND '{backend}'. Use 'mysql' or 'sqlite'.")
+        return None
+    if not central:
+        print("Error: One or more database environment variables are not set. Please check your .env file.")
+    return central
@@ -0,0 +1,146 @@
+from utils import bboxIoU
+
+
+class PlateTrack:
+    """
+    One plate followed across consecutive frames, with the last reading done by the OCR.
+    """
+
+    def __init__(self, track_id, bbox, frame_index):
+        self.track_id = track_id
+        self.bbox = bbox
+        self.first_seen = frame_index
+        self.last_seen = frame_index
+        self.missed_frames = 0
+        self.hits = 1
+
+        # ----- last OCR reading of this plate -----
+        self.text = None
+        self.confidence = 0.0
+        self.read_at = None
+
+    @property
+    def centroid(self):
+        x, y, w, h = self.bbox
+        return x + w / 2, y + h / 2
+
+
+class PlateTracker:
+    """
+    Associates the plate contours of consecutive frames (IoU first, centroid distance as fallback), so a
+    plate that stays in front of the camera is read by the OCR once instead of once per frame.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_centroid_distance=0.5, max_missed_frames=10,
+                 min_confidence=60.0, reread_interval=90):
+        """
+        Initializes the tracker.
+
+        Args:
+            iou_threshold (float, optional): Minimum IoU for a detection to continue a track.
+            max_centroid_distance (float, optional): Maximum centroid distance (relative to the plate width)
+                                                     for a detection with a low IoU to continue a track.
+            max_missed_frames (int, optional): Number of frames without a detection after which a track is dropped.
+            min_confidence (float, optional): OCR confidence (0 - 100) under which the plate is read again.
+            reread_interval (int, optional): Number of frames after which even a confident reading is refreshed.
+        """
+        self.iou_threshold = iou_threshold
+        self.max_centroid_distance = max_centroid_distance
+        self.max_missed_frames = max_missed_frames
+        self.min_confidence = min_confidence
+        self.reread_interval = reread_interval
+
+        self.tracks = []
+        self.next_track_id = 1
+        self.frame_index = 0
+
+        # ----- counters used to check how many OCR calls the tracker saves -----
+        self.ocr_runs = 0
+        self.ocr_reused = 0
+
+    def _matchScore(self, track, bbox):
+        iou = bboxIoU(track.bbox, bbox)
+        if iou >= self.iou_threshold:
+            return 1.0 + iou
+
+        # ----- fallback for fast moving plates: close centroids, similar size -----
+        x, y, w, h = bbox
+        track_x, track_y = track.centroid
+        distance = ((x + w / 2 - track_x) ** 2 + (y + h / 2 - track_y) ** 2) ** 0.5
+        if distance <= self.max_centroid_distance * max(w, track.bbox[2]):
+            return 1.0 - distance / (self.max_centroid_distance * max(w, track.bbox[2]) + 1e-6)
+
+        return 0.0
+
+    def update(self, bboxes):
+        """
+        This function associates the detections of a new frame with the existing tracks.
+            :param bboxes: list of (x, y, w, h) plate bounding boxes detected in the frame
+        :return: list with the track of every detection (in the same order)
+        """
+        self.frame_index += 1
+        free_tracks = list(self.tracks)
+        frame_tracks = []
+
+        for bbox in bboxes:
+            scores = [(self._matchScore(track, bbox), track) for track in free_tracks]
+            score, track = max(scores, key=lambda item: item[0], default=(0.0, None))
+
+            if track is not None and score > 0:
+                free_tracks.remove(track)
+                track.bbox = bbox
+                track.last_seen = self.frame_index
+                track.missed_frames = 0
+                track.hits += 1
+            else:
+                track = PlateTrack(self.next_track_id, bbox, self.frame_index)
+                self.next_track_id += 1
+                self.tracks.append(track)
+
+            frame_tracks.append(track)
+
+        # ----- ageing the tracks that were not seen in this frame -----
+        for track in free_tracks:
+            track.missed_frames += 1
+        self.tracks = [track for track in self.tracks if track.missed_frames <= self.max_missed_frames]
+
+        return frame_tracks
+
+    def needsOcr(self, track):
+        """
+        This function decides if the plate of a track must be read again by the OCR.
+            :param track: the track
+        :return: True for new tracks, low confidence readings and readings older than the reread interval
+        """
+        needs_ocr = (track.text is None
+                     or track.confidence < self.min_confidence
+                     or self.frame_index - track.read_at >= self.reread_interval)
+
+        if not needs_ocr:
+            self.ocr_reused += 1
+
+        return needs_ocr
+
+    def setReading(self, track, text, confidence):
+        """
+        This function stores a new OCR reading of a track.
+            :param track: the track
+            :param text: the text read by the OCR
+            :param confidence: the OCR confidence (0 - 100)
+        """
+        self.ocr_runs += 1
+
+        # ----- a confident reading is not replaced by a worse one of the same plate -----
+        if track.text and track.confidence >= self.min_confidence and confidence < track.confidence:
+            track.read_at = self.frame_index
+            return
+
+        track.text = text
+        track.confidence = confidence
+        track.read_at = self.frame_index
+
+    def stats(self):
+        """
+        :return: dictionary with the number of active tracks, OCR runs and reused readings
+        """
+        return {"tracks": len(self.tracks), "ocr_runs": self.ocr_runs, "ocr_reused": self.ocr_reused}
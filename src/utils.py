@@ -4,4 +4,18 @@ def validImageFile(file_path):
     Check if the file is a valid image file.
     """
     valid_extensions = [".jpg", ".jpeg", ".png"]
-    return any(file_path.lower().endswith(ext) for ext in valid_extensions)
\ No newline at end of file
+    return any(file_path.lower().endswith(ext) for ext in valid_extensions)
+
+def bboxIoU(first_bbox, second_bbox):
+    """
+    Compute the intersection over union of two (x, y, w, h) bounding boxes.
+    """
+    x1, y1, w1, h1 = first_bbox
+    x2, y2, w2, h2 = second_bbox
+
+    inter_w = max(0, min(x1 + w1, x2 + w2) - max(x1, x2))
+    inter_h = max(0, min(y1 + h1, y2 + h2) - max(y1, y2))
+    intersection = inter_w * inter_h
+    union = w1 * h1 + w2 * h2 - intersection
+
+    return intersection / union if union > 0 else 0.0
@@ -1,15 +1,78 @@
 
+import re
+from collections import defaultdict
+from operator import methodcaller
+
+# ----- prefixes of the plate categories (see PlateInfo.md) -----
+COUNTY_PREFIXES = frozenset(["AB", "AR", "AG", "BC", "BH", "BN", "BT", "BV", "BR", "B",
+                             "BZ", "CS", "CL", "CJ", "CT", "CV", "DB", "DJ", "GL", "GR", "GJ",
+                             "HR", "HD", "IL", "IS", "IF", "MM",
+                             "MH", "MS", "NT", "OT", "PH", "SM", "SJ",
+                             "SB", "SV", "TR", "TM", "TL", "VS", "VL", "VN"])
+SPECIAL_PREFIXES = frozenset(["A", "FA", "ALA", "MAI"])
+DIPLOMATIC_PREFIXES = frozenset(["CD", "TC", "CO"])
+
+
+def _alternation(prefixes):
+    """
+    This function builds the regex alternation of a set of prefixes, factored by their first letter
+    (e.g. "A[BGR]|B[CHNRTVZ]?|..."), so the regex engine does not try every prefix one after the other.
+        :param prefixes: set of prefixes
+    :return: the alternation (without the enclosing group)
+    """
+    tails = defaultdict(list)
+    for prefix in prefixes:
+        tails[prefix[0]].append(prefix[1:])
+
+    parts = []
+    for first in sorted(tails):
+        rest = [tail for tail in tails[first] if tail]
+        optional = "?" if len(rest) < len(tails[first]) else ""
+
+        if not rest:
+            parts.append(first)
+        elif all(len(tail) == 1 for tail in rest) and len(rest) > 1:
+            parts.append(first + "[" + "".join(sorted(rest)) + "]" + optional)
+        elif len(rest) == 1 and not optional:
+            parts.append(first + rest[0])
+        else:
+            # ----- longest tails first, so "ALA" is not cut to "A" -----
+            parts.append(first + "(?:" + "|".join(sorted(rest, key=lambda tail: (-len(tail), tail))) + ")" + optional)
+
+    return "|".join(parts)
+
+
+# ----- the rules of PlateInfo.md, one alternative per plate category -----
+#   regular:    county + 2 digits (2 or 3 for Bucharest) + 3 letters without Q, not starting with I or O
+#               (which also excludes III and OOO)
+#   temporary:  county + 3 to 6 digits, starting with 0 and not ending with 0
+#   special:    special prefix + 3 to 7 digits
+#   diplomatic: diplomatic prefix + two groups of 3 digits, each of them at least 101
+PLATE_RULES = [
+    ("regular", "(?:B[0-9]{2,3}|(?:" + _alternation(COUNTY_PREFIXES - {"B"}) + ")[0-9]{2})[A-HJ-NPR-Z][A-PR-Z]{2}"),
+    ("temporary", "(?:" + _alternation(COUNTY_PREFIXES) + ")0[0-9]{1,4}[1-9]"),
+    ("special", "(?:" + _alternation(SPECIAL_PREFIXES) + ")[0-9]{3,7}"),
+    ("diplomatic", "(?:" + _alternation(DIPLOMATIC_PREFIXES) + ")(?:1(?:0[1-9]|[1-9][0-9])|[2-9][0-9]{2}){2}"),
+]
+
+# ----- compiled once: one named group per category, used with fullmatch -----
+PLATE_PATTERN = re.compile("|".join(f"(?P<{category}>{rule})" for category, rule in PLATE_RULES))
+
+# ----- splits a valid plate into its prefix, digits and letters -----
+PLATE_PARTS_PATTERN = re.compile("([A-Z]+)([0-9]+)([A-Z]*)")
+
+# ----- runs of non digits / digits, read by the char-by-char helpers -----
+LETTERS_PATTERN = re.compile(r"\D*")
+DIGITS_PATTERN = re.compile(r"\d*")
+
+
 class RomanianLicensePlateValidator:
     def __init__(self):
         
-        self.county_prefixes =["AB", "AR", "AG", "BC", "BH", "BN", "BT", "BV", "BR","B",
-            "BZ","CS", "CL", "CJ", "CT", "CV","DB","DJ", "GL", "GR", "GJ", 
-            "HR", "HD", "IL", "IS", "IF", "MM", 
-            "MH", "MS", "NT", "OT", "PH", "SM", "SJ",
-            "SB", "SV", "TR", "TM", "TL", "VS", "VL", "VN"]
-            
-        self.special_prefixes = {"A", "FA", "ALA", "MAI"}
-        self.diplomatic_prefixes= {"CD", "TC", "CO"}
+        # ----- sets, so the prefix lookups are O(1) -----
+        self.county_prefixes = COUNTY_PREFIXES
+        self.special_prefixes = SPECIAL_PREFIXES
+        self.diplomatic_prefixes = DIPLOMATIC_PREFIXES
         
     def removeSpacesFromString(self, input_string):
         """
@@ -97,145 +160,116 @@ class RomanianLicensePlateValidator:
         return prefix in self.county_prefixes
 
 
+    # ----- helpers of the former char-by-char validator, kept for their callers, answered by the compiled rules -----
+
     def GetFirstCharacters(self, plate, plate_index):
-        result = ""
+        """
+        This function reads the characters of the plate before its first digit.
+            :param plate: the plate text
+            :param plate_index: index where the reading starts
+        :return: the characters and the index after them
+        """
+        result = LETTERS_PATTERN.match(plate).group()
+        return result, plate_index + len(result)
 
-        for character in plate:
-            if character.isdigit():
-                break
-            result += character
-            plate_index += 1
 
-        return result, plate_index
-        
-        
     def GetDigits(self, plate, plate_index):
-        result = ""
+        """
+        This function reads the digits of the plate starting at plate_index.
+            :param plate: the plate text
+            :param plate_index: index where the reading starts
+        :return: the digits and the index after them
+        """
+        result = DIGITS_PATTERN.match(plate, plate_index).group()
+        return result, plate_index + len(result)
 
-        for index in range(plate_index, len(plate)):
-            if not plate[index].isdigit():
-                break
-            result += plate[index]
-            plate_index += 1
 
-        return result, plate_index
+    def getLastDigits(self, plate, plate_index):
+        """
+        This function reads the characters of the plate after its digits (the letters of a regular plate).
+            :param plate: the plate text
+            :param plate_index: index where the reading starts
+        :return: the characters and the index after them
+        """
+        result = LETTERS_PATTERN.match(plate, plate_index).group()
+        return result, plate_index + len(result)
+
+
+    def _category(self, prefix, numbers, letters):
+        parts = self.parsePlateFormat(prefix + numbers + letters)
+        if parts is None or (parts["prefix"], parts["digits"], parts["letters"]) != (prefix, numbers, letters):
+            return None
+        return parts["category"]
+
+
+    def CheckDiplomaticPlate(self, diplomatic_numbers, letters):
+        """
+        This function checks the digits of a diplomatic plate (two groups of 3 digits, each at least 101, no letters).
+        """
+        return self._category("CD", diplomatic_numbers, letters) == "diplomatic"
+
+
+    def CheckSpecialPlate(self, special_plate_numbers, letters):
+        """
+        This function checks the digits of a special plate (3 to 7 digits, no letters).
+        """
+        return self._category("A", special_plate_numbers, letters) == "special"
+
+
+    def CheckRegularPlate(self, county, number, letters):
+        """
+        This function checks a county plate: permanent (digits and 3 letters) or temporary (digits only).
+        """
+        return self._category(county, number, letters) in ("regular", "temporary")
 
 
-    def getLastDigits(self,plate,plate_index):
-        result=""
-        
-        for index in range(plate_index, len(plate)):
-            if plate[index].isdigit():
-                break
-                
-            result += plate[index]
-            plate_index += 1
-        
-        return result, plate_index
-    
-    
-    
-    
-    
-    def CheckDiplomaticPlate(self,diplomatic_numbers,letters):
-        '''
-        This verifies if the diplomatic plate numbers follow the rules and there are no letters after the digits
-        '''
-        length=len(diplomatic_numbers)
-        if length == 6 and diplomatic_numbers.isdigit() and int(diplomatic_numbers[0:3])>=101 and int(diplomatic_numbers[3:6])>=101 and letters=="":
-            return True
-        else:
-            return False
-    
-    def CheckSpecialPlate(self,special_plate_numbers, letters):
-        '''
-        This verifies if the diplomatic plate numbers follow the rules and there are no letters after the digits
-        '''
-        
-        length=len(special_plate_numbers)
-        if length >= 3 and length<=7 and special_plate_numbers.isdigit() and letters=="":
-            return True
-        else: 
-            return False      
-            
-            
-            
-            
-    def CheckRegularPlate(self,county,number,letters):
-        '''
-        This verifies if the regular plates follow the template of temporary or permanent plates from bucharest and other counties
-        '''
-        if len(number) >= 4 and len(number)<=6 and number[0]=="0" and number[len(number)-1]!="0" and letters=="" :#Temporary plates
-            return True
-        elif(county=="B" and len(number) >= 2 and len(number)<=3 and len(letters)==3):#Bucharest Plates
-            if(self.isValid3LetterString(letters)==True):
-                return True
-        elif(county!="B"and len(county)==2 and len(number) ==2  and len(letters)==3 ):#Other county permanent plates
-            if(self.isValid3LetterString(letters)==True):
-                return True
-            
-        else: return False    
-        
-        
-        
-        
-        
-        
-        
-        
-                
 #----------MAIN VERIFICATION FUNCTION FOR ROMANIAN PLATES-------
 
 
-    def verifyPlateFormat(self, text_plate):
-        
-        
-        
-        
-        # ----- removing all spaces from the input string -----
+    def parsePlateFormat(self, text_plate):
+        """
+        This function checks the plate against the compiled rules of PlateInfo.md and splits it in its parts.
+            :param text_plate: the plate text (spaces are ignored)
+        :return: dictionary with the category ("regular", "temporary", "special" or "diplomatic"), the prefix,
+                 the digits and the letters of the plate, or None if the plate is not valid
+        """
         text_plate = self.removeSpacesFromString(text_plate)
 
-        # ----- checking if there is any lowercase letters -----
-        if not self.isUpperCase(text_plate):
-            return False
+        match = PLATE_PATTERN.fullmatch(text_plate)
+        if match is None:
+            return None
 
-            # ----- checking if there are special characters -----
-        if not self.doesNotContainSpecialCharacter(text_plate):
-           return False
+        prefix, digits, letters = PLATE_PARTS_PATTERN.fullmatch(text_plate).groups()
+        return {"category": match.lastgroup, "prefix": prefix, "digits": digits, "letters": letters}
 
 
-     
-        '''
-        FROM NOW ON, elements in variable platEntry will contain(if number is detected correctly) the 2/3 blocks of strings from a plate
-        If number is not detected correctly, error is catched in the next steps
-        
-        '''
-        
-        
-        
-        plate_index = 0
-        prefix=""
-        numbers=""
-        lastLetters=""
-        
-        prefix, plate_index = self.GetFirstCharacters(text_plate, plate_index)
-        numbers, plate_index = self.GetDigits(text_plate, plate_index)
-        lastLetters,plate_index=self.getLastDigits(text_plate,plate_index)
-        
-        if self.isValidCounty(prefix) or self.isValidSpecialPlate(prefix) or self.isValidDiplomaticPlate:
-            
-            
-            
-            if self.isValidSpecialPlate(prefix):
-                return self.CheckSpecialPlate(numbers,lastLetters)
-            elif self.isValidDiplomaticPlate(prefix):
-                return self.CheckDiplomaticPlate(numbers,lastLetters)
-            else:
-                return self.CheckRegularPlate(prefix, numbers, lastLetters)
-                
+    def verifyPlateFormat(self, text_plate):
+        """
+        This function checks if the plate follows one of the romanian plate formats.
+            :param text_plate: the plate text (spaces are ignored, lowercase letters are not valid)
+        :return: boolean corresponding to the validity of the plate
+        """
+        return PLATE_PATTERN.fullmatch(text_plate.replace(" ", "")) is not None
 
-        else:
-            return False
+
+    def validateMany(self, plates, categories=False):
+        """
+        This function checks a large number of plates at once (vehicles table, OCR logs): the compiled rules are
+        mapped over the whole batch, so no Python code runs per plate, and the spaces are only removed when the
+        batch has some.
+            :param plates: iterable of plate texts
+            :param categories: return the category of every plate (None if not valid) instead of a boolean
+        :return: list with the result of every plate, in the same order
+        """
+        plates = list(plates)
+        if " " in "".join(plates):
+            plates = map(methodcaller("replace", " ", ""), plates)
+
+        matches = map(PLATE_PATTERN.fullmatch, plates)
+        if categories:
+            return [match.lastgroup if match else None for match in matches]
+
+        return list(map(bool, matches))
         
 '''  
 
@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ----- the stream modules import each other by their flat names, the batch modules through the src package -----
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src"))
@@ -0,0 +1,52 @@
+import datetime
+
+from analytics import AccessAnalytics, upsertQuery
+from storage import SQLiteDatabaseManager
+
+DAY = datetime.datetime(2024, 5, 1)
+
+
+def at(hour, minute=0, day=0):
+    return DAY + datetime.timedelta(days=day, hours=hour, minutes=minute)
+
+
+def test_upsert_statements_of_both_dialects():
+    values = {"entries": "add", "inside": "set"}
+
+    assert upsertQuery("mysql", "rollup", ["day"], values) == (
+        "INSERT INTO rollup (day, entries, inside) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE "
+        "entries = entries + VALUES(entries), inside = VALUES(inside)")
+    assert upsertQuery("sqlite", "rollup", ["day"], values) == (
+        "INSERT INTO rollup (day, entries, inside) VALUES (%s, %s, %s) ON CONFLICT(day) DO UPDATE SET "
+        "entries = entries + excluded.entries, inside = excluded.inside")
+
+
+def test_reports_read_the_rollups_folded_incrementally(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "parking.db"))
+    analytics = AccessAnalytics(db_manager, batch_size=2)
+
+    db_manager.append_events([
+        ("TM12ABC", at(8, 5), "entry", "north", "granted", 0.9),
+        ("B123XYZ", at(8, 40), "entry", "north", "added", 0.8),
+        ("CJ45DEF", at(8, 50), "entry", "north", "denied", 0.7),
+        ("TM12ABC", at(9, 10), "entry", "south", "granted", 0.9),
+        ("TM12ABC", at(17, 0), "exit", "south", "granted", None),
+    ])
+    assert analytics.updateRollups() == 5
+
+    assert analytics.occupancy() == 1
+    assert analytics.vehiclesInside() == [("B123XYZ", at(8, 40))]
+    assert analytics.entriesPerHour(at(0), at(24)) == [(at(8), "north", 2), (at(9), "south", 1)]
+    assert analytics.topPlates(days=1, today=DAY.date()) == [("TM12ABC", 2), ("B123XYZ", 1)]
+
+    # ----- only the new events are folded, the previous ones are not counted twice -----
+    assert analytics.updateRollups() == 0
+    db_manager.append_events([("TM12ABC", at(8, 15, day=1), "entry", "north", "granted", 0.9),
+                              ("B123XYZ", at(9, 0, day=1), "exit", "north", "granted", 0.9)])
+    assert analytics.updateRollups() == 2
+
+    assert analytics.vehiclesInside() == [("TM12ABC", at(8, 15, day=1))]
+    assert analytics.topPlates(days=2, today=DAY.date() + datetime.timedelta(days=1)) == [("TM12ABC", 3),
+                                                                                           ("B123XYZ", 1)]
+    assert analytics.topPlates(days=1, limit=1, today=DAY.date() + datetime.timedelta(days=1)) == [("TM12ABC", 1)]
+    db_manager.close()
@@ -0,0 +1,96 @@
+import time
+
+from auth_cache import AuthorizationCache
+from plate_index import RegisteredPlateIndex
+from storage import SQLiteDatabaseManager
+
+
+def test_delete_removes_a_plate_that_was_never_cached_from_the_index(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "parking.db"))
+    db_manager.append_to_database("TM12ABC")
+
+    plate_index = RegisteredPlateIndex()
+    plate_index.load(db_manager.fetch_vehicles(), full=True)
+    cache = AuthorizationCache(db_manager, plate_index=plate_index)
+
+    assert cache.delete_from_database("TM12ABC")
+    assert plate_index.match("TM12ABC") is None
+    assert plate_index.match("TM12ABD") is None
+
+
+def test_incremental_refresh_sees_deletes_and_updates_made_elsewhere(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "parking.db"))
+    db_manager.append_to_database("TM12ABC")
+    db_manager.append_to_database("B123XYZ")
+
+    plate_index = RegisteredPlateIndex()
+    cache = AuthorizationCache(db_manager, plate_index=plate_index)
+    assert cache.refresh(full=True)
+
+    # ----- changes made by another process, not through the cache -----
+    db_manager.delete_from_database("TM12ABC")
+    db_manager.upsert_vehicle("B123XYZ", is_authorized=False)
+    db_manager.append_to_database("CJ01AAA")
+
+    assert cache.refresh()
+    assert cache.verify_from_database("TM12ABC") is None
+    assert cache.verify_from_database("B123XYZ")["is_authorized"] is False
+    assert cache.verify_from_database("CJ01AAA") is not None
+    assert plate_index.match("TM12ABC") is None
+    assert cache.stats()["misses"] == 0
+
+
+def test_bulk_delete_caches_the_plates_as_not_registered(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "parking.db"))
+    db_manager.append_to_database("TM12ABC")
+    db_manager.append_to_database("B123XYZ")
+
+    plate_index = RegisteredPlateIndex()
+    cache = AuthorizationCache(db_manager, plate_index=plate_index)
+    assert cache.refresh(full=True)
+
+    assert cache.delete_vehicles(["TM12ABC", "B123XYZ"]) == 2
+    assert cache.verify_from_database("TM12ABC") is None
+    assert cache.verify_from_database("B123XYZ") is None
+    assert plate_index.match("B123XYZ") is None
+    assert cache.stats()["misses"] == 0
+
+
+def test_transactions_run_through_the_cache_are_seen_right_away(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "parking.db"))
+    db_manager.append_to_database("TM12ABC")
+
+    cache = AuthorizationCache(db_manager)
+    assert cache.refresh(full=True)
+
+    cache.run_transaction([("DELETE FROM vehicles WHERE plate_number = %s", [("TM12ABC",)])])
+    assert cache.run_query("SELECT COUNT(*) FROM vehicles")[0][0] == 0
+    assert cache.verify_from_database("TM12ABC") is None
+    assert cache.stats()["misses"] == 0
+
+
+class SlowRefreshDatabase(SQLiteDatabaseManager):
+    def __init__(self, path):
+        super().__init__(path)
+        self.refreshing = False
+
+    def fetch_vehicle_changes(self, after_change_id=0, limit=10000):
+        self.refreshing = True
+        time.sleep(0.2)
+        changes = super().fetch_vehicle_changes(after_change_id, limit)
+        self.refreshing = False
+        return changes
+
+
+def test_stopping_the_auto_refresh_waits_for_the_refresh_in_progress(tmp_path):
+    db_manager = SlowRefreshDatabase(str(tmp_path / "parking.db"))
+    cache = AuthorizationCache(db_manager)
+    cache.last_full_refresh = time.monotonic()
+
+    cache.startAutoRefresh(interval_s=0.01)
+    time.sleep(0.05)
+    assert db_manager.refreshing
+    cache.stopAutoRefresh()
+
+    assert not db_manager.refreshing
+    assert cache.refresh_thread is None
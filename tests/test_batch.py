@@ -0,0 +1,86 @@
+import os
+import sys
+
+import cv2
+import pytest
+
+from main import parseArguments
+from src.batch import BatchPlateRecognizer, BatchResultWriter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def result(image_path):
+    return {"image_path": image_path, "plate_found": True, "plate_text": "TM12ABC", "bbox": [1, 2, 3, 4],
+            "timings": {"preprocess_ms": 1.0, "ocr_ms": 2.0, "total_ms": 3.0}, "error": None}
+
+
+def test_csv_resume_drops_the_row_cut_by_an_interrupted_run(tmp_path):
+    output_path = str(tmp_path / "results.csv")
+    writer = BatchResultWriter(output_path)
+    writer.open(append=False)
+    writer.write(result("images/1.jpg"))
+    writer.write(result("images/2.jpg"))
+    writer.close()
+
+    # ----- interrupted while writing the third row, inside the timings, then inside the image path -----
+    with open(output_path, "a", newline="") as file:
+        file.write("images/3.jpg,True,TM12ABC,1,2,3,4,1.0")
+
+    writer = BatchResultWriter(output_path)
+    assert writer.readProcessedPaths() == {"images/1.jpg", "images/2.jpg"}
+
+    with open(output_path, "a", newline="") as file:
+        file.write("\r\nimages/4.j")
+    assert writer.readProcessedPaths() == {"images/1.jpg", "images/2.jpg"}
+
+    writer.open(append=True)
+    writer.write(result("images/4.jpg"))
+    writer.close()
+
+    assert writer.readProcessedPaths() == {"images/1.jpg", "images/2.jpg", "images/4.jpg"}
+    with open(output_path, newline="") as file:
+        assert file.read().splitlines()[-1].startswith("images/4.jpg,True,TM12ABC")
+
+
+def test_jsonl_resume_drops_the_cut_line(tmp_path):
+    output_path = str(tmp_path / "results.jsonl")
+    writer = BatchResultWriter(output_path)
+    writer.open(append=False)
+    writer.write(result("images/1.jpg"))
+    writer.close()
+
+    with open(output_path, "a") as file:
+        file.write('{"image_path": "images/2.jpg", "plate_fo')
+
+    assert writer.readProcessedPaths() == {"images/1.jpg"}
+    writer.open(append=True)
+    writer.write(result("images/2.jpg"))
+    writer.close()
+    assert writer.readProcessedPaths() == {"images/1.jpg", "images/2.jpg"}
+
+
+def test_in_process_batch_leaves_the_caller_thread_settings_alone(monkeypatch):
+    monkeypatch.delenv("OMP_THREAD_LIMIT", raising=False)
+    threads = cv2.getNumThreads()
+    cv2.setNumThreads(4)
+    try:
+        batch = BatchPlateRecognizer(workers=1, ocr_backend="tesserocr")
+        image_paths = batch.collectImagePaths(os.path.join(ROOT, "images"))[:2]
+        results = list(batch.iterResults(image_paths))
+
+        assert [result["image_path"] for result in results] == image_paths
+        assert all(result["error"] is None for result in results)
+        assert cv2.getNumThreads() == 4
+        assert "OMP_THREAD_LIMIT" not in os.environ
+    finally:
+        cv2.setNumThreads(threads)
+
+
+def test_metrics_file_is_rejected_in_batch_mode(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["main.py", "--batch", "out.csv", "--metrics-file", "metrics.prom"])
+    with pytest.raises(SystemExit):
+        parseArguments()
+
+    monkeypatch.setattr(sys, "argv", ["main.py", "--metrics-file", "metrics.prom"])
+    assert parseArguments().metrics_file == "metrics.prom"
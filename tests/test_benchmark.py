@@ -0,0 +1,58 @@
+import json
+import os
+
+from benchmark import (DEFAULT_BASELINE, DEFAULT_LABELS, benchmarkValidator, compareReports, generatePlates,
+                       loadLabels, percentile)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_validator_benchmark_measures_the_char_by_char_baseline():
+    report = benchmarkValidator(generatePlates(2000), repeat=1)
+
+    assert report["plates"] == 2000
+    assert report["legacy_plates_per_s"] > 0
+    assert report["bulk_speedup"] > 1
+
+
+def suite_report(fps=20.0, exact_match_rate=0.5, ocr_p95=40.0, machine="x86_64", ocr_backend="tesserocr"):
+    return {"environment": {"machine": machine, "ocr_backend": ocr_backend, "localization_scale": 1.0,
+                            "ocr_cascade": False, "plate_correction": False},
+            "fps": fps, "detection_rate": 0.9, "exact_match_rate": exact_match_rate, "validator_pass_rate": 0.5,
+            "latency_ms": {"ocr_ms": {"p95": ocr_p95}, "clean_ms": {"p95": 0.4}}}
+
+
+def test_committed_baseline_matches_the_labeled_suite():
+    with open(os.path.join(ROOT, DEFAULT_BASELINE)) as file:
+        baseline = json.load(file)
+
+    labels = loadLabels(os.path.join(ROOT, DEFAULT_LABELS))
+    assert baseline["images"] == len(labels)
+    assert set(baseline["results"]) == {image_path for image_path, _ in labels}
+    assert compareReports(baseline, baseline) == []
+
+
+def test_accuracy_drops_and_slowdowns_are_regressions():
+    baseline = suite_report()
+
+    assert compareReports(suite_report(fps=18.0, ocr_p95=45.0), baseline) == []
+    assert len(compareReports(suite_report(exact_match_rate=0.45), baseline)) == 1
+    assert len(compareReports(suite_report(fps=15.0, ocr_p95=50.0), baseline)) == 2
+    # ----- timing noise of the sub-millisecond stages -----
+    report = suite_report()
+    report["latency_ms"]["clean_ms"]["p95"] = 0.8
+    assert compareReports(report, baseline) == []
+
+
+def test_other_machines_only_compare_the_accuracy_of_the_same_configuration():
+    baseline = suite_report()
+
+    assert compareReports(suite_report(fps=5.0, ocr_p95=200.0, machine="aarch64"), baseline, compare_speed=False) == []
+    assert compareReports(suite_report(ocr_backend="pytesseract"), baseline) == [
+        "configuration ocr_backend: tesserocr -> pytesseract"]
+
+
+def test_percentile_interpolates_between_the_closest_ranks():
+    assert percentile([], 0.5) is None
+    assert percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert percentile([1.0, 2.0], 0.95) == 1.95
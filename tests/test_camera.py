@@ -0,0 +1,144 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from camera import PiCamera2Stream
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_stream(tmp_path, monkeypatch, **kwargs):
+    # ----- local SQLite database, replayed sample frames, no preview window -----
+    for name in ("DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "parking.db"))
+
+    options = {"platform": "replay", "source": os.path.join(ROOT, "images"), "realtime": False, "headless": True,
+               "event_spill_path": None}
+    options.update(kwargs)
+    stream = PiCamera2Stream(**options)
+
+    stream.sent = []
+    stream._send_serial_message = stream.sent.append
+    return stream
+
+
+@pytest.fixture
+def lanes(tmp_path, monkeypatch):
+    entry = make_stream(tmp_path, monkeypatch, direction="entry")
+    exit_lane = make_stream(tmp_path, monkeypatch, direction="exit")
+    entry.db_manager.append_to_database("B123XYZ", is_authorized=True)
+    entry.db_manager.refresh(full=True)
+    exit_lane.db_manager.refresh(full=True)
+    yield entry, exit_lane
+    entry.cleanup()
+    exit_lane.cleanup()
+
+
+def handle(stream, plate, use_async):
+    if use_async:
+        asyncio.run(stream._handle_plate_text_async(plate))
+    else:
+        stream._handle_plate_text(plate)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_entry_lane_opens_the_entry_barrier_and_registers_tm_plates(lanes, use_async):
+    entry, _ = lanes
+
+    handle(entry, "B123XYZ", use_async)
+    handle(entry, "TM12ABC", use_async)
+    handle(entry, "CJ12ABC", use_async)
+
+    assert entry.sent == ["open_entry", "open_entry"]
+    assert entry.db_manager.find_vehicle("TM12ABC")["is_authorized"]
+    assert entry.db_manager.find_vehicle("CJ12ABC") is None
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_exit_lane_never_opens_the_entry_barrier_nor_registers_plates(lanes, use_async):
+    _, exit_lane = lanes
+
+    handle(exit_lane, "B123XYZ", use_async)
+    handle(exit_lane, "TM12ABC", use_async)
+
+    assert exit_lane.sent == []
+    assert exit_lane.db_manager.find_vehicle("TM12ABC") is None
+
+
+def test_sync_and_async_paths_take_the_same_decisions(lanes):
+    entry, exit_lane = lanes
+    for stream in (entry, exit_lane):
+        decisions = {}
+        for use_async in (False, True):
+            logged = []
+            stream._log_event = lambda plate, decision: logged.append((plate, decision))
+            for plate in ("B123XYZ", "B123XYY", "CJ12ABC"):
+                handle(stream, plate, use_async)
+            decisions[use_async] = logged
+        assert decisions[False] == decisions[True]
+
+
+def test_unknown_direction_is_rejected(tmp_path, monkeypatch):
+    with pytest.raises(ValueError):
+        make_stream(tmp_path, monkeypatch, direction="sideways")
+
+
+def test_undecided_vehicle_is_read_at_most_max_readings_times(tmp_path, monkeypatch):
+    stream = make_stream(tmp_path, monkeypatch)
+    texts = ["TM12ABC", "CJ99XYZ", "B456DEF"]
+    calls = []
+
+    def read(plate_region, plate_contour, cache_scope=None):
+        # ----- readings that never agree: the passage stays undecided -----
+        calls.append(cache_scope)
+        return texts[len(calls) % 3], 90.0
+
+    stream.numberPlateRecognizer.readPlateTextWithConfidence = read
+    plate_contour = np.array([[[300, 280]], [[490, 280]], [[490, 320]], [[300, 320]]], dtype=np.int32)
+
+    for _ in range(30):
+        assert stream._collect_decisions(stream._read_plate(plate_contour, None)) == []
+
+    assert len(calls) == stream.decision_engine.max_readings
+    stream.cleanup()
+
+
+class FixedOcrBackend:
+    name = "fixed"
+
+    def readText(self, image, psm=8):
+        return "B123XYZ"
+
+    def readTextWithConfidence(self, image, psm=8):
+        return "B123XYZ", 90.0
+
+
+def test_pipelined_replay_decides_every_frame_before_stopping(tmp_path, monkeypatch):
+    stream = make_stream(tmp_path, monkeypatch, use_motion_gate=False, use_consensus=False, use_tracker=False)
+    frames = len(stream.source.frame_paths)
+    detected, read, decided = [], [], []
+
+    def counted(stage, calls):
+        def run(item):
+            keep = stage(item)
+            if keep is not False:
+                calls.append(item["frame_id"])
+            return keep
+        return run
+
+    # ----- the stages are timed by the pipeline test, the OCR answer itself does not matter here -----
+    stream.numberPlateRecognizer.ocr_backend = FixedOcrBackend()
+    stream._detect_stage = counted(stream._detect_stage, detected)
+    stream._ocr_stage = counted(stream._ocr_stage, read)
+    stream._handle_plate_text = decided.append
+
+    stream.start_pipelined_stream(detection_workers=2, ocr_workers=2, queue_size=frames, stats_interval=0)
+
+    # ----- the queues are deep enough for the whole replay: no frame is dropped, none is left in a queue -----
+    assert len(detected) > frames // 2
+    assert sorted(read) == sorted(detected)
+    assert decided == ["B123XYZ"] * len(read)
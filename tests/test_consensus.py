@@ -0,0 +1,79 @@
+from consensus import ConsensusDecisionEngine
+from validator import RomanianLicensePlateValidator
+
+
+def test_readings_are_requested_until_the_decision_or_the_cap():
+    engine = ConsensusDecisionEngine(max_readings=4, max_wait_s=2.0)
+    assert engine.needsReading(1, now=0.0)
+
+    # ----- disagreeing readings: undecided, the vehicle is read until the cap -----
+    for i, text in enumerate(["TM12ABC", "CJ99XYZ", "B456DEF", "TM12ABC"]):
+        assert engine.needsReading(1, now=0.1 * i)
+        assert engine.addReading(text, 90.0, vehicle_key=1, now=0.1 * i) == []
+    assert not engine.needsReading(1, now=0.5)
+
+    # ----- an agreeing vehicle is decided and not read anymore -----
+    for i in range(3):
+        engine.addReading("B123XYZ", 90.0, vehicle_key=2, now=0.1 * i)
+    assert not engine.needsReading(2, now=0.3)
+
+
+def test_readings_are_not_requested_after_the_window():
+    engine = ConsensusDecisionEngine(max_readings=10, max_wait_s=2.0, gap_s=5.0)
+    engine.addReading("TM12ABC", 90.0, vehicle_key=1, now=0.0)
+
+    assert engine.needsReading(1, now=1.9)
+    assert not engine.needsReading(1, now=2.0)
+
+
+def test_noisy_readings_are_voted_into_one_plate():
+    engine = ConsensusDecisionEngine()
+
+    plate, agreement = engine.vote([("TM12ABC", 90.0), ("TM12A8C", 60.0), ("TN12ABC", 70.0), ("TM12AB", 95.0)])
+
+    assert plate == "TM12ABC"
+    assert 0.6 < agreement < 1.0
+
+
+def test_one_decision_per_passage_and_none_during_the_hold_off():
+    engine = ConsensusDecisionEngine(validator=RomanianLicensePlateValidator().verifyPlateFormat,
+                                     gap_s=1.0, hold_off_s=10.0)
+
+    decisions = []
+    for i, text in enumerate(["TM12ABC", "TM12A8C", "tm 12 abc", "TM12ABC", "TM12ABC"]):
+        decisions += engine.addReading(text, 80.0, vehicle_key=1, now=0.1 * i)
+    assert decisions == ["TM12ABC"]
+
+    # ----- the track is lost and found again while the car waits at the barrier -----
+    assert engine.poll(now=2.0) == []
+    for i in range(3):
+        assert engine.addReading("TM12ABC", 80.0, vehicle_key=2, now=3.0 + 0.1 * i) == []
+    assert engine.stats()["suppressed"] == 1
+
+    # ----- after the hold-off the same plate is a new passage -----
+    for i in range(3):
+        decisions += engine.addReading("TM12ABC", 80.0, vehicle_key=3, now=20.0 + 0.1 * i)
+    assert decisions == ["TM12ABC", "TM12ABC"]
+
+
+def test_invalid_or_lonely_readings_are_never_decided():
+    engine = ConsensusDecisionEngine(validator=RomanianLicensePlateValidator().verifyPlateFormat, gap_s=1.0)
+
+    for i in range(3):
+        assert engine.addReading("TM12", 90.0, vehicle_key=1, now=0.1 * i) == []
+    assert engine.addReading("B123XYZ", 90.0, vehicle_key=2, now=0.0) == []
+
+    assert engine.poll(now=5.0) == []
+    assert engine.stats()["dropped"] == 2
+
+
+def test_passage_ending_early_is_decided_on_fewer_readings():
+    engine = ConsensusDecisionEngine(min_readings=3, min_final_readings=2, gap_s=1.0)
+    engine.addReading("CJ01AAA", 90.0, vehicle_key=1, now=0.0)
+    engine.addReading("CJ01AAA", 90.0, vehicle_key=1, now=0.1)
+
+    # ----- reused readings keep the passage alive without voting -----
+    assert engine.addReading("CJ01AAA", 90.0, vehicle_key=1, vote=False, now=0.9) == []
+    assert engine.poll(now=1.5) == []
+    assert engine.poll(now=2.0) == ["CJ01AAA"]
+    assert engine.flush() == []
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from correction import PlateCorrector
+from validator import RomanianLicensePlateValidator
+
+
+@pytest.fixture(scope="module")
+def corrector():
+    return PlateCorrector(RomanianLicensePlateValidator())
+
+
+@pytest.mark.parametrize("reading, plate, cost", [
+    ("TM12ABC", "TM12ABC", 0.0), ("TM 12 ABC", "TM12ABC", 0.0), ("TM12A8C", "TM12ABC", 0.3),
+    ("8123XYZ", "B123XYZ", 0.3), ("TMI2ABC", "TM12ABC", 0.3), ("B1Z3XYZ", "B123XYZ", 0.5),
+    ("CJ O567", "CJ0567", 0.3), ("CD1231S6", "CD123156", 0.3),
+])
+def test_ocr_confusions_are_corrected_to_the_closest_valid_plate(corrector, reading, plate, cost):
+    assert corrector.correctPlate(reading) == (plate, pytest.approx(cost))
+
+
+def test_readings_too_far_from_any_plate_are_left_alone(corrector):
+    assert corrector.correctPlate("XX99XXX") == (None, None)
+    assert corrector.correctText("XX99XXX") == "XX99XXX"
+    assert corrector.correctText("") == ""
+
+
+def test_equally_close_plates_make_the_reading_ambiguous(corrector):
+    # ----- per-position alternatives, e.g. the tesseract choices -----
+    assert corrector.correctPlate(["T", "M", "1", {"2": 0.0, "Z": 0.2}, "A", "B", "C"]) == ("TM12ABC", 0.0)
+    assert corrector.correctPlate(["T", "M", "1", "2", "A", "B", {"C": 0.0, "D": 0.0}]) == (None, None)
+
+
+def test_every_correction_is_a_valid_plate(corrector):
+    validator = RomanianLicensePlateValidator()
+    characters = "ABCDEFGHIJKLMNOPRSTUVXYZ0123456789"
+    generator = random.Random(0)
+
+    for _ in range(300):
+        reading = "".join(generator.choice(characters) for _ in range(generator.randint(4, 8)))
+        plate, cost = corrector.correctPlate(reading)
+        assert plate is None or (validator.verifyPlateFormat(plate) and cost <= corrector.max_cost)
+
+
+def test_corrected_readings_are_cached_up_to_the_cache_size():
+    corrector = PlateCorrector(RomanianLicensePlateValidator(), cache_size=2)
+    for reading in ("TM12A8C", "8123XYZ", "TMI2ABC"):
+        corrector.correctPlate(reading)
+
+    assert list(corrector.cache) == ["8123XYZ", "TMI2ABC"]
+    assert corrector.correctPlate("TMI2ABC") == ("TM12ABC", pytest.approx(0.3))
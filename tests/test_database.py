@@ -0,0 +1,190 @@
+import pytest
+from mysql.connector import errors
+
+from database import ParkingDatabaseManager, PooledConnection
+from storage import SQLiteDatabaseManager
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = 0
+
+    def execute(self, query, params=()):
+        if self.connection.fail_with:
+            raise self.connection.fail_with
+        self.rowcount = 1
+
+    def executemany(self, query, rows):
+        self.connection.sent.extend(rows)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.fail_with = None
+        self.sent = []
+        self.in_transaction = False
+        self.rollbacks = 0
+        self.cursors = 0
+        self.connected = True
+        self.reconnects = 0
+
+    def cursor(self, **kwargs):
+        self.cursors += 1
+        return FakeCursor(self)
+
+    def start_transaction(self):
+        assert not self.in_transaction, "transaction left open"
+        self.in_transaction = True
+
+    def commit(self):
+        self.in_transaction = False
+
+    def rollback(self):
+        self.in_transaction = False
+        self.sent.clear()
+        self.rollbacks += 1
+
+    def is_connected(self):
+        return self.connected
+
+    def reconnect(self, attempts=1, delay=0):
+        self.connected = True
+        self.reconnects += 1
+
+    def close(self):
+        pass
+
+
+def fake_manager(pool_size=2):
+    db_manager = ParkingDatabaseManager("localhost", "user", "password", "team1_parking", pool_size=pool_size,
+                                        pool_timeout=0.1)
+    db_manager.connections = []
+
+    def open_connection():
+        connection = FakeConnection()
+        db_manager.connections.append(connection)
+        return PooledConnection(connection)
+
+    db_manager._open_connection = open_connection
+    return db_manager
+
+
+def test_failing_generator_rolls_back_and_releases_the_connection():
+    db_manager = fake_manager()
+
+    def rows():
+        yield ("TM12ABC",)
+        raise KeyError("plate_number")
+
+    for _ in range(db_manager.pool_size + 1):
+        try:
+            db_manager.run_transaction([("DELETE FROM vehicles WHERE plate_number = %s", rows())], batch_size=1)
+        except KeyError:
+            pass
+
+    connection = db_manager.connections[0]
+    assert len(db_manager.connections) == 1
+    assert connection.rollbacks == db_manager.pool_size + 1 and not connection.in_transaction
+    assert db_manager.run_query("SELECT 1") == []
+
+
+def test_unexpected_error_releases_the_connection():
+    db_manager = fake_manager()
+    db_manager.run_query("SELECT 1")
+    db_manager.connections[0].fail_with = TypeError("bad parameters")
+
+    for _ in range(db_manager.pool_size + 1):
+        try:
+            db_manager.run_query("SELECT 1")
+        except TypeError:
+            pass
+
+    # ----- the broken connections were closed, the pool still hands out new ones -----
+    assert db_manager.run_query("SELECT 1") == []
+
+
+def test_malformed_import_rows_are_rejected_before_the_transaction():
+    db_manager = fake_manager()
+
+    assert db_manager.import_vehicles(["TM12ABC", {"authorized": True}]) is None
+    assert db_manager.connections == []
+
+    assert db_manager.import_vehicles(["TM12ABC", ("b 123 xyz", False)]) == 2
+    assert [row[0] for row in db_manager.connections[0].sent] == ["TM12ABC", "B123XYZ"]
+
+
+def test_sequential_queries_reuse_one_connection_and_its_prepared_statements():
+    db_manager = fake_manager()
+
+    for plate in ("TM12ABC", "B123XYZ", "CJ45DEF"):
+        db_manager.run_query("SELECT * FROM vehicles WHERE plate_number = %s", (plate,))
+    db_manager.run_query("SELECT 1")
+
+    assert len(db_manager.connections) == 1
+    assert db_manager.connections[0].cursors == 2
+
+
+def test_exhausted_pool_raises_a_pool_error():
+    db_manager = fake_manager(pool_size=2)
+    first, second = db_manager._acquire(), db_manager._acquire()
+
+    with pytest.raises(errors.PoolError):
+        db_manager._acquire()
+
+    db_manager._release(first)
+    assert db_manager._acquire() is first
+    assert len(db_manager.connections) == 2
+
+
+def test_lost_connection_is_replaced_and_the_query_run_again():
+    db_manager = fake_manager()
+    db_manager.run_query("SELECT 1")
+    db_manager.connections[0].fail_with = errors.OperationalError("MySQL server has gone away")
+
+    assert db_manager.run_query("SELECT 1") == []
+    assert len(db_manager.connections) == 2
+
+    # ----- an idle connection is health checked (and reconnected) before being used -----
+    db_manager.health_check_interval_s = 0
+    db_manager.connections[1].connected = False
+    assert db_manager.run_query("SELECT 1") == []
+    assert db_manager.connections[1].reconnects == 1
+
+
+def test_upsert_adds_then_updates_a_single_record(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "parking.db"))
+
+    assert db_manager.upsert_vehicle("TM12ABC")
+    vehicle_id = db_manager.find_vehicle("TM12ABC")["vehicle_id"]
+    assert db_manager.upsert_vehicle("TM12ABC", is_authorized=False)
+
+    vehicle = db_manager.find_vehicle("TM12ABC")
+    assert vehicle["vehicle_id"] == vehicle_id and not vehicle["is_authorized"]
+    assert db_manager.run_query("SELECT COUNT(*) FROM vehicles")[0][0] == 1
+
+
+def test_bulk_import_lookup_and_delete(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "parking.db"))
+    csv_path = tmp_path / "vehicles.csv"
+    csv_path.write_text("plate_number,is_authorized\nCJ45DEF,no\n\nMAI4567\n")
+
+    assert db_manager.import_vehicles(["TM12ABC", ("b 123 xyz", False), {"plate_number": "IS99QQQ"}],
+                                      batch_size=2) == 3
+    assert db_manager.import_vehicles_csv(str(csv_path)) == 2
+
+    vehicles = db_manager.find_vehicles(["TM12ABC", "B123XYZ", "CJ45DEF", "MAI4567", "XX00XXX", "TM12ABC"],
+                                        chunk_size=2)
+    assert list(vehicles) == ["TM12ABC", "B123XYZ", "CJ45DEF", "MAI4567", "XX00XXX"]
+    assert [vehicle and vehicle["is_authorized"] for vehicle in vehicles.values()] == [True, False, False, True,
+                                                                                        None]
+
+    assert db_manager.delete_vehicles(["TM12ABC", "B123XYZ", "XX00XXX"], batch_size=2) == 3
+    assert db_manager.find_vehicles(["TM12ABC", "B123XYZ", "IS99QQQ"])["IS99QQQ"]["plate_number"] == "IS99QQQ"
+    assert db_manager.run_query("SELECT COUNT(*) FROM vehicles")[0][0] == 3
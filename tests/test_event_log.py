@@ -0,0 +1,121 @@
+import datetime
+import json
+
+from event_log import AccessEventLog
+from storage import SQLiteDatabaseManager
+
+
+def count_events(db_manager):
+    return db_manager.run_query("SELECT COUNT(*) FROM access_events")[0][0]
+
+
+def test_truncated_spill_line_is_quarantined(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "parking.db"))
+    spill_path = tmp_path / "access_events.spill"
+
+    event_time = datetime.datetime(2024, 5, 1, 8, 30).isoformat()
+    with open(spill_path, "w") as file:
+        file.write(json.dumps(["TM12ABC", event_time, "entry", "entry", "granted", 0.9]) + "\n")
+        file.write(json.dumps(["TM12ABD", event_time, "exit", "exit", "granted", None]) + "\n")
+        # ----- last line cut by a power loss -----
+        file.write('["B123XYZ", "2024-05-01T08:3')
+
+    event_log = AccessEventLog(db_manager, spill_path=str(spill_path), flush_interval_s=60.0)
+    event_log.log("CJ01AAA", "denied")
+    event_log.close()
+
+    assert count_events(db_manager) == 3
+    assert not spill_path.exists()
+    assert (tmp_path / "access_events.spill.corrupt").read_text().startswith('["B123XYZ"')
+
+    stats = event_log.stats()
+    assert stats["replayed"] == 2 and stats["written"] == 1 and stats["quarantined"] == 1
+
+    # ----- the connection of the thread is usable afterwards -----
+    assert db_manager.append_events([("CJ01AAA", datetime.datetime.now(), "exit", "exit", "granted", None)]) == 1
+    db_manager.close()
+
+
+def test_batch_is_spilled_when_the_write_raises(tmp_path):
+    class FailingDatabase:
+        def append_events(self, events, batch_size=500):
+            raise RuntimeError("unexpected failure")
+
+    spill_path = tmp_path / "access_events.spill"
+    event_log = AccessEventLog(FailingDatabase(), spill_path=str(spill_path), flush_interval_s=60.0)
+    event_log.log("TM12ABC", "granted")
+    event_log.close()
+
+    lines = spill_path.read_text().splitlines()
+    assert len(lines) == 1 and json.loads(lines[0])[0] == "TM12ABC"
+    assert event_log.stats()["spilled"] == 1
+
+
+def test_new_events_are_not_glued_to_a_cut_line(tmp_path):
+    class UnreachableDatabase:
+        def append_events(self, events, batch_size=500):
+            return None
+
+    spill_path = tmp_path / "access_events.spill"
+    spill_path.write_text('["B123XYZ", "2024-05-01T08:3')
+
+    event_log = AccessEventLog(UnreachableDatabase(), spill_path=str(spill_path), flush_interval_s=60.0)
+    event_log.log("TM12ABC", "granted")
+    event_log.close()
+
+    lines = spill_path.read_text().splitlines()
+    assert [json.loads(line)[0] for line in lines] == ["TM12ABC"]
+
+
+class RecordingDatabase:
+    """
+    Database recording the batches written, unreachable while `reachable` is False.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.reachable = True
+
+    def append_events(self, events, batch_size=500):
+        if not self.reachable:
+            return None
+        events = list(events)
+        self.batches.append(events)
+        return len(events)
+
+
+def test_events_are_written_behind_in_batches(tmp_path):
+    db_manager = RecordingDatabase()
+    event_log = AccessEventLog(db_manager, spill_path=str(tmp_path / "access_events.spill"), batch_size=3,
+                               flush_interval_s=60.0)
+
+    plates = ["TM12ABC", "B123XYZ", "CJ45DEF", "MAI4567", "IS99QQQ", "TM12ABD", "B128XYZ"]
+    for plate in plates:
+        event_log.log(plate, "granted")
+    event_log.close()
+
+    # ----- the writer thread may wake up while the events are logged, the batches are never larger -----
+    assert all(1 <= len(batch) <= 3 for batch in db_manager.batches) and len(db_manager.batches) >= 3
+    assert [event[0] for batch in db_manager.batches for event in batch] == plates
+    assert event_log.stats()["written"] == 7 and event_log.stats()["waiting"] == 0
+
+
+def test_spilled_events_are_replayed_once_the_database_is_back(tmp_path):
+    db_manager = RecordingDatabase()
+    db_manager.reachable = False
+    spill_path = tmp_path / "access_events.spill"
+    event_log = AccessEventLog(db_manager, spill_path=str(spill_path), flush_interval_s=60.0, retry_interval_s=60.0)
+    event_log.close()
+
+    event_log._write([("TM12ABC", datetime.datetime.now(), "entry", "entry", "granted", 0.9)])
+    # ----- inside the retry window the batch is spilled without asking the database -----
+    db_manager.reachable = True
+    event_log._write([("B123XYZ", datetime.datetime.now(), "exit", "exit", "granted", None)])
+    assert db_manager.batches == [] and event_log.stats()["spilled"] == 2
+
+    event_log.retry_at = 0.0
+    event_log._write([("CJ45DEF", datetime.datetime.now(), "entry", "entry", "denied", None)])
+
+    assert [[event[0] for event in batch] for batch in db_manager.batches] == [["TM12ABC", "B123XYZ"], ["CJ45DEF"]]
+    assert not spill_path.exists()
+    assert event_log.stats()["replayed"] == 2
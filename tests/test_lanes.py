@@ -0,0 +1,67 @@
+import threading
+import time
+
+from lanes import AsyncLaneRunner
+
+
+class FakeStream:
+    """
+    Lane reading every frame as a plate (the frames are the plate texts), whose decisions fail for the "BAD" plates.
+    """
+
+    def __init__(self, lane, plates, capture_s=0.0):
+        self.lane = lane
+        self.plates = list(plates)
+        self.capture_s = capture_s
+        self.motion_gate = None
+        self.decision_engine = None
+        self.capturing = 0
+        self.capturing_at_cleanup = None
+        self.handled = []
+        self.lock = threading.Lock()
+        self.runner = None
+
+    def _capture_frame(self):
+        with self.lock:
+            self.capturing += 1
+        time.sleep(self.capture_s)
+        with self.lock:
+            self.capturing -= 1
+            return self.plates.pop(0) if self.plates else None
+
+    def _recognize_frame(self, frame):
+        return None, (frame, 90.0, None, True)
+
+    def _collect_decisions(self, reading):
+        return [reading[0]] if reading else []
+
+    async def _handle_plate_text_async(self, plate):
+        if plate.startswith("BAD"):
+            raise ConnectionError("database unreachable")
+        self.handled.append(plate)
+        if self.runner and len(self.handled) == 3:
+            self.runner.stop()
+
+    def cleanup(self):
+        self.capturing_at_cleanup = self.capturing
+
+
+def test_failed_decisions_are_reported_and_the_other_ones_handled(capsys):
+    stream = FakeStream("entry", ["B123XYZ", "BAD1", "TM12ABC"])
+    AsyncLaneRunner([stream]).start()
+
+    assert stream.handled == ["B123XYZ", "TM12ABC"]
+    output = capsys.readouterr()
+    assert "The decision for plate 'BAD1' failed" in output.out
+    assert "never retrieved" not in output.err
+
+
+def test_stopped_lane_ends_with_no_capture_in_flight():
+    stream = FakeStream("exit", ["B123XYZ"] * 1000, capture_s=0.02)
+    runner = AsyncLaneRunner([stream])
+    stream.runner = runner
+
+    runner.start()
+
+    assert len(stream.handled) >= 3
+    assert stream.capturing_at_cleanup == 0
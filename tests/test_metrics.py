@@ -0,0 +1,71 @@
+import os
+import threading
+import urllib.request
+
+from metrics import RecognizerMetrics
+from src.recognizer import NumberPlateRecognizer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FixedOcrBackend:
+    name = "fixed"
+
+    def readText(self, image, psm=8):
+        return "B123XYZ"
+
+    def readTextWithConfidence(self, image, psm=8):
+        return "B123XYZ", 90.0
+
+
+def test_shutdown_stops_the_text_file_exporter(tmp_path):
+    metrics = RecognizerMetrics()
+    stop_event = metrics.startTextFileExport(str(tmp_path / "recognizer.prom"), interval_s=0.01)
+
+    metrics.shutdown()
+
+    assert stop_event.is_set()
+    for thread in threading.enumerate():
+        if thread.name == "metrics-textfile":
+            thread.join(timeout=1.0)
+            assert not thread.is_alive()
+
+
+def test_stage_histograms_are_rendered_with_cumulative_buckets():
+    metrics = RecognizerMetrics(buckets=(0.01, 0.1))
+    for elapsed_ms in (5.0, 50.0, 500.0):
+        metrics.observeStage("ocr", elapsed_ms)
+    metrics.increment("frames_total", 3)
+
+    text = metrics.renderPrometheus()
+
+    name = "plate_recognizer_stage_duration_seconds"
+    assert f'{name}_bucket{{stage="ocr",le="0.01"}} 1' in text
+    assert f'{name}_bucket{{stage="ocr",le="0.1"}} 2' in text
+    assert f'{name}_bucket{{stage="ocr",le="+Inf"}} 3' in text
+    assert f'{name}_sum{{stage="ocr"}} 0.555000' in text
+    assert "# TYPE plate_recognizer_frames_total counter\nplate_recognizer_frames_total 3\n" in text
+
+
+def test_recognizer_reports_its_stages_to_the_file_and_the_endpoint(tmp_path):
+    metrics = RecognizerMetrics()
+    recognizer = NumberPlateRecognizer(ocr_backend=FixedOcrBackend(), metrics=metrics)
+    recognizer.recognizePlateNumber(os.path.join(ROOT, "images", "car1.jpg"))
+
+    assert set(metrics.histograms) == {"preprocess", "contour", "extract", "clean", "ocr"}
+    assert metrics.counters["frames_total"] == metrics.counters["plates_found_total"] == 1
+    assert metrics.counters["ocr_reads_total"] == 1
+
+    path = str(tmp_path / "recognizer.prom")
+    metrics.writeTextFile(path)
+    with open(path) as file:
+        assert file.read() == metrics.renderPrometheus()
+    assert not os.path.exists(f"{path}.tmp")
+
+    metrics.serve(port=0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{metrics.server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.read().decode() == metrics.renderPrometheus()
+    finally:
+        metrics.shutdown()
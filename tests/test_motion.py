@@ -0,0 +1,37 @@
+import numpy as np
+
+from motion import MotionGate
+
+
+def frame(car_x=None):
+    image = np.full((480, 640, 3), 60, np.uint8)
+    if car_x is not None:
+        image[200:400, car_x:car_x + 250] = 220
+    return image
+
+
+def test_empty_lane_is_skipped_and_a_car_wakes_the_gate():
+    gate = MotionGate(wake_frames=3, cooldown_s=0.0)
+
+    # ----- the first frame initialises the background, the gate stays awake for wake_frames frames -----
+    assert [gate.shouldProcess(frame()) for _ in range(6)] == [True, True, True, False, False, False]
+
+    assert gate.shouldProcess(frame(car_x=100))
+    assert gate.stats() == {"frames_seen": 7, "frames_processed": 4}
+
+
+def test_parked_car_is_absorbed_by_the_background():
+    gate = MotionGate(wake_frames=1, cooldown_s=0.0, learning_rate=0.5)
+    gate.shouldProcess(frame())
+
+    processed = [gate.shouldProcess(frame(car_x=100)) for _ in range(20)]
+    assert processed[0] and not any(processed[-5:])
+
+
+def test_idle_gate_skips_the_motion_check_during_the_cooldown():
+    gate = MotionGate(wake_frames=1, cooldown_s=60.0)
+    assert gate.shouldProcess(frame())
+
+    # ----- idle and inside the cooldown: even the car is not looked at -----
+    assert not gate.shouldProcess(frame(car_x=100))
+    assert gate.stats() == {"frames_seen": 2, "frames_processed": 1}
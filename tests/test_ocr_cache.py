@@ -0,0 +1,107 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+import ocr_cache
+from ocr_cache import PlateOCRCache
+from src.recognizer import NumberPlateRecognizer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def plate_image(text, shift=0):
+    image = np.full((60, 260), 235, np.uint8)
+    cv2.rectangle(image, (2, 2), (257, 57), 0, 2)
+    cv2.putText(image, text, (12 + shift, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 20, 4)
+    return image
+
+
+def test_plates_differing_by_one_character_do_not_share_an_entry():
+    cache = PlateOCRCache()
+    for first, second in [("TM12ABC", "TM12ABD"), ("TM13ABC", "TM18ABC"), ("B123XYZ", "B128XYZ")]:
+        cache.put(cache.hashImage(plate_image(first)), (first, 90.0))
+        assert cache.get(cache.hashImage(plate_image(second))) is None
+
+
+def test_near_duplicates_only_match_inside_their_scope():
+    cache = PlateOCRCache(max_distance=64)
+    cache.put(cache.hashImage(plate_image("TM13ABC")), ("TM13ABC", 90.0), scope=1)
+
+    # ----- same track: the shifted plate region reuses the reading -----
+    assert cache.get(cache.hashImage(plate_image("TM13ABC", shift=2)), scope=1) == ("TM13ABC", 90.0)
+    # ----- next car, close hash: never answered from the previous track -----
+    assert cache.get(cache.hashImage(plate_image("TM18ABC")), scope=2) is None
+    assert cache.get(cache.hashImage(plate_image("TM18ABC"))) is None
+
+
+def test_identical_regions_hit_without_a_scope():
+    cache = PlateOCRCache(ttl_s=None)
+    key = cache.hashImage(plate_image("B123XYZ"))
+    cache.put(key, ("B123XYZ", None))
+    assert cache.get(key) == ("B123XYZ", None)
+
+
+def test_noisy_and_shifted_real_plate_regions_hit_inside_a_track():
+    # ----- plate bounding boxes found by the recognizer on the sample pictures -----
+    samples = [("PiCamImages/MAI_2.jpg", (302, 285, 190, 38)), ("PiCamImages/TRICKY_1.jpg", (318, 368, 223, 51)),
+               ("images/car1.jpg", (285, 416, 171, 41))]
+    generator = np.random.default_rng(0)
+    cache = PlateOCRCache(max_distance=80)
+
+    for track_id, (image_path, (x, y, w, h)) in enumerate(samples):
+        image = cv2.imread(os.path.join(ROOT, image_path))
+        cache.put(cache.hashImage(image[y:y + h, x:x + w]), (image_path, 90.0), scope=track_id)
+
+        # ----- sensor noise (sigma 2) on the same frame -----
+        noisy = np.clip(image + generator.normal(0, 2, image.shape), 0, 255).astype(np.uint8)
+        assert cache.get(cache.hashImage(noisy[y:y + h, x:x + w]), scope=track_id) == (image_path, 90.0)
+
+        # ----- contour one pixel off in every direction -----
+        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1)]:
+            region = image[y + dy:y + dy + h, x + dx:x + dx + w]
+            assert cache.get(cache.hashImage(region), scope=track_id) == (image_path, 90.0)
+
+        # ----- the next car is never answered from this track -----
+        assert cache.get(cache.hashImage(image[y:y + h, x:x + w]), scope=track_id + 100) is None
+
+
+def test_least_recently_used_reading_is_evicted_and_old_ones_expire(monkeypatch):
+    cache = PlateOCRCache(max_size=2, ttl_s=30.0)
+    cache.put(1, ("TM12ABC", 90.0))
+    cache.put(2, ("B123XYZ", 90.0))
+    assert cache.get(1) == ("TM12ABC", 90.0)
+
+    cache.put(3, ("CJ01AAA", 90.0))
+    assert cache.get(2) is None
+    assert cache.get(1) == ("TM12ABC", 90.0)
+
+    # ----- 31 s later the readings are too old to be reused -----
+    now = time.monotonic()
+    monkeypatch.setattr(ocr_cache.time, "monotonic", lambda: now + 31.0)
+    assert cache.get(3) is None
+
+    stats = cache.stats()
+    assert (stats["evictions"], stats["expirations"], stats["hits"], stats["misses"]) == (1, 1, 2, 2)
+
+
+def test_recognizer_reads_a_stationary_plate_once():
+    backend_calls = []
+
+    class CountingBackend:
+        name = "counting"
+
+        def readTextWithConfidence(self, image, psm=8):
+            backend_calls.append(psm)
+            return "TM12ABC", 90.0
+
+    recognizer = NumberPlateRecognizer(ocr_backend=CountingBackend(), ocr_cache=PlateOCRCache(max_distance=80))
+    frame = cv2.imread(os.path.join(ROOT, "PiCamImages", "MAI_2.jpg"))
+    x, y, w, h = (302, 285, 190, 38)
+
+    for shift in (0, 1, 0, 1):
+        region = frame[y + shift:y + shift + h, x:x + w]
+        assert recognizer.readPlateTextWithConfidence(region, cache_scope=7) == ("TM12ABC", 90.0)
+
+    assert len(backend_calls) == 1
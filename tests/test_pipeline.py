@@ -0,0 +1,95 @@
+import threading
+import time
+
+from pipeline import DropOldestQueue, StreamPipeline
+
+
+def test_full_queue_drops_the_oldest_item_instead_of_blocking():
+    frames = DropOldestQueue(2)
+    for frame_id in range(5):
+        frames.put(frame_id)
+
+    assert frames.dropped == 3
+    assert [frames.get(timeout=0), frames.get(timeout=0)] == [3, 4]
+
+
+class Source:
+    """
+    Frames 1..count, then None (end of the recording).
+    """
+
+    def __init__(self, count, interval_s=0.0):
+        self.frames = list(range(1, count + 1))
+        self.interval_s = interval_s
+
+    def capture(self):
+        time.sleep(self.interval_s)
+        return self.frames.pop(0) if self.frames else None
+
+
+def run(pipeline, timeout=5.0):
+    pipeline.start()
+    deadline = time.monotonic() + timeout
+    while pipeline.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pipeline.stop()
+
+
+def test_frames_go_through_every_stage_and_a_failing_frame_does_not_stop_the_stream():
+    source = Source(8)
+    decided = []
+
+    def detect(item):
+        if item["frame"] == 3:
+            raise ValueError("broken frame")
+        return item["frame"] % 2 == 1
+
+    def ocr(item):
+        item["text"] = f"PLATE{item['frame']}"
+
+    def decide(item):
+        decided.append(item["text"])
+
+    pipeline = StreamPipeline(source.capture, detect, ocr, decide, accept_fn=lambda frame: frame != 5, queue_size=8)
+    run(pipeline)
+
+    # ----- the frames still queued when the source ends are processed before the stream stops -----
+    assert not pipeline.running
+    assert decided == ["PLATE1", "PLATE7"]
+    stats = pipeline.stats()
+    assert stats["frames"] == 8
+    assert stats["latency"]["detect"]["count"] == 7
+    assert stats["latency"]["end_to_end"]["count"] == 2
+
+
+def test_slow_ocr_loses_old_frames_but_never_stalls_the_capture():
+    source = Source(50, interval_s=0.002)
+    decided = []
+
+    def ocr(item):
+        time.sleep(0.05)
+
+    pipeline = StreamPipeline(source.capture, lambda item: True, ocr, lambda item: decided.append(item["frame"]),
+                              queue_size=1)
+    run(pipeline)
+
+    stats = pipeline.stats()
+    assert stats["frames"] == 50
+    assert stats["dropped"]["frames"] + stats["dropped"]["plates"] > 0
+    assert decided == sorted(decided) and 50 in decided and len(decided) < 50
+
+
+def test_decision_thread_runs_the_idle_function_while_no_plate_comes():
+    idle = threading.Event()
+    frames = [1]
+
+    def capture():
+        # ----- the lane stays open until the decision thread had nothing to do -----
+        idle.wait(timeout=2.0)
+        return frames.pop() if frames else None
+
+    pipeline = StreamPipeline(capture, lambda item: False, lambda item: True, lambda item: None, idle_fn=idle.set)
+    run(pipeline)
+
+    assert idle.is_set()
+    assert pipeline.stats()["frames"] == 1
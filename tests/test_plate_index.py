@@ -0,0 +1,80 @@
+from camera import PiCamera2Stream
+from plate_index import RegisteredPlateIndex, deletionVariants, editDistance
+from storage import SQLiteDatabaseManager
+
+
+def test_incremental_refresh_removes_the_deleted_plates(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "parking.db"))
+    db_manager.append_to_database("TM12ABC")
+
+    plate_index = RegisteredPlateIndex(db_manager)
+    assert plate_index.refresh(full=True)
+    assert plate_index.match("TM12ABD")["plate_number"] == "TM12ABC"
+
+    db_manager.delete_from_database("TM12ABC")
+    db_manager.append_to_database("B123XYZ")
+    assert plate_index.refresh()
+
+    assert plate_index.match("TM12ABC") is None
+    assert plate_index.match("B123XYZ")["plate_number"] == "B123XYZ"
+
+
+def test_edit_distance_and_deletion_variants():
+    assert editDistance("TM12ABC", "TM12ABC") == 0
+    assert editDistance("TM12ABC", "TM12A8C") == 1
+    assert editDistance("TM12ABC", "TM2ABC") == 1
+    assert editDistance("B123XYZ", "TM12ABC") == 6
+
+    assert deletionVariants("ABC", 1) == {"ABC", "BC", "AC", "AB"}
+    assert deletionVariants("ABC", 0) == {"ABC"}
+    # ----- one replaced character: both plates share a variant with one deletion -----
+    assert deletionVariants("TM12ABC", 1) & deletionVariants("TM12A8C", 1)
+
+
+def test_one_misread_character_matches_only_an_unambiguous_plate():
+    plate_index = RegisteredPlateIndex(max_distance=1)
+    plate_index.load([{"plate_number": plate} for plate in ("TM12ABC", "TM12ABD", "B123XYZ")])
+
+    assert plate_index.match("B123XYZ")["plate_number"] == "B123XYZ"
+    assert plate_index.match("B128XYZ")["plate_number"] == "B123XYZ"
+    assert plate_index.match("B23XYZ")["plate_number"] == "B123XYZ"
+    # ----- TM12ABE is one character away from two registered plates -----
+    assert plate_index.match("TM12ABE") is None
+    assert plate_index.match("TM12ABC")["plate_number"] == "TM12ABC"
+    assert plate_index.match("CJ45DEF") is None
+
+    assert [match[0] for match in plate_index.lookup("TM12ABE")] == [1, 1]
+    assert plate_index.lookup("B128XYZ", max_distance=0) == []
+    assert plate_index.stats()["lookups"] == 6
+    assert plate_index.stats()["fuzzy_matches"] == 2
+
+    assert plate_index.remove("TM12ABD")
+    assert not plate_index.remove("TM12ABD")
+    assert plate_index.match("TM12ABE")["plate_number"] == "TM12ABC"
+
+
+def stream_with_index(db_manager, plate_index):
+    stream = PiCamera2Stream.__new__(PiCamera2Stream)
+    stream.db_manager = db_manager
+    stream.plate_index = plate_index
+    return stream
+
+
+def test_fuzzy_match_is_verified_in_the_database(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "parking.db"))
+    db_manager.append_to_database("TM12ABC")
+    db_manager.append_to_database("B123XYZ")
+
+    plate_index = RegisteredPlateIndex(db_manager)
+    plate_index.refresh(full=True)
+    stream = stream_with_index(db_manager, plate_index)
+
+    assert stream._lookup_vehicle("TM12ABD")["plate_number"] == "TM12ABC"
+
+    # ----- changed elsewhere, the index is one refresh behind -----
+    db_manager.upsert_vehicle("TM12ABC", is_authorized=False)
+    db_manager.delete_from_database("B123XYZ")
+
+    assert stream._lookup_vehicle("TM12ABD") is None
+    assert stream._lookup_vehicle("B128XYZ") is None
+    assert plate_index.match("B123XYZ") is None
@@ -0,0 +1,241 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import imutils
+import numpy as np
+import pytest
+
+import src.recognizer as recognizer_module
+from src.metrics import RecognizerMetrics
+from src.recognizer import (FrameBufferPool, NumberPlateRecognizer, PytesseractBackend, TesserocrBackend,
+                            createOcrBackend)
+from src.validator import RomanianLicensePlateValidator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeOcrBackend:
+    """
+    OCR backend answering the scripted readings in order (the last one is repeated), recording every call.
+    """
+    name = "fake"
+
+    def __init__(self, readings=(("TM12ABC", 90.0),)):
+        self.readings = list(readings)
+        self.calls = []
+
+    def readText(self, image, psm=8):
+        return self.readTextWithConfidence(image, psm)[0]
+
+    def readTextWithConfidence(self, image, psm=8):
+        self.calls.append((image.shape, psm))
+        return self.readings.pop(0) if len(self.readings) > 1 else self.readings[0]
+
+    def close(self):
+        pass
+
+
+def quad(x, y, w, h):
+    return np.array([[[x, y]], [[x + w, y]], [[x + w, y + h]], [[x, y + h]]], dtype=np.int32)
+
+
+def test_refined_contours_are_checked_against_the_full_frame():
+    recognizer = NumberPlateRecognizer(ocr_backend="pytesseract", localization_scale=0.5)
+    shape = (960, 1280, 3)
+
+    assert recognizer.isPlausiblePlate(quad(500, 600, 200, 45), shape)
+    # ----- plate shaped inside a crop, but a speck (or the whole car) on the full frame -----
+    assert not recognizer.isPlausiblePlate(quad(500, 600, 20, 5), shape)
+    assert not recognizer.isPlausiblePlate(quad(0, 0, 1280, 400), shape)
+    # ----- not a four point shape -----
+    assert not recognizer.isPlausiblePlate(quad(500, 600, 200, 45)[:3], shape)
+    assert not recognizer.isPlausiblePlate(None, shape)
+
+
+def test_implausible_refinement_falls_back_to_the_full_frame_pass(monkeypatch):
+    image = cv2.imread(os.path.join(ROOT, "images", "car1.jpg"))
+    full_frame = NumberPlateRecognizer(ocr_backend="pytesseract").localizePlate(image)[3]
+
+    metrics = RecognizerMetrics()
+    recognizer = NumberPlateRecognizer(ocr_backend="pytesseract", localization_scale=0.5, metrics=metrics)
+    monkeypatch.setattr(recognizer, "refinePlateContour", lambda image, candidate: quad(10, 10, 20, 5))
+
+    plate_contour = recognizer.localizePlate(image)[3]
+
+    assert cv2.boundingRect(plate_contour) == cv2.boundingRect(full_frame)
+    assert metrics.counters["coarse_fallback_total"] == 1
+
+
+def test_pipeline_result_keeps_every_intermediate_of_one_run():
+    backend = FakeOcrBackend()
+    recognizer = NumberPlateRecognizer(ocr_backend=backend)
+    image_path = os.path.join(ROOT, "images", "car1.jpg")
+
+    pipeline_result = recognizer.recognizePlateNumber(image_path, return_trace=True)
+
+    assert pipeline_result.plate_found
+    for image in (pipeline_result.original, pipeline_result.gray, pipeline_result.blurred, pipeline_result.edged,
+                  pipeline_result.plate_region, pipeline_result.cleaned_plate):
+        assert image is not None
+    x, y, w, h = pipeline_result.bbox
+    assert pipeline_result.plate_region.shape[:2] == (h, w)
+    assert set(pipeline_result.timings) == {"preprocess_ms", "contour_ms", "extract_ms", "clean_ms", "ocr_ms"}
+    assert pipeline_result.asTuple()[1] == "TM12ABC"
+    assert recognizer.recognizePlateNumber(image_path)[1] == "TM12ABC"
+    assert len(backend.calls) == 2
+
+
+def test_plot_reuses_the_pipeline_result(tmp_path, monkeypatch):
+    recognizer = NumberPlateRecognizer(ocr_backend=FakeOcrBackend())
+    pipeline_result = recognizer.recognizePlateNumber(os.path.join(ROOT, "images", "car1.jpg"), return_trace=True)
+
+    def rerun(image_path, image=None):
+        raise AssertionError("the pipeline ran again")
+
+    monkeypatch.setattr(recognizer, "tracePipeline", rerun)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "results").mkdir()
+    recognizer.plotAllSteps("car1.jpg", save_plot=True, pipeline_result=pipeline_result)
+
+    assert (tmp_path / "results" / "pipeline_steps_car1.png").exists()
+
+
+def test_image_without_a_plate_gives_an_empty_result():
+    recognizer = NumberPlateRecognizer(ocr_backend=FakeOcrBackend())
+    pipeline_result = recognizer.recognizePlateNumber("blank", np.zeros((240, 320, 3), np.uint8), return_trace=True)
+
+    assert not pipeline_result.plate_found
+    assert pipeline_result.bbox is None
+    assert pipeline_result.asTuple() == (None, "No plate contour found")
+
+
+def synthetic_plate(text="TM12ABC"):
+    image = np.full((60, 260), 235, np.uint8)
+    cv2.putText(image, text, (12, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 20, 4)
+    return image
+
+
+def test_warm_engine_pool_reads_in_parallel_like_one_engine():
+    pytest.importorskip("tesserocr")
+    backend = createOcrBackend("tesserocr", pool_size=2)
+    plates = [synthetic_plate(text) for text in ("TM12ABC", "B123XYZ", "CJ45DEF", "MAI4567")] * 3
+    try:
+        expected = [backend.readTextWithConfidence(plate) for plate in plates]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert list(executor.map(backend.readTextWithConfidence, plates)) == expected
+
+        assert expected[0][0] == "TM12ABC"
+        assert backend.engines.qsize() == 2
+        # ----- a read in another page segmentation mode does not change the engine mode -----
+        backend.readText(plates[0], psm=7)
+        assert [backend.readTextWithConfidence(plate) for plate in plates] == expected
+    finally:
+        backend.close()
+
+
+def test_auto_backend_falls_back_to_pytesseract(monkeypatch):
+    monkeypatch.setattr(recognizer_module, "tesserocr", None)
+    assert isinstance(createOcrBackend("auto"), PytesseractBackend)
+    with pytest.raises(ImportError):
+        TesserocrBackend()
+    with pytest.raises(ValueError):
+        createOcrBackend("easyocr")
+
+
+def test_candidate_prefilter_keeps_only_plate_shaped_contours():
+    recognizer = NumberPlateRecognizer(ocr_backend=FakeOcrBackend())
+    edged = np.zeros((480, 640), np.uint8)
+    cv2.rectangle(edged, (50, 50), (250, 95), 255, 2)        # plate: 200 x 45
+    cv2.rectangle(edged, (300, 50), (400, 150), 255, 2)      # square
+    cv2.rectangle(edged, (450, 50), (460, 300), 255, 2)      # pole
+    cv2.rectangle(edged, (20, 200), (27, 202), 255, 1)       # speck
+    cv2.rectangle(edged, (5, 5), (635, 475), 255, 2)         # whole frame
+
+    candidates = recognizer.rankPlateCandidates(edged)
+
+    assert candidates and all(len(candidate) == 4 for candidate in candidates)
+    for candidate in candidates:
+        x, y, w, h = cv2.boundingRect(candidate)
+        assert 45 <= x <= 55 and 45 <= y <= 55 and 195 <= w <= 205 and 40 <= h <= 50
+    assert cv2.boundingRect(recognizer.findPlateContour(edged)) == cv2.boundingRect(candidates[0])
+
+
+def test_candidate_prefilter_matches_the_contour_by_contour_geometry():
+    recognizer = NumberPlateRecognizer(ocr_backend=FakeOcrBackend())
+    edged = recognizer.preprocessImage(cv2.imread(os.path.join(ROOT, "images", "car1.jpg")))
+    cnts = imutils.grab_contours(cv2.findContours(edged, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE))
+    min_area = recognizer.PLATE_MIN_AREA_RATIO * edged.size
+    max_area = recognizer.PLATE_MAX_AREA_RATIO * edged.size
+
+    expected = []
+    for i, contour in enumerate(cnts):
+        x, y, w, h = cv2.boundingRect(contour)
+        if (recognizer.PLATE_MIN_ASPECT_RATIO <= w / max(h, 1) <= recognizer.PLATE_MAX_ASPECT_RATIO
+                and min_area <= w * h <= max_area):
+            expected.append(i)
+
+    assert list(recognizer._plausibleBoxes(cnts, edged.shape)[0]) == expected
+
+
+def test_frame_buffers_are_reused_and_give_the_same_result():
+    image = cv2.imread(os.path.join(ROOT, "images", "car1.jpg"))
+    height, width = image.shape[:2]
+    reference = NumberPlateRecognizer(ocr_backend=FakeOcrBackend()).localizePlate(image)
+    recognizer = NumberPlateRecognizer(ocr_backend=FakeOcrBackend(), reuse_buffers=True, frame_size=(width, height))
+    edged_buffer = recognizer.buffers.get("edged", (height, width))
+
+    for _ in range(3):
+        gray, blurred, edged, plate_contour = recognizer.localizePlate(image)
+        assert edged is edged_buffer
+        assert np.array_equal(edged, reference[2])
+        assert np.array_equal(plate_contour, reference[3])
+
+
+def test_every_thread_gets_its_own_frame_buffers():
+    buffers = FrameBufferPool()
+    main_buffer = buffers.get("gray", (480, 640))
+    assert buffers.get("gray", (480, 640)) is main_buffer
+    assert buffers.get("gray", (240, 320)).shape == (240, 320)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        worker_buffer = executor.submit(buffers.get, "gray", (240, 320)).result()
+    assert worker_buffer is not buffers.get("gray", (240, 320))
+
+
+def cascade_recognizer(readings, metrics=None):
+    validator = RomanianLicensePlateValidator()
+    return NumberPlateRecognizer(ocr_backend=FakeOcrBackend(readings), plate_validator=validator.verifyPlateFormat,
+                                 metrics=metrics)
+
+
+def test_cascade_stops_at_the_first_confident_valid_reading():
+    plate_region = np.full((40, 190, 3), 200, np.uint8)
+    metrics = RecognizerMetrics()
+
+    recognizer = cascade_recognizer([("TM12ABC", 91.0)], metrics)
+    assert recognizer.readPlateTextWithConfidence(plate_region) == ("TM12ABC", 91.0)
+    assert [psm for _, psm in recognizer.ocr_backend.calls] == [8]
+
+    # ----- invalid, then valid with a low confidence, then accepted on the third pass -----
+    recognizer = cascade_recognizer([("TM12A", 95.0), ("TM 12 ABC", 50.0), ("tm12abd", 80.0)], metrics)
+    assert recognizer.readPlateTextWithConfidence(plate_region) == ("TM12ABD", 80.0)
+    assert [psm for _, psm in recognizer.ocr_backend.calls] == [8, 8, 7]
+    assert metrics.counters["ocr_passes_total"] == 4
+
+
+def test_cascade_prefers_a_valid_reading_over_a_more_confident_invalid_one():
+    plate_region = np.full((40, 190, 3), 200, np.uint8)
+    plate_contour = quad(0, 0, 189, 39)
+    passes = len(NumberPlateRecognizer.OCR_CASCADE)
+
+    recognizer = cascade_recognizer([("TM12A", 95.0), ("TM12ABC", 40.0), ("XX", 90.0)])
+    assert recognizer.readPlateTextWithConfidence(plate_region, plate_contour) == ("TM12ABC", 40.0)
+    assert len(recognizer.ocr_backend.calls) == passes
+
+    # ----- without a contour there is no rectified pass -----
+    recognizer = cascade_recognizer([("TM12A", 95.0), ("XX", 90.0)])
+    assert recognizer.readPlateTextWithConfidence(plate_region) == ("TM12A", 95.0)
+    assert len(recognizer.ocr_backend.calls) == passes - 1
+    # ----- the normalized passes are read at the OCR plate height -----
+    assert recognizer.ocr_backend.calls[0][0][0] == NumberPlateRecognizer.OCR_PLATE_HEIGHT
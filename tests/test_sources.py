@@ -0,0 +1,117 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import sources
+from sources import ReplaySource, V4L2Source
+
+
+def write_frames(directory, count):
+    # ----- the frame number is the gray level of the frame, names sort in replay order -----
+    for i in range(count):
+        cv2.imwrite(str(directory / f"frame_{i:03d}.png"), np.full((48, 64, 3), i * 10, np.uint8))
+    (directory / "notes.txt").write_text("not a frame")
+
+
+def test_frame_directory_is_replayed_in_name_order(tmp_path):
+    write_frames(tmp_path, 5)
+    source = ReplaySource(str(tmp_path), realtime=False)
+
+    levels = []
+    while (frame := source.read()) is not None:
+        levels.append(int(frame[0, 0, 0]))
+    assert levels == [0, 10, 20, 30, 40]
+    assert source.read() is None
+
+
+def test_looped_replay_starts_over(tmp_path):
+    write_frames(tmp_path, 3)
+    source = ReplaySource(str(tmp_path), realtime=False, loop=True)
+
+    assert [int(source.read()[0, 0, 0]) for _ in range(7)] == [0, 10, 20, 0, 10, 20, 0]
+
+
+def test_realtime_replay_paces_the_frames(tmp_path):
+    write_frames(tmp_path, 6)
+    source = ReplaySource(str(tmp_path), realtime=True, fps=50)
+
+    start = time.monotonic()
+    while source.read() is not None:
+        pass
+    assert time.monotonic() - start >= 5 / 50 - 0.01
+
+
+def test_video_file_is_replayed_until_its_end(tmp_path):
+    path = str(tmp_path / "entry.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 48))
+    if not writer.isOpened():
+        pytest.skip("OpenCV was built without a video writer")
+    for i in range(4):
+        writer.write(np.full((48, 64, 3), i * 60, np.uint8))
+    writer.release()
+
+    source = ReplaySource(path, realtime=False)
+    frames = [source.read() for _ in range(5)]
+    source.release()
+
+    assert source.fps == 25
+    assert [round(frame.mean() / 60) for frame in frames[:4]] == [0, 1, 2, 3]
+    assert frames[4] is None
+
+
+def test_missing_recordings_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ReplaySource(str(tmp_path))
+    with pytest.raises(ValueError):
+        ReplaySource(str(tmp_path / "missing.mp4"))
+
+
+class FakeCapture:
+    """
+    cv2.VideoCapture stand-in for a V4L2 camera that delivers two frames, then fails.
+    """
+
+    def __init__(self, device, backend):
+        self.device = device
+        self.backend = backend
+        self.properties = {}
+        self.frames = [np.zeros((480, 640, 3), np.uint8)] * 2
+        self.released = False
+
+    def isOpened(self):
+        return self.device != "/dev/missing"
+
+    def set(self, prop, value):
+        self.properties[prop] = value
+        return True
+
+    def get(self, prop):
+        return self.properties.get(prop, 30.0)
+
+    def read(self):
+        return (True, self.frames.pop()) if self.frames else (False, None)
+
+    def release(self):
+        self.released = True
+
+
+def test_v4l2_camera_is_configured_for_the_latest_frame(monkeypatch):
+    monkeypatch.setattr(sources.cv2, "VideoCapture", FakeCapture)
+    source = V4L2Source("/dev/video0", resolution=(1280, 720), fps=15)
+    capture = source.capture
+
+    assert capture.backend == cv2.CAP_V4L2
+    assert capture.properties[cv2.CAP_PROP_FRAME_WIDTH] == 1280
+    assert capture.properties[cv2.CAP_PROP_FRAME_HEIGHT] == 720
+    assert capture.properties[cv2.CAP_PROP_BUFFERSIZE] == 1
+    assert source.fps == 15
+
+    assert source.read() is not None and source.read() is not None
+    assert source.read() is None
+    source.release()
+    assert capture.released
+
+    with pytest.raises(ValueError):
+        V4L2Source("/dev/missing")
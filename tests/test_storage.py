@@ -0,0 +1,85 @@
+import datetime
+
+import pytest
+
+from storage import DatabaseSync, SQLiteDatabaseManager, create_database_manager
+
+
+def test_failing_rows_roll_the_transaction_back(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "parking.db"))
+    now = datetime.datetime.now()
+
+    def events():
+        yield ("TM12ABC", now, "entry", "entry", "granted", None)
+        raise KeyError("event_time")
+
+    with pytest.raises(KeyError):
+        db_manager.run_transaction([("INSERT INTO access_events (plate_number, event_time, direction, lane, decision, "
+                                     "confidence) VALUES (%s, %s, %s, %s, %s, %s)", events())])
+
+    # ----- nothing was written, and the connection of the thread can open a new transaction -----
+    assert db_manager.run_query("SELECT COUNT(*) FROM access_events")[0][0] == 0
+    assert db_manager.append_events([("TM12ABC", now, "entry", "entry", "granted", None)]) == 1
+
+
+def test_malformed_snapshot_is_rolled_back(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "parking.db"))
+    db_manager.append_to_database("TM12ABC")
+
+    with pytest.raises(KeyError):
+        db_manager.apply_snapshot([{"plate_number": "B123XYZ"}])
+
+    assert db_manager.find_vehicle("TM12ABC") is not None
+    assert db_manager.upsert_vehicle("B123XYZ", is_authorized=False)
+
+
+def test_sync_pushes_the_local_changes_and_pulls_the_central_vehicles(tmp_path):
+    local = SQLiteDatabaseManager(str(tmp_path / "local.db"))
+    central = SQLiteDatabaseManager(str(tmp_path / "central.db"))
+    central.import_vehicles(["B123XYZ", "CJ45DEF"])
+    local.import_vehicles(["CJ45DEF"])
+    local.upsert_vehicle("TM12ABC", is_authorized=False)
+    local.delete_from_database("CJ45DEF")
+    local.append_events([("TM12ABC", datetime.datetime.now(), "entry", "entry", "denied", 0.8)])
+
+    sync = DatabaseSync(local, central)
+    assert sync.syncOnce()
+
+    assert not central.find_vehicle("TM12ABC")["is_authorized"]
+    assert central.find_vehicle("CJ45DEF") is None
+    assert {vehicle["plate_number"] for vehicle in local.fetch_vehicles()} == {"TM12ABC", "B123XYZ"}
+    assert central.run_query("SELECT plate_number, decision FROM access_events") == [("TM12ABC", "denied")]
+    assert local.run_query("SELECT COUNT(*) FROM sync_outbox")[0][0] == 0
+
+    # ----- nothing new: the events are not pushed twice -----
+    assert sync.syncOnce()
+    assert sync.stats() == {"syncs": 2, "failures": 0, "pushed_vehicles": 2, "pushed_events": 1}
+
+
+def test_unreachable_central_database_keeps_the_local_changes(tmp_path):
+    class UnreachableDatabase:
+        def import_vehicles(self, vehicles, batch_size=500):
+            return None
+
+    local = SQLiteDatabaseManager(str(tmp_path / "local.db"))
+    local.upsert_vehicle("TM12ABC")
+
+    sync = DatabaseSync(local, UnreachableDatabase())
+    assert not sync.syncOnce()
+    assert sync.stats()["failures"] == 1
+    assert local.run_query("SELECT plate_number FROM sync_outbox") == [("TM12ABC",)]
+    assert local.verify_from_database("TM12ABC")["is_authorized"]
+
+
+def test_backend_is_selected_by_the_environment(tmp_path, monkeypatch):
+    for name in ("DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "parking.db"))
+
+    db_manager = create_database_manager()
+    assert isinstance(db_manager, SQLiteDatabaseManager) and db_manager.sync is None
+    db_manager.close()
+
+    monkeypatch.setenv("DB_BACKEND", "mysql")
+    assert create_database_manager() is None
@@ -0,0 +1,45 @@
+from tracker import PlateTracker
+
+
+def test_plate_staying_in_front_of_the_camera_is_read_once():
+    tracker = PlateTracker(reread_interval=90)
+
+    track = tracker.update([(100, 200, 120, 30)])[0]
+    assert tracker.needsOcr(track)
+    tracker.setReading(track, "TM12ABC", 85.0)
+
+    # ----- the car moves a few pixels per frame, then faster (low IoU, close centroids) -----
+    for x in (103, 106, 110, 160):
+        assert tracker.update([(x, 200, 120, 30)])[0] is track
+        assert not tracker.needsOcr(track)
+
+    assert tracker.stats() == {"tracks": 1, "ocr_runs": 1, "ocr_reused": 4}
+
+
+def test_low_confidence_and_old_readings_are_read_again():
+    tracker = PlateTracker(min_confidence=60.0, reread_interval=3)
+
+    track = tracker.update([(100, 200, 120, 30)])[0]
+    tracker.setReading(track, "TM12A8C", 40.0)
+    assert tracker.needsOcr(tracker.update([(100, 200, 120, 30)])[0])
+
+    # ----- a confident reading is kept when a worse one of the same plate comes -----
+    tracker.setReading(track, "TM12ABC", 90.0)
+    tracker.setReading(track, "TM12A8C", 50.0)
+    assert (track.text, track.confidence) == ("TM12ABC", 90.0)
+
+    for _ in range(2):
+        assert not tracker.needsOcr(tracker.update([(100, 200, 120, 30)])[0])
+    assert tracker.needsOcr(tracker.update([(100, 200, 120, 30)])[0])
+
+
+def test_next_car_gets_a_new_track_and_lost_tracks_are_dropped():
+    tracker = PlateTracker(max_missed_frames=2)
+
+    first = tracker.update([(100, 200, 120, 30)])[0]
+    second = tracker.update([(100, 200, 120, 30), (500, 220, 120, 30)])[1]
+    assert second is not first and second.track_id == first.track_id + 1
+
+    for _ in range(3):
+        tracker.update([(500, 220, 120, 30)])
+    assert tracker.tracks == [second]
@@ -0,0 +1,49 @@
+import pytest
+
+from validator import RomanianLicensePlateValidator
+
+
+@pytest.fixture
+def validator():
+    return RomanianLicensePlateValidator()
+
+
+@pytest.mark.parametrize("plate, category", [
+    ("TM12ABC", "regular"), ("B123XYZ", "regular"), ("B12XYZ", "regular"), ("CJ0567", "temporary"),
+    ("MAI1234", "special"), ("A123", "special"), ("CD123156", "diplomatic"), ("TM 12 ABC", "regular"),
+])
+def test_valid_plates_are_parsed_into_their_category(validator, plate, category):
+    assert validator.verifyPlateFormat(plate)
+    assert validator.parsePlateFormat(plate)["category"] == category
+
+
+@pytest.mark.parametrize("plate", [
+    "TM12IBC", "TM12AQC", "TM12OOO", "XX12ABC", "CD100156", "CD12A156", "CJ0560", "tm12abc", "TM12AB!", "",
+])
+def test_invalid_plates_are_rejected(validator, plate):
+    assert not validator.verifyPlateFormat(plate)
+    assert validator.parsePlateFormat(plate) is None
+
+
+def test_validate_many_agrees_with_verify_plate_format(validator):
+    plates = ["TM12ABC", "TM 12 ABC", "XX12ABC", "CD123156", "MAI1234", "B12", "CJ0567"]
+
+    assert validator.validateMany(plates) == [validator.verifyPlateFormat(plate) for plate in plates]
+    assert validator.validateMany(iter(plates), categories=True) == [
+        "regular", "regular", None, "diplomatic", "special", None, "temporary"]
+    assert validator.validateMany(plate for plate in ["TM12ABC", "XX12ABC"]) == [True, False]
+
+
+def test_char_by_char_helpers_are_answered_by_the_compiled_rules(validator):
+    prefix, index = validator.GetFirstCharacters("TM12ABC", 0)
+    digits, index = validator.GetDigits("TM12ABC", index)
+    letters, index = validator.getLastDigits("TM12ABC", index)
+    assert (prefix, digits, letters, index) == ("TM", "12", "ABC", 7)
+
+    assert validator.CheckRegularPlate("TM", "12", "ABC")
+    assert validator.CheckRegularPlate("CJ", "0567", "")
+    assert not validator.CheckRegularPlate("TM", "12", "IBC")
+    assert validator.CheckSpecialPlate("1234", "")
+    assert not validator.CheckSpecialPlate("12", "")
+    assert validator.CheckDiplomaticPlate("123156", "")
+    assert not validator.CheckDiplomaticPlate("100156", "")